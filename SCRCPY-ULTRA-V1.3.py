@@ -1,20 +1,34 @@
 # SWANTEK INDUSTRIES 2024
 
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QComboBox, QLabel, QTextEdit, QFileDialog, QGroupBox, QDesktopWidget
-from PyQt5.QtCore import Qt, pyqtSignal, QEvent
-from PyQt5.QtGui import QTextOption
+from PyQt5.QtWidgets import QLineEdit, QListWidget, QListWidgetItem, QScrollArea
+from PyQt5.QtCore import Qt, pyqtSignal, QEvent, QRunnable, QThreadPool
+from PyQt5.QtGui import QTextOption, QImage, QPixmap
 import sys
 import subprocess
 import os
 import threading
 import pyautogui
-import imagehash
 import cv2
 import datetime
 import time
 import numpy as np
 import io
 import math
+import queue
+import struct
+import tempfile
+import zlib
+import hashlib
+import shutil
+import concurrent.futures
+import collections
+import itertools
+import json
+import re
+import multiprocessing
+import sqlite3
+import argparse
 import PyPDF2
 import xml.etree.ElementTree as ET
 from io import BytesIO
@@ -23,6 +37,12 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.lib.utils import ImageReader
 
+try:
+    # Optional: lets OCR worker processes keep tesseract and its language data loaded between jobs
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 # Make sure to replace 'adb_path' with the path to your adb executable if it's not in your PATH environment variable
 adb_path = 'adb'
 
@@ -32,11 +52,2571 @@ CUSTOM_EVENT_TYPE = QEvent.Type(QEvent.registerEventType())
 # Constants for PDF page limits
 MAX_PDF_PAGE_HEIGHT = 14400
 MAX_PDF_PAGE_WIDTH = 14400
+# Rows above each page limit searched for a blank gap to cut oversized images at
+SEGMENT_CUT_SEARCH_ROWS = 1200
+# A row whose darkest and brightest pixels differ by no more than this counts as blank
+SEGMENT_BLANK_ROW_RANGE = 8
+
+# Capture modes available for takeScreenshot
+CAPTURE_MODE_RAW = 'Raw Framebuffer (Persistent ADB)'
+CAPTURE_MODE_PNG = 'PNG (adb screencap -p)'
+CAPTURE_MODE_STREAM = 'scrcpy Video Stream'
+
+# Where scrcpy's video is read from in stream capture mode. On Linux scrcpy writes into a v4l2loopback
+# device, elsewhere into a Matroska recording that is read while it grows. The SCRCPY_ULTRA_STREAM
+# environment variable overrides both (any source cv2.VideoCapture can open, e.g. a test video).
+STREAM_SOURCE_ENV = 'SCRCPY_ULTRA_STREAM'
+STREAM_V4L2_DEVICE = '/dev/video2'
+STREAM_RECORDING_NAME = '.scrcpy_stream.mkv'
+# Seconds to wait for the first decoded frame of the stream
+STREAM_FRAME_TIMEOUT = 5
+# Seconds to wait after a swipe for a frame decoded since, without one the screen didn't change
+STREAM_SWIPE_FRAME_TIMEOUT = 1.0
+# Seconds between attempts to read on when a recording being written has no more frames yet
+STREAM_REOPEN_INTERVAL = 0.25
+
+# Screenshot file formats: file extension and cv2.imencode parameters
+SAVE_FORMAT_PNG_FAST = 'PNG (Fast)'
+SAVE_FORMAT_PNG_SMALL = 'PNG (Small)'
+SAVE_FORMAT_JPEG = 'JPEG (Quality 95)'
+SAVE_FORMATS = {
+    SAVE_FORMAT_PNG_FAST: ('.png', [cv2.IMWRITE_PNG_COMPRESSION, 1]),
+    SAVE_FORMAT_PNG_SMALL: ('.png', [cv2.IMWRITE_PNG_COMPRESSION, 9]),
+    SAVE_FORMAT_JPEG: ('.jpg', [cv2.IMWRITE_JPEG_QUALITY, 95]),
+}
+# Decoded frames held in memory for crop, dedupe, stitch and OCR, beyond this the oldest are read back from disk
+FRAME_STORE_MAX_BYTES = 512 * 1024 * 1024
+# Background threads encoding and writing frames to disk
+FRAME_STORE_WRITERS = 2
+
+# Seconds to wait for the device before a persistent adb channel is considered dead
+ADB_CHANNEL_TIMEOUT = 10
+
+# Maximum frames waiting in each autoscroll pipeline stage before the capture loop blocks
+PIPELINE_QUEUE_SIZE = 8
+# Worker threads for the OCR / screen dump stage of the autoscroll pipeline
+PIPELINE_OCR_WORKERS = 2
+
+# Seconds between the cheap frame polls used to tell when the screen has stopped moving after a swipe
+SETTLE_POLL_INTERVAL = 0.05
+# Consecutive unchanged polls needed before the screen counts as settled
+SETTLE_STABLE_POLLS = 2
+# Mean absolute grey level difference between polls still treated as unchanged (cursor blink, clock)
+SETTLE_DIFF_THRESHOLD = 1.5
+# Every Nth pixel in both directions is compared, polls only need a rough picture of the screen
+SETTLE_DOWNSCALE = 8
+# If the screen hasn't moved at all after this long it is settled anyway (e.g. end of the conversation)
+SETTLE_NO_MOTION_TIMEOUT = 0.5
+# Default ceiling in seconds for waiting on slow loading media before capturing regardless
+SETTLE_DEFAULT_TIMEOUT = 3.0
+# Fraction of the screen height, centred, that settle polls capture; the full frame is only captured once settled
+SETTLE_BAND_FRACTION = 0.25
+
+# Bits per perceptual hash (aHash, dHash and pHash are each 8x8), 192 bits per frame in total
+FRAME_HASH_SIZE = 8
+# Hamming radius (of 192 bits) within which an earlier frame is a candidate duplicate
+FRAME_MATCH_RADIUS = 12
+# Thumbnail (width, height) compared to confirm a candidate, and the mean grey difference still counted as the same
+FRAME_THUMBNAIL_SIZE = (32, 64)
+FRAME_THUMBNAIL_TOLERANCE = 2.0
+# Unchanged frames in a row before autoscroll decides it reached the end rather than the app stalling
+FRAME_END_OF_SCROLL_REPEATS = 2
+# Frames in a row matching earlier (not the last) frames before autoscroll decides it is bouncing in a loop
+FRAME_LOOP_LIMIT = 3
+# FrameIndex verdicts
+FRAME_NEW = 'new'
+FRAME_STALLED = 'stalled'
+FRAME_END = 'end of scroll'
+FRAME_LOOP = 'loop'
+FRAME_LOOPING = 'looping'
+
+# Device choices: the device adb would pick by itself (ANDROID_SERIAL or the first attached one), or every attached device at once
+DEVICE_DEFAULT = 'Default Device'
+DEVICE_ALL = 'All Devices'
+
+# Default number of OCR jobs run at the same time
+OCR_DEFAULT_WORKERS = os.cpu_count() or 1
+
+# OCR engines: ocrmypdf goes image -> PDF -> ocrmypdf, the direct engine feeds the image straight to tesseract
+OCR_ENGINE_OCRMYPDF = 'ocrmypdf'
+OCR_ENGINE_TESSERACT = 'Tesseract (direct)'
+# Tesseract language(s), join several with '+' (e.g. 'eng+deu')
+OCR_LANGUAGES = 'eng'
+# Size limit of the on-disk OCR result cache, least recently used entries are evicted beyond it
+OCR_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# OCR option that only recognises the content each autoscroll frame adds
+OCR_OPTION_INCREMENTAL = 'OCR Enabled (Tesseract, New Content Only)'
+# Rows of already OCR'd content kept above a newly revealed strip so no text line is cut in half
+INCREMENTAL_OCR_MARGIN_ROWS = 48
+# Most lines at the end of the transcript compared when removing lines repeated by the next strip
+TRANSCRIPT_MAX_OVERLAP_LINES = 20
+# Seconds a warm OCR worker may take to start (load language data) or to finish one job
+OCR_SERVICE_START_TIMEOUT = 60
+OCR_SERVICE_JOB_TIMEOUT = 300
+# Seconds a worker has to answer a health check ping
+OCR_SERVICE_PING_TIMEOUT = 5
+# Seconds a job waits for a free warm OCR worker before falling back to a one-off tesseract process
+OCR_SERVICE_CHECKOUT_TIMEOUT = OCR_SERVICE_JOB_TIMEOUT
+
+# Rows of the previous frame used as the template when matching the next frame
+STITCH_OVERLAP_ROWS = 50
+# Rows reserved up front for the incremental stitcher's canvas, it doubles whenever it fills up
+STITCH_INITIAL_ROWS = 8192
+# Rows encoded at a time when the stitched canvas is written out as a PNG
+STITCH_WRITE_BLOCK_ROWS = 1024
+
+# Overlap estimation methods used when stitching
+OVERLAP_MODE_AUTO = 'Auto'
+OVERLAP_MODE_ROW_SIGNATURE = 'Row Signature'
+OVERLAP_MODE_PYRAMID = 'Pyramid Template'
+OVERLAP_MODE_TEMPLATE = 'Full Template'
+# Takes the scroll offset from the UI dumps taken with the screenshots, image matching (Auto) where that can't be used
+OVERLAP_MODE_UI_LAYOUT = 'UI Layout (Screen Dump)'
+OVERLAP_MODES = [OVERLAP_MODE_AUTO, OVERLAP_MODE_ROW_SIGNATURE, OVERLAP_MODE_PYRAMID, OVERLAP_MODE_TEMPLATE, OVERLAP_MODE_UI_LAYOUT]
+# Fraction of the moved UI nodes two frames share that must agree on the scroll offset for it to be used
+UI_ANCHOR_MIN_AGREEMENT = 0.5
+# Rows compared to confirm a UI layout offset against the pixels, and the mean grey level difference allowed
+UI_LAYOUT_CHECK_ROWS = 64
+UI_LAYOUT_MAX_DIFFERENCE = 8.0
+# Auto mode accepts an estimate at or above this confidence, otherwise it tries the next method
+OVERLAP_MIN_CONFIDENCE = 0.6
+# Fewest unique rows both frames must share for a row signature estimate to count
+OVERLAP_MIN_MATCHED_ROWS = 8
+# Pyramid levels (each halves the resolution) for the coarse template search
+OVERLAP_PYRAMID_LEVELS = 2
+
+# Swipe distance choices for autoscroll
+SWIPE_DISTANCE_DEFAULT = 'Default (1/4.5 Screen)'
+SWIPE_DISTANCE_CALIBRATED = 'Calibrated (Per App)'
+# Swipe lengths tried during calibration, as a fraction of the screen height
+SWIPE_CALIBRATION_DISTANCES = (0.3, 0.45, 0.6, 0.75)
+# Swipe durations tried during calibration, as multiples of the Swipe Speed setting
+SWIPE_CALIBRATION_DURATION_FACTORS = (1, 2)
+SWIPE_MAX_DURATION = 2000
+# Fraction of the scrolling area that must still be on screen after a swipe so frames can be stitched
+SWIPE_MIN_OVERLAP = 0.2
+# Relative difference between the measured and calibrated scroll before it counts as drifting
+SWIPE_DRIFT_TOLERANCE = 0.25
+# Consecutive drifting frames before the calibrated swipe distance is corrected
+SWIPE_DRIFT_FRAMES = 3
+
+# Crop area choices: the scrolling area found from how the frames change, or a rectangle drawn by hand
+ROI_MODE_AUTO = 'Automatic (Detect Header/Footer)'
+ROI_MODE_MANUAL = 'Manual (Select ROI)'
+# Every Nth column is compared when looking for the rows that move between frames
+ROI_COLUMN_STEP = 4
+# Grey level change of a pixel that counts as changed, and the fraction of a row's pixels that must change
+# for the row to be moving (a ticking clock or a blinking icon in the status bar stays below it)
+ROI_PIXEL_CHANGE = 8
+ROI_MOVING_FRACTION = 0.15
+# Unchanged stretches inside the scrolling area shorter than this fraction of the frame are blank content, not chrome
+ROI_MAX_GAP_FRACTION = 0.1
+# The scrolling area must cover at least this fraction of the frame height
+ROI_MIN_HEIGHT_FRACTION = 0.25
+# Frames looked at before automatic detection gives up
+ROI_DETECT_MAX_FRAMES = 4
+
+# Screenshot file names written by saveScreenshot, the ones Batch Crop + Stitch groups into sessions
+# (the _N suffix tells apart screenshots taken within the same second)
+SCREENSHOT_NAME_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:_(\d+))?\.(?:png|jpg|jpeg)$', re.IGNORECASE)
+# Timestamp (and same-second counter) at the start of any file name derived from a screenshot, e.g. _cropped
+SCREENSHOT_PREFIX_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:_(\d+))?(?=[_.]|$)')
+# Screenshots further apart than this many seconds belong to different sessions
+BATCH_SESSION_GAP_SECONDS = 120
+# Worker processes used by Batch Crop + Stitch, each stitches one session at a time
+BATCH_WORKERS = os.cpu_count() or 1
+
+# Where indexed text came from, shown with each search hit
+TEXT_SOURCE_OCR = 'OCR'
+TEXT_SOURCE_UI_DUMP = 'UI dump'
+# hOCR elements indexed as one searchable line each (the words inside them are joined)
+HOCR_LINE_CLASSES = ('ocr_line', 'ocr_header', 'ocr_caption', 'ocr_textfloat')
+# Most hits a text search returns, newest first
+SEARCH_RESULT_LIMIT = 200
+# Rows of the image shown above and below a search hit in the result viewer
+SEARCH_CONTEXT_ROWS = 1500
+
+# Frames per second of a screen recording that are looked at, the others are skipped without converting them
+RECORDING_SAMPLE_FPS = 10
+# Recording frames are downscaled by this factor before their scroll motion is estimated
+RECORDING_MOTION_SCALE = 4
+# A recording frame is kept once it has scrolled this fraction of the scrolling area past the last kept frame
+RECORDING_KEEP_FRACTION = 0.5
+# Mean grey level change of a row (per pixel) that is still treated as video compression noise
+RECORDING_NOISE_LEVEL = 6.0
+# Smallest scrolling area, in downscaled rows, worth tracking (ignores e.g. a blinking cursor)
+RECORDING_MIN_SCROLL_ROWS = 16
+
+class CustomEvent(QEvent):
+    def __init__(self, callback):
+        super().__init__(CUSTOM_EVENT_TYPE)
+        self.callback = callback
+
+class AdbChannelError(Exception):
+    pass
+
+class JobCancelled(Exception):
+    pass
+
+class Job(QRunnable):
+    """A long running task queued on the JobScheduler."""
+    def __init__(self, scheduler, name, function, on_finished=None):
+        super().__init__()
+        self.setAutoDelete(False)  # The scheduler keeps its own reference while the job is queued
+        self.scheduler = scheduler
+        self.name = name
+        self.function = function
+        self.on_finished = on_finished
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        self.scheduler.run_job(self)
+
+class JobScheduler:
+    """
+    Runs long running work off the Qt GUI thread on a QThreadPool. Jobs are queued and run one after
+    another, report progress through the log function and are cancelled cooperatively: the job
+    function calls check_cancelled() at safe points, which raises JobCancelled once stop was requested.
+    Results are handed to on_finished on the GUI thread through the CustomEvent/postEvent plumbing.
+    """
+    def __init__(self, receiver, log, max_jobs=1):
+        self.receiver = receiver
+        self.log = log
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_jobs)
+        self.jobs = []  # Queued and running jobs, in submission order
+        self.jobs_lock = threading.Lock()
+        self.local = threading.local()
+
+    def submit(self, name, function, on_finished=None):
+        """Queues function() to run as a job; on_finished(result) is called on the GUI thread."""
+        job = Job(self, name, function, on_finished)
+        with self.jobs_lock:
+            self.jobs.append(job)
+            waiting = len(self.jobs) - 1
+        if waiting:
+            self.log(f"{name} queued ({waiting} job(s) ahead).")
+        self.pool.start(job)
+        return job
+
+    def run_job(self, job):
+        self.local.job = job
+        result = None
+        try:
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            self.log(f"{job.name} started.")
+            result = job.function()
+            # A job that stopped early doesn't hand its partial result on
+            self.check_cancelled(job)
+            if job.on_finished is not None:
+                # Marshal the result back to the GUI thread
+                QApplication.postEvent(self.receiver, CustomEvent(lambda: job.on_finished(result)))
+        except JobCancelled:
+            self.log(f"{job.name} cancelled.")
+        except Exception as e:
+            self.log(f"{job.name} failed: {str(e)}")
+        finally:
+            self.local.job = None
+            with self.jobs_lock:
+                self.jobs.remove(job)
+
+    def current_job(self):
+        """Returns the job running on the calling thread, or None outside a job."""
+        return getattr(self.local, 'job', None)
+
+    def is_cancelled(self, job=None):
+        job = job or self.current_job()
+        return job is not None and job.cancel_event.is_set()
+
+    def check_cancelled(self, job=None):
+        """Raises JobCancelled if stop was requested for the given (or the calling thread's) job."""
+        if self.is_cancelled(job):
+            raise JobCancelled()
+
+    def progress(self, done, total, what):
+        """Logs progress for the job running on the calling thread."""
+        job = self.current_job()
+        prefix = f"{job.name}: " if job else ""
+        self.log(f"{prefix}{done}/{total} {what}")
+
+    def run_parallel(self, functions):
+        """
+        Runs the functions concurrently on their own threads as part of the calling thread's job, so each of
+        them can check_cancelled(). Returns their results in order once all of them have finished.
+        """
+        job = self.current_job()
+
+        def run(function):
+            self.local.job = job
+            try:
+                return function()
+            finally:
+                self.local.job = None
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(functions), 1)) as pool:
+            futures = [pool.submit(run, function) for function in functions]
+            return [future.result() for future in futures]
+
+    def cancel_all(self):
+        """Requests cancellation of the running job and everything queued behind it."""
+        with self.jobs_lock:
+            jobs = list(self.jobs)
+        for job in jobs:
+            job.cancel_event.set()
+        return len(jobs)
+
+class AdbCaptureChannel:
+    """
+    Keeps one long-lived 'adb exec-out sh' process open and runs commands through it.
+    Raw screencap frames (no '-p') are read straight into a NumPy array, which avoids both
+    the per-frame adb process spawn and the on-device PNG compression.
+    """
+
+    # screencap pixel formats (android PixelFormat values) that are 4 bytes per pixel
+    RGBA_8888 = 1
+    RGBX_8888 = 2
+    BGRA_8888 = 5
+
+    def __init__(self, adb_path='adb', serial=None, timeout=ADB_CHANNEL_TIMEOUT):
+        self.adb_path = adb_path
+        self.serial = serial
+        self.timeout = timeout
+        self.process = None
+        self.header_size = None
+        self.layout = None  # (width, height, pixel format) of the last raw frame, for capturing a band of rows
+        self.band_failed = False  # Set once a band capture failed, settle polls then capture full frames
+        self.lock = threading.Lock()
+        self.chunks = None
+        self.buffer = b''
+        self.command_id = 0
+        self.connection_id = 0  # Bumped every time the shell is (re)started, i.e. on reconnect
+
+    def adb_command(self, *args):
+        """Builds an adb command line, targeting the channel's serial when one is set."""
+        command = [self.adb_path]
+        if self.serial:
+            command += ['-s', self.serial]
+        return command + list(args)
+
+    def is_open(self):
+        return self.process is not None and self.process.poll() is None
+
+    def open(self):
+        """Starts the shell process if it is not already running."""
+        if self.is_open():
+            return
+        self.process = subprocess.Popen(self.adb_command('exec-out', 'sh'), stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        self.connection_id += 1
+        self.chunks = queue.Queue()
+        self.buffer = b''
+        self.layout = None
+        # A reader thread lets every read honour a timeout on all platforms (pipes can't be select()ed on Windows)
+        reader = threading.Thread(target=self._read_stdout, args=(self.process, self.chunks))
+        reader.daemon = True
+        reader.start()
+        # Android 9 (API 28) added a 4 byte colour space field to the raw screencap header
+        sdk = self._run('getprop ro.build.version.sdk').decode('utf-8', 'ignore').strip()
+        self.header_size = 16 if sdk.isdigit() and int(sdk) >= 28 else 12
+
+    def close(self):
+        """Terminates the shell process."""
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.terminate()
+                self.process.wait(timeout=2)
+            except Exception:
+                self.process.kill()
+            self.process = None
+
+    @staticmethod
+    def _read_stdout(process, chunks):
+        while True:
+            chunk = process.stdout.read(1 << 16)
+            chunks.put(chunk)
+            if not chunk:
+                return
+
+    def _write(self, command):
+        try:
+            self.process.stdin.write(command.encode('utf-8') + b'\n')
+            self.process.stdin.flush()
+        except OSError as e:
+            self.close()
+            raise AdbChannelError(f"adb channel closed: {e}")
+
+    def _fill(self):
+        """Moves the next chunk from the reader thread into the buffer."""
+        try:
+            chunk = self.chunks.get(timeout=self.timeout)
+        except queue.Empty:
+            self.close()
+            raise AdbChannelError("Timed out waiting for the device.")
+        if not chunk:
+            self.close()
+            raise AdbChannelError("adb channel closed by the device.")
+        self.buffer += chunk
+
+    def _read_exact(self, size):
+        parts = []
+        remaining = size
+        while remaining:
+            if not self.buffer:
+                self._fill()
+            part = self.buffer[:remaining]
+            self.buffer = self.buffer[len(part):]
+            parts.append(part)
+            remaining -= len(part)
+        return b''.join(parts)
+
+    def _read_until(self, marker):
+        while marker not in self.buffer:
+            self._fill()
+        output, self.buffer = self.buffer.split(marker, 1)
+        return output
+
+    def _run(self, command):
+        self.command_id += 1
+        marker = f"__SCRCPYULTRA_{self.command_id}__"
+        self._write(f"{command}; echo {marker}")
+        return self._read_until(marker.encode('ascii') + b'\n')
+
+    def run(self, command):
+        """Runs a shell command on the device through the channel and returns its output as bytes."""
+        with self.lock:
+            self.open()
+            return self._run(command)
+
+    def stream(self, command, sink):
+        """Runs a shell command like run(), but hands its output to sink(bytes) piece by piece as it arrives."""
+        with self.lock:
+            self.open()
+            self.command_id += 1
+            marker = f"__SCRCPYULTRA_{self.command_id}__"
+            self._write(f"{command}; echo {marker}")
+            marker = marker.encode('ascii') + b'\n'
+            while marker not in self.buffer:
+                # Hold back what could be the start of the marker, split between two chunks
+                if len(self.buffer) >= len(marker):
+                    sink(self.buffer[:1 - len(marker)])
+                    self.buffer = self.buffer[1 - len(marker):]
+                self._fill()
+            output, self.buffer = self.buffer.split(marker, 1)
+            if output:
+                sink(output)
+
+    def capture_raw(self):
+        """Captures the raw framebuffer and returns it as an RGBA NumPy array (height, width, 4)."""
+        with self.lock:
+            self.open()
+            # exec-out has no separate stderr, so any warning screencap prints would land in the pixel data
+            self._write('screencap 2>/dev/null')
+            header = self._read_exact(self.header_size)
+            width, height, pixel_format = struct.unpack_from('<III', header)
+            if pixel_format not in (self.RGBA_8888, self.RGBX_8888, self.BGRA_8888) or not width or not height:
+                # Unknown layout, the rest of the stream can't be framed so start afresh next time
+                self.close()
+                raise AdbChannelError(f"Unsupported raw screencap format: {pixel_format} ({width}x{height})")
+            data = self._read_exact(width * height * 4)
+            self.layout = (width, height, pixel_format)
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 4)
+        if pixel_format == self.BGRA_8888:
+            frame = frame[:, :, [2, 1, 0, 3]]
+        return frame
+
+    def capture_raw_rows(self, top, rows):
+        """
+        Captures rows top to top + rows of the raw framebuffer as an RGBA NumPy array (rows, width, 4). The
+        band is cut out on the device, so only its bytes cross USB. The frame layout comes from the last
+        raw capture, or from a header-only capture if there wasn't one on this connection.
+        """
+        with self.lock:
+            self.open()
+            if self.layout is None:
+                header = self._run(f"screencap 2>/dev/null | head -c {self.header_size}")
+                if len(header) != self.header_size:
+                    raise AdbChannelError("Could not read the raw screencap header.")
+                self.layout = struct.unpack_from('<III', header)
+            width, height, pixel_format = self.layout
+            if pixel_format not in (self.RGBA_8888, self.RGBX_8888, self.BGRA_8888):
+                raise AdbChannelError(f"Unsupported raw screencap format: {pixel_format} ({width}x{height})")
+            top = min(max(top, 0), height - 1)
+            rows = min(rows, height - top)
+            offset = self.header_size + top * width * 4
+            self.command_id += 1
+            marker = f"__SCRCPYULTRA_{self.command_id}__"
+            self._write(f"screencap 2>/dev/null | tail -c +{offset + 1} | head -c {rows * width * 4}; echo {marker}")
+            data = self._read_exact(rows * width * 4)
+            if self._read_until(marker.encode('ascii') + b'\n'):
+                # More than the band came back, the rest of the stream can't be trusted
+                self.close()
+                raise AdbChannelError("Unexpected output from a band capture.")
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(rows, width, 4)
+        if pixel_format == self.BGRA_8888:
+            frame = frame[:, :, [2, 1, 0, 3]]
+        return frame
+
+    def capture_png(self):
+        """Captures a PNG encoded screenshot with a one-off adb process and returns the PNG bytes."""
+        return subprocess.check_output(self.adb_command('exec-out', 'screencap', '-p'))
+
+class StreamFrameGrabber:
+    """
+    Decodes a video source (scrcpy's v4l2 sink, or its recording while it is being written) on a background
+    thread and keeps only the newest frame, so taking a screenshot is a memory copy rather than a device
+    round trip. realtime paces file sources at their frame rate, so a video file can stand in for a device.
+    """
+    def __init__(self, source, realtime=False, log=None):
+        self.source = source
+        self.realtime = realtime
+        self.log = log or (lambda message: None)
+        self.condition = threading.Condition()
+        self.frame = None
+        self.sequence = 0  # Number of frames decoded so far
+        self.ended = False
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Opens the source and starts decoding. Raises OSError if it can't be opened."""
+        if self.is_running():
+            return
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            raise OSError(f"Can't open video stream {self.source}")
+        self.stop_event.clear()
+        self.ended = False
+        self.thread = threading.Thread(target=self._read, args=(capture,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _read(self, capture):
+        is_file = os.path.isfile(self.source)
+        interval = 1.0 / (capture.get(cv2.CAP_PROP_FPS) or 30)
+        next_frame_time = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    if not is_file:
+                        break  # The device or pipe went away
+                    # A recording that is still being written may have grown, carry on from where we were
+                    self.stop_event.wait(STREAM_REOPEN_INTERVAL)
+                    capture.release()
+                    capture = cv2.VideoCapture(self.source)
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, self.sequence)
+                    continue
+                with self.condition:
+                    self.frame = frame
+                    self.sequence += 1
+                    self.condition.notify_all()
+                if self.realtime:
+                    next_frame_time += interval
+                    self.stop_event.wait(max(0.0, next_frame_time - time.monotonic()))
+        finally:
+            capture.release()
+            with self.condition:
+                self.ended = True
+                self.condition.notify_all()
+
+    def latest(self, after=0, timeout=STREAM_FRAME_TIMEOUT):
+        """
+        Returns (sequence, RGB array) of the newest decoded frame, waiting up to timeout for one with a sequence
+        above after (e.g. the sequence when a swipe started, as a recording being written lags behind the screen).
+        scrcpy only sends frames when the screen changes, so if none comes the newest frame is still the screen.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > after or self.ended, timeout)
+            if self.frame is None:
+                raise OSError(f"No frames from video stream {self.source}")
+            return self.sequence, cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+class DeviceSession:
+    """
+    One connected device: owns the AdbCaptureChannel that capture, swipe and UI dump commands share, and
+    caches the device properties (resolution, density, orientation, Android version, serial, model) so
+    they are queried once. The cache is dropped when the channel reconnects or a frame shows the screen
+    has rotated.
+    """
+    def __init__(self, adb_path='adb', serial=None, log=None):
+        self.channel = AdbCaptureChannel(adb_path, serial)
+        self.log = log or (lambda message: None)
+        self.lock = threading.Lock()
+        self.properties = None
+        self.connection_id = None
+
+    @property
+    def serial(self):
+        return self.channel.serial
+
+    def invalidate(self):
+        with self.lock:
+            self.properties = None
+
+    def _shell(self, command):
+        return self.channel.run(command).decode('utf-8', 'ignore').strip()
+
+    @staticmethod
+    def _last_value(output, default=''):
+        """'wm size' and 'wm density' print a Physical line and, when set, an Override line which wins."""
+        lines = [line.split(':', 1)[1].strip() for line in output.splitlines() if ':' in line]
+        return lines[-1] if lines else default
+
+    def _query(self):
+        width, height = map(int, self._last_value(self._shell('wm size')).split('x'))
+        density = self._last_value(self._shell('wm density'))
+        orientation = re.search(r'SurfaceOrientation:\s*(\d)', self._shell('dumpsys input | grep -m 1 SurfaceOrientation'))
+        orientation = int(orientation.group(1)) if orientation else 0
+        if orientation in (1, 3):
+            width, height = height, width  # wm size is always the portrait size
+        return {
+            'width': width,
+            'height': height,
+            'density': int(density) if density.isdigit() else None,
+            'orientation': orientation,
+            'android_version': self._shell('getprop ro.build.version.release'),
+            'sdk': self._shell('getprop ro.build.version.sdk'),
+            'serial': self.channel.serial or self._shell('getprop ro.serialno'),
+            'model': self._shell('getprop ro.product.model'),
+        }
+
+    def info(self):
+        """Returns the cached device properties, querying the device only when the cache is stale."""
+        with self.lock:
+            if self.properties is None or self.connection_id != self.channel.connection_id or not self.channel.is_open():
+                self.properties = self._query()
+                self.connection_id = self.channel.connection_id
+                self.log(f"Device {self.properties['model'] or self.properties['serial']}: {self.properties['width']}x{self.properties['height']}, "
+                         f"Android {self.properties['android_version']}")
+            return self.properties
+
+    def check_frame_size(self, width, height):
+        """Drops the cached properties if a captured frame doesn't match them, e.g. after the device was rotated."""
+        properties = self.properties
+        if properties is not None and (properties['width'], properties['height']) != (width, height):
+            self.log("Screen size changed (rotated?), refreshing device info.")
+            self.invalidate()
+
+    def run(self, command):
+        """Runs a shell command over the shared channel and returns its output as bytes."""
+        return self.channel.run(command)
+
+    def swipe(self, start_x, start_y, end_x, end_y, duration):
+        """Swipes over the shared channel, returns once the gesture has been injected."""
+        self.channel.run(f"input touchscreen swipe {start_x} {start_y} {end_x} {end_y} {duration}")
+
+    def foreground_package(self):
+        """Returns the package of the app in the foreground, or None. Not cached, it changes all the time."""
+        # e.g. mCurrentFocus=Window{1a2b3c u0 com.whatsapp/com.whatsapp.Conversation}
+        match = re.search(r'mCurrentFocus=Window\{\S+ \S+ ([^/\s}]+)', self._shell('dumpsys window | grep mCurrentFocus'))
+        return match.group(1) if match else None
+
+    def dump_ui(self, sink=None):
+        """
+        Returns the uiautomator dump of the current screen (XML followed by uiautomator's status line),
+        or with sink, hands it to sink(bytes) as it streams in instead.
+        """
+        if sink is not None:
+            return self.channel.stream('uiautomator dump --compressed /dev/tty', sink)
+        return self.channel.run('uiautomator dump --compressed /dev/tty')
+
+    def close(self):
+        self.channel.close()
+
+def list_adb_devices(adb=None):
+    """Returns the serials of the attached devices that are ready to use."""
+    output = subprocess.check_output([adb or adb_path, 'devices']).decode('utf-8', 'ignore')
+    serials = []
+    for line in output.splitlines()[1:]:  # Skip the 'List of devices attached' header
+        parts = line.split()
+        if len(parts) >= 2 and parts[1] == 'device':  # Not 'unauthorized' or 'offline'
+            serials.append(parts[0])
+    return serials
+
+def default_adb_serial(adb=None):
+    """
+    Returns the serial of the device adb would use without -s: ANDROID_SERIAL if it is set, otherwise the
+    first attached device, or None if there is none. adb refuses to guess once several devices are attached.
+    """
+    return os.environ.get('ANDROID_SERIAL') or next(iter(list_adb_devices(adb)), None)
+
+class DeviceLog:
+    """
+    Log stream of one device: messages are prefixed with the serial, appended to the device's log file
+    and forwarded to the main log. Has emit() so it can stand in for logMessageSignal.
+    """
+    def __init__(self, serial, path, forward):
+        self.serial = serial
+        self.path = path
+        self.forward = forward
+        self.lock = threading.Lock()
+
+    def emit(self, message):
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as log_file:
+                log_file.write(f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {message}\n")
+        self.forward(f"[{self.serial}] {message}")
+
+class OCRResult:
+    """Output of one OCR pass: the searchable PDF page (bytes), the plain text and the hOCR markup."""
+    def __init__(self, pdf, text='', hocr=''):
+        self.pdf = pdf
+        self.text = text
+        self.hocr = hocr
+
+def ocr_process_env(single_thread):
+    """Environment for OCR processes; single_thread stops tesseract's OpenMP threads when jobs run in parallel."""
+    return dict(os.environ, OMP_THREAD_LIMIT='1') if single_thread else None
+
+def run_tesseract(image, languages=OCR_LANGUAGES, single_thread=False):
+    """
+    Feeds a PIL image to tesseract on stdin and returns an OCRResult with the searchable PDF, text and
+    hOCR produced by one recognition pass. Tesseract's renderers can only write to an output base name,
+    so they write into a scratch directory that is read back and removed.
+    """
+    image_bytes = io.BytesIO()
+    image.save(image_bytes, format='PNG', compress_level=1)  # Fast encode, tesseract decodes it in memory
+    with tempfile.TemporaryDirectory() as scratch:
+        output_base = os.path.join(scratch, 'ocr')
+        subprocess.run(['tesseract', 'stdin', output_base, '-l', languages, 'pdf', 'txt', 'hocr'],
+                       input=image_bytes.getvalue(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                       check=True, env=ocr_process_env(single_thread))
+        with open(output_base + '.pdf', 'rb') as f:
+            pdf = f.read()
+        with open(output_base + '.txt', 'r', encoding='utf-8') as f:
+            text = f.read()
+        with open(output_base + '.hocr', 'r', encoding='utf-8') as f:
+            hocr = f.read()
+    return OCRResult(pdf, text, hocr)
+
+def list_tesseract_languages():
+    """Returns the installed tesseract languages, or just the default if tesseract can't be asked."""
+    try:
+        output = subprocess.check_output(['tesseract', '--list-langs'], stderr=subprocess.STDOUT, timeout=10)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+        return [OCR_LANGUAGES]
+    languages = [line.strip() for line in output.decode('utf-8', 'ignore').splitlines()[1:] if line.strip()]
+    return languages or [OCR_LANGUAGES]
+
+def ocr_service_main(connection, languages, single_thread):
+    """
+    Entry point of a warm OCR worker process. Tesseract and its language data are loaded once, then
+    jobs (PNG bytes) are served over the pipe until the pipe closes or 'stop' is received.
+    """
+    if single_thread:
+        os.environ['OMP_THREAD_LIMIT'] = '1'
+    try:
+        api = tesserocr.PyTessBaseAPI(lang=languages)
+        for renderer in ('tessedit_create_pdf', 'tessedit_create_txt', 'tessedit_create_hocr'):
+            api.SetVariable(renderer, '1')
+    except Exception as e:
+        connection.send(('error', f"Failed to load tesseract ({languages}): {e}"))
+        return
+    connection.send(('ready',))
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message[0] == 'stop':
+            break
+        if message[0] == 'ping':
+            connection.send(('pong',))
+            continue
+        try:
+            image = Image.open(BytesIO(message[1]))
+            with tempfile.TemporaryDirectory() as scratch:
+                output_base = os.path.join(scratch, 'ocr')
+                if not api.ProcessPage(output_base, image, 0, 'page'):
+                    raise RuntimeError("tesseract could not process the image")
+                with open(output_base + '.pdf', 'rb') as f:
+                    pdf = f.read()
+                with open(output_base + '.txt', 'r', encoding='utf-8') as f:
+                    text = f.read()
+                with open(output_base + '.hocr', 'r', encoding='utf-8') as f:
+                    hocr = f.read()
+            connection.send(('ok', pdf, text, hocr))
+        except Exception as e:
+            connection.send(('error', str(e)))
+    api.End()
+
+class OCRServiceWorker:
+    """One warm OCR worker process and the pipe used to talk to it."""
+    def __init__(self, languages, single_thread):
+        context = multiprocessing.get_context('spawn')  # Forking a process that runs Qt threads isn't safe
+        self.languages = languages
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=ocr_service_main, args=(child_connection, languages, single_thread))
+        self.process.daemon = True
+        self.process.start()
+        child_connection.close()
+        try:
+            self.call(None, OCR_SERVICE_START_TIMEOUT)  # Wait until the language data is loaded
+        except BaseException:
+            # Don't leave a worker that never became ready running in the background
+            self.process.terminate()
+            self.process.join(timeout=2)
+            self.connection.close()
+            raise
+
+    def call(self, message, timeout):
+        """Sends a message (None just waits for a reply) and returns the reply, raising if the worker fails."""
+        if message is not None:
+            self.connection.send(message)
+        if not self.connection.poll(timeout):
+            raise TimeoutError("OCR worker did not answer in time")
+        reply = self.connection.recv()  # EOFError if the worker died
+        if reply[0] == 'error':
+            raise RuntimeError(reply[1])
+        return reply
+
+    def is_healthy(self):
+        if not self.process.is_alive():
+            return False
+        try:
+            return self.call(('ping',), OCR_SERVICE_PING_TIMEOUT)[0] == 'pong'
+        except (EOFError, OSError, TimeoutError, RuntimeError):
+            return False
+
+    def stop(self):
+        try:
+            self.connection.send(('stop',))
+        except OSError:
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+class OCRService:
+    """
+    A small pool of long-lived OCR worker processes (tesserocr) so tesseract and its language models are
+    loaded once instead of on every call. Workers are checked out one job at a time, waiting at most
+    OCR_SERVICE_CHECKOUT_TIMEOUT for one to become free; a worker that crashes or hangs is replaced and
+    the job retried once. Each job names its language set, a worker loaded with another one is restarted
+    for it, so changing the languages in the GUI doesn't affect jobs that were already submitted.
+    """
+    def __init__(self, size, log=None):
+        self.size = size
+        self.log = log or (lambda message: None)
+        self.idle = queue.Queue()
+        self.started = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        return tesserocr is not None
+
+    def _start_worker(self, languages):
+        return OCRServiceWorker(languages, single_thread=self.size > 1)
+
+    def _checkout(self, languages):
+        deadline = time.monotonic() + OCR_SERVICE_CHECKOUT_TIMEOUT
+        while True:
+            with self.lock:
+                # Start workers lazily, up to the pool size, and in place of workers that died. Only the slot
+                # is taken under the lock, starting a worker takes a while and mustn't hold up other jobs
+                reserved = self.idle.empty() and self.started < self.size
+                if reserved:
+                    self.started += 1
+            if reserved:
+                try:
+                    return self._start_worker(languages)
+                except Exception:
+                    self._retire()
+                    raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("No OCR worker became free in time")
+            try:
+                # Wake up now and then, a busy worker may have died and been retired in the meantime
+                worker = self.idle.get(timeout=min(remaining, OCR_SERVICE_PING_TIMEOUT))
+                break
+            except queue.Empty:
+                continue
+        if worker.languages != languages or not worker.process.is_alive():
+            try:
+                worker = self._replace(worker, languages)
+            except Exception:
+                self._retire()
+                raise
+        return worker
+
+    def _replace(self, worker, languages):
+        """Stops a worker and starts a fresh one with languages in its place."""
+        worker.stop()
+        return self._start_worker(languages)
+
+    def _retire(self):
+        """Forgets a worker that is gone and couldn't be replaced."""
+        with self.lock:
+            self.started -= 1
+
+    def _checkin(self, worker):
+        with self.lock:
+            # Workers that were busy when the pool shrank are stopped as they come back
+            shrink = self.started > self.size
+        if worker.process.is_alive() and not shrink:
+            self.idle.put(worker)
+            return
+        if shrink:
+            worker.stop()
+        self._retire()
+
+    def configure(self, size):
+        """Sets the pool size, workers beyond it are stopped now if idle, otherwise when their job is done."""
+        with self.lock:
+            self.size = size
+            # Drop idle workers beyond the new size
+            while self.started > size and not self.idle.empty():
+                self.idle.get().stop()
+                self.started -= 1
+
+    def recognize(self, image, languages):
+        """OCRs a PIL image with tesseract's languages (e.g. 'eng+ita') on a warm worker and returns an OCRResult."""
+        image_bytes = io.BytesIO()
+        image.save(image_bytes, format='PNG', compress_level=1)
+        worker = self._checkout(languages)
+        try:
+            for attempt in range(2):
+                try:
+                    reply = worker.call(('ocr', image_bytes.getvalue()), OCR_SERVICE_JOB_TIMEOUT)
+                    return OCRResult(reply[1], reply[2], reply[3])
+                except (EOFError, OSError, TimeoutError) as e:
+                    self.log(f"OCR worker crashed ({str(e) or type(e).__name__}), restarting it...")
+                    worker = self._replace(worker, languages)
+                    if attempt:
+                        raise
+        finally:
+            self._checkin(worker)
+
+    def check_health(self):
+        """Pings every idle worker and restarts any that don't answer. Returns the number restarted."""
+        restarted = 0
+        workers = []
+        while not self.idle.empty():
+            workers.append(self.idle.get())
+        for worker in workers:
+            if not worker.is_healthy():
+                self.log("OCR worker failed its health check, restarting it...")
+                try:
+                    worker = self._replace(worker, worker.languages)
+                except Exception as e:
+                    self.log(f"Could not restart OCR worker: {str(e)}")
+                    self._retire()
+                    continue
+                restarted += 1
+            self.idle.put(worker)
+        return restarted
+
+    def shutdown(self):
+        with self.lock:
+            while not self.idle.empty():
+                self.idle.get().stop()
+            self.started = 0
+
+def find_segment_cut(image, start, limit, search_rows=SEGMENT_CUT_SEARCH_ROWS):
+    """
+    Returns the row to end a segment at, at most limit. Looks for the blank gap (rows with no ink)
+    nearest to limit so no text line is split across pages, or the least inked row if there is none.
+    """
+    top = max(start + 1, limit - search_rows)
+    if limit >= image.height or top >= limit:
+        return min(limit, image.height)
+    band = np.asarray(image.crop((0, top, image.width, limit)).convert('L'))
+    ink = band.max(axis=1).astype(np.int16) - band.min(axis=1)
+    blank = np.flatnonzero(ink <= SEGMENT_BLANK_ROW_RANGE)
+    if not len(blank):
+        # Busy background, settle for the calmest row closest to the limit
+        return top + int(len(ink) - 1 - np.argmin(ink[::-1]))
+    # Cut in the middle of the blank run closest to the limit
+    run_end = blank[-1]
+    run_start = run_end
+    while run_start > 0 and ink[run_start - 1] <= SEGMENT_BLANK_ROW_RANGE:
+        run_start -= 1
+    return top + int(run_start + run_end + 1) // 2
+
+def iter_image_segments(image, max_height=MAX_PDF_PAGE_HEIGHT):
+    """Yields (segment, is_last) crops of a PIL image no taller than max_height, cut in blank gaps."""
+    start = 0
+    while start < image.height:
+        end = find_segment_cut(image, start, start + max_height)
+        yield image.crop((0, start, image.width, end)), end >= image.height
+        start = end
+
+def ocr_result_text(result):
+    """Returns the recognised text of an OCRResult, reading it from the PDF text layer if needed."""
+    if result.text:
+        return result.text
+    try:
+        return '\n'.join(page.extract_text() or '' for page in PyPDF2.PdfReader(io.BytesIO(result.pdf)).pages)
+    except Exception:
+        return ''
+
+def merge_transcript_lines(transcript, lines, max_overlap=TRANSCRIPT_MAX_OVERLAP_LINES):
+    """
+    Appends lines to transcript, skipping the leading lines that repeat the end of the transcript
+    (content that was visible in both consecutive frames). Returns the number of lines added.
+    """
+    normalise = lambda line: ' '.join(line.split()).lower()
+    tail = [normalise(line) for line in transcript[-max_overlap:]]
+    head = [normalise(line) for line in lines[:max_overlap]]
+    overlap = 0
+    for size in range(min(len(tail), len(head)), 0, -1):
+        if tail[-size:] == head[:size]:
+            overlap = size
+            break
+    transcript.extend(lines[overlap:])
+    return len(lines) - overlap
+
+def hocr_lines(hocr, offset=(0, 0)):
+    """
+    Returns [(text, (left, top, right, bottom))] for every text line of tesseract hOCR output,
+    with the boxes moved by offset (x, y), e.g. where the OCR'd segment sits in the whole image.
+    """
+    try:
+        root = ET.fromstring(hocr)
+    except ET.ParseError:
+        return []
+    lines = []
+    for element in root.iter():
+        if element.get('class') not in HOCR_LINE_CLASSES:
+            continue
+        text = ' '.join(''.join(element.itertext()).split())
+        match = re.search(r'bbox (\d+) (\d+) (\d+) (\d+)', element.get('title', ''))
+        if text and match:
+            left, top, right, bottom = map(int, match.groups())
+            lines.append((text, (left + offset[0], top + offset[1], right + offset[0], bottom + offset[1])))
+    return lines
+
+def ocr_result_lines(result, offset=(0, 0)):
+    """Returns the [(text, box)] lines of an OCRResult, without boxes if the engine gave no hOCR."""
+    if result.hocr:
+        return hocr_lines(result.hocr, offset)
+    return [(line.strip(), None) for line in ocr_result_text(result).splitlines() if line.strip()]
+
+class UIDumpParser:
+    """
+    Parses uiautomator dump output incrementally: feed() it the bytes as they arrive from adb and the nodes
+    are picked out while the rest of the dump is still on its way, so the XML never has to be held or saved
+    whole. Anything adb prints before the XML and uiautomator's status line after </hierarchy> are skipped.
+    nodes holds (text, (left, top, right, bottom) or None, resource_id) for every node with a text or
+    resource-id, in document order (top to bottom of the screen for lists).
+    """
+    def __init__(self):
+        self.parser = None
+        self.pending = b''
+        self.depth = 0
+        self.finished = False  # </hierarchy> seen
+        self.error = None
+        self.nodes = []
+
+    def feed(self, data):
+        if self.finished or self.error is not None:
+            return
+        if self.parser is None:
+            self.pending += data
+            starts = [position for position in (self.pending.find(b'<?xml'), self.pending.find(b'<hierarchy')) if position != -1]
+            if not starts:
+                self.pending = self.pending[-16:]  # Enough to catch a start tag split between two chunks
+                return
+            data, self.pending = self.pending[min(starts):], b''
+            self.parser = ET.XMLPullParser(events=('start', 'end'))
+        self.parser.feed(data)
+        try:
+            for event, element in self.parser.read_events():
+                if event == 'start':
+                    self.depth += 1
+                    self._add(element)
+                    continue
+                self.depth -= 1
+                element.clear()  # Already recorded, don't let the tree grow
+                if self.depth == 0:
+                    self.finished = True
+                    return  # The parse error for the status line that follows is expected
+        except ET.ParseError as e:
+            self.error = e
+
+    def _add(self, element):
+        text = element.get('text', '').strip()
+        resource_id = element.get('resource-id', '')
+        if text or resource_id:
+            match = re.match(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]', element.get('bounds', ''))
+            self.nodes.append((text, tuple(map(int, match.groups())) if match else None, resource_id))
+
+def ui_dump_lines(nodes):
+    """Returns [(text, (left, top, right, bottom))] for the UIDumpParser nodes that have text."""
+    return [(text, box) for text, box, _ in nodes if text]
+
+def ui_scroll_shift(previous_nodes, nodes):
+    """
+    Returns (shift, anchors): how many pixels the content moved up between two UI dumps (UIDumpParser nodes),
+    measured on the nodes both share, and how many of them agree on it; (None, 0) if they share no anchors.
+    Nodes are matched by text and resource-id. One whose key isn't unique in both dumps, or whose box changed
+    size or moved sideways (cut off at the edge of the screen), can't anchor. Nodes that didn't move at all
+    (toolbars, input boxes) only decide the offset if nothing moved.
+    """
+    def anchors(node_list):
+        counts = collections.Counter((text, resource_id) for text, _, resource_id in node_list)
+        return {(text, resource_id): box for text, box, resource_id in node_list if box is not None and counts[(text, resource_id)] == 1}
+
+    previous = anchors(previous_nodes)
+    moves = collections.Counter()
+    for key, box in anchors(nodes).items():
+        old = previous.get(key)
+        if old is not None and (old[0], old[2], old[3] - old[1]) == (box[0], box[2], box[3] - box[1]):
+            moves[old[1] - box[1]] += 1
+    if not moves:
+        return None, 0
+    moved = {shift: count for shift, count in moves.items() if shift}
+    if not moved:
+        return 0, moves[0]
+    shift, count = max(moved.items(), key=lambda item: item[1])
+    if count < UI_ANCHOR_MIN_AGREEMENT * sum(moved.values()):
+        return None, 0  # The nodes disagree, e.g. an animation moved some of them
+    return shift, count
+
+class OCRCache:
+    """
+    On-disk cache of OCR results, keyed by a hash of the preprocessed pixels plus the OCR settings, so
+    pixel-identical frames and re-runs over the same files skip tesseract entirely. Each entry is a
+    folder holding the PDF page, text and hOCR. Entries are touched when read and the least recently
+    used are evicted once the cache grows past max_bytes.
+    """
+    FILES = (('pdf', 'result.pdf'), ('text', 'result.txt'), ('hocr', 'result.hocr'))
+
+    def __init__(self, folder, max_bytes=OCR_CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = None  # Measured on first write
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(image, settings):
+        """Returns the cache key for a preprocessed PIL image and a tuple of OCR settings."""
+        digest = hashlib.sha256()
+        digest.update(repr((image.mode, image.size, settings)).encode('utf-8'))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.folder, key[:2], key)
+
+    def get(self, key):
+        """Returns the cached OCRResult for key, or None."""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, 'result.pdf'), 'rb') as f:
+                pdf = f.read()
+            with open(os.path.join(entry, 'result.txt'), 'r', encoding='utf-8') as f:
+                text = f.read()
+            with open(os.path.join(entry, 'result.hocr'), 'r', encoding='utf-8') as f:
+                hocr = f.read()
+            os.utime(entry)  # Mark as recently used
+        except (OSError, UnicodeDecodeError):
+            # Missing or corrupt, drop a damaged entry so the next put can store the result again
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return OCRResult(pdf, text, hocr)
+
+    def put(self, key, result):
+        """Stores an OCRResult and evicts old entries if the cache is over its size limit."""
+        entry = self._entry(key)
+        # Write into a private folder first, then move it into place so readers never see half an entry
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(entry))
+        size = 0
+        for attribute, filename in self.FILES:
+            value = getattr(result, attribute) or (b'' if attribute == 'pdf' else '')
+            data = value if isinstance(value, bytes) else value.encode('utf-8')
+            with open(os.path.join(staging, filename), 'wb') as f:
+                f.write(data)
+            size += len(data)
+        try:
+            os.replace(staging, entry)
+        except OSError:
+            # Another job stored the same result first
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self._measure()
+            else:
+                self.total_bytes += size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """Returns (last_used, size, path) for every entry."""
+        entries = []
+        for prefix in os.listdir(self.folder) if os.path.isdir(self.folder) else []:
+            prefix_path = os.path.join(self.folder, prefix)
+            for name in os.listdir(prefix_path) if os.path.isdir(prefix_path) else []:
+                path = os.path.join(prefix_path, name)
+                try:
+                    size = sum(os.path.getsize(os.path.join(path, filename)) for _, filename in self.FILES)
+                    entries.append((os.path.getmtime(path), size, path))
+                except OSError:
+                    continue
+        return entries
+
+    def _measure(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Drop least recently used entries until the cache is back under 90% of its limit
+        for _, size, path in sorted(self._entries()):
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            self.total_bytes -= size
+
+    def stats(self):
+        return f"OCR cache: {self.hits} hit(s), {self.misses} miss(es)."
+
+class OCRExecutor:
+    """
+    Runs OCR jobs concurrently on a pool of worker threads. Each job spends its time waiting on an
+    external ocrmypdf/tesseract process, so threads drive all cores without having to pickle the GUI
+    object into worker processes. map() keeps results in submission order; a job that fails is
+    logged and yields None. Calls made from inside a pool thread run inline, so nested use can't
+    deadlock the pool.
+    """
+    def __init__(self, workers=OCR_DEFAULT_WORKERS, log=None):
+        self.log = log or (lambda message: None)
+        self.workers = workers
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr')
+        self.local = threading.local()
+
+    def set_workers(self, workers):
+        """Resizes the pool; jobs already submitted finish on the old pool."""
+        if workers != self.workers:
+            old_pool = self.pool
+            self.workers = workers
+            self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr')
+            old_pool.shutdown(wait=False)
+
+    def _call(self, function, args):
+        self.local.in_pool = True
+        try:
+            return function(*args)
+        finally:
+            self.local.in_pool = False
+
+    def submit(self, function, *args):
+        """Queues function(*args) and returns a Future."""
+        if getattr(self.local, 'in_pool', False):
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self.pool.submit(self._call, function, args)
+
+    def result(self, future, description):
+        """Waits for a job, logging and returning None if it failed."""
+        try:
+            return future.result()
+        except Exception as e:
+            self.log(f"OCR job failed ({description}): {str(e)}")
+            return None
+
+    def map(self, function, items, description='OCR jobs'):
+        """Runs function(item) for every item concurrently and returns the results in order."""
+        futures = [self.submit(function, item) for item in items]
+        results = []
+        for idx, future in enumerate(futures):
+            results.append(self.result(future, items[idx]))
+            if len(futures) > 1:
+                self.log(f"{description}: {idx + 1}/{len(futures)} done")
+        return results
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+class SettleDetector:
+    """
+    Waits for the screen to stop moving after a swipe by polling frames and comparing downscaled copies.
+    grab returns a full PIL frame. With poll, a cheap capture of only the rows (top, bottom) of the screen,
+    the polls use that and grab is called once when the wait is over. Without it every poll is a grab.
+    The frame returned at the end can be used as the next capture.
+    """
+    def __init__(self, grab, timeout=SETTLE_DEFAULT_TIMEOUT, min_wait=0.0, poll_interval=SETTLE_POLL_INTERVAL,
+                 stable_polls=SETTLE_STABLE_POLLS, threshold=SETTLE_DIFF_THRESHOLD, poll=None, rows=None):
+        self.grab = grab
+        self.poll = poll
+        self.rows = rows
+        self.timeout = timeout
+        self.min_wait = min_wait
+        self.poll_interval = poll_interval
+        self.stable_polls = stable_polls
+        self.threshold = threshold
+
+    @staticmethod
+    def thumbnail(image):
+        """Cheap greyscale thumbnail by sampling every SETTLE_DOWNSCALE'th pixel."""
+        pixels = np.asarray(image)[::SETTLE_DOWNSCALE, ::SETTLE_DOWNSCALE]
+        if pixels.ndim == 3:
+            pixels = pixels[:, :, :3].mean(axis=2)
+        return pixels.astype(np.float32)
+
+    def difference(self, a, b):
+        if a.shape != b.shape:
+            return float('inf')  # Rotated or resized, definitely not settled
+        return float(np.abs(a - b).mean())
+
+    def wait(self, reference=None):
+        """
+        Polls until consecutive frames match, or until the timeout. reference is the frame captured before
+        the swipe; until the screen differs from it, settling is only accepted after SETTLE_NO_MOTION_TIMEOUT
+        so a scroll that hasn't started yet isn't mistaken for a settled one.
+        Returns (image, elapsed seconds, settled).
+        """
+        start = time.monotonic()
+        if self.min_wait > 0:
+            time.sleep(self.min_wait)
+        if reference is not None and self.poll is not None:
+            reference = np.asarray(reference)[self.rows[0]:self.rows[1]]  # Compared with the polled band only
+        reference = self.thumbnail(reference) if reference is not None else None
+        moved = reference is None
+        previous = None
+        stable = 0
+        while True:
+            image = self.poll() if self.poll is not None else self.grab()
+            current = self.thumbnail(image)
+            elapsed = time.monotonic() - start
+            if not moved and self.difference(current, reference) > self.threshold:
+                moved = True
+            if previous is not None and self.difference(current, previous) <= self.threshold:
+                stable += 1
+            else:
+                stable = 0
+            previous = current
+            if stable >= self.stable_polls and (moved or elapsed >= SETTLE_NO_MOTION_TIMEOUT):
+                return (self.grab() if self.poll is not None else image), elapsed, True
+            if elapsed >= self.timeout:
+                return (self.grab() if self.poll is not None else image), elapsed, False
+            time.sleep(self.poll_interval)
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes for fast Hamming radius queries."""
+    def __init__(self):
+        self.root = None  # [hash, value, {distance: child}]
+
+    def add(self, key, value):
+        if self.root is None:
+            self.root = [key, value, {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(key, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, value, {}]
+                return
+            node = child
+
+    def query(self, key, radius):
+        """Returns [(distance, value)] of every entry within radius, closest first."""
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(key, node[0])
+            if distance <= radius:
+                matches.append((distance, node[1]))
+            # Triangle inequality: only subtrees at distance-radius..distance+radius can hold matches
+            stack.extend(child for edge, child in node[2].items() if distance - radius <= edge <= distance + radius)
+        return sorted(matches, key=lambda match: match[0])
+
+def frame_signature(image):
+    """
+    Returns (hash, thumbnail) for a PIL image or array. The hash packs aHash, dHash and pHash into one
+    192-bit int, all computed with array operations on a downsampled greyscale copy.
+    """
+    # Cheap pre-shrink to about 256 rows, the hashes only need a rough picture
+    if isinstance(image, Image.Image):
+        step = max(1, image.height // 256)
+        pixels = np.asarray(image.resize((image.width // step, image.height // step), Image.NEAREST).convert('L'))
+    else:
+        step = max(1, image.shape[0] // 256)
+        pixels = np.ascontiguousarray(image[::step, ::step])
+    if pixels.ndim == 3:
+        pixels = cv2.cvtColor(pixels[:, :, :3], cv2.COLOR_RGB2GRAY)
+    size = FRAME_HASH_SIZE
+    average = cv2.resize(pixels, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    gradient = cv2.resize(pixels, (size + 1, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    cosine = cv2.dct(cv2.resize(pixels, (size * 4, size * 4), interpolation=cv2.INTER_AREA).astype(np.float32))[:size, :size]
+    bits = np.concatenate([
+        (average > average.mean()).ravel(),
+        (gradient[:, 1:] > gradient[:, :-1]).ravel(),
+        (cosine > np.median(cosine.ravel()[1:])).ravel(),  # The DC term would dominate the median
+    ])
+    thumbnail = cv2.resize(pixels, FRAME_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big'), thumbnail
+
+class FrameIndex:
+    """
+    Similarity index over every frame of a session. Hashes go into a BK-tree so a new frame can be checked
+    against all earlier ones; candidates are confirmed on thumbnails. observe() also tells a stall (the
+    screen didn't move once) from the end of the scroll, and spots A-B-A bounces back to earlier frames.
+    """
+    def __init__(self, radius=FRAME_MATCH_RADIUS, end_repeats=FRAME_END_OF_SCROLL_REPEATS, loop_limit=FRAME_LOOP_LIMIT):
+        self.radius = radius
+        self.end_repeats = end_repeats
+        self.loop_limit = loop_limit
+        self.tree = BKTree()
+        self.thumbnails = []
+        self.current = None  # Index of the frame the screen showed last
+        self.repeats = 0
+        self.loops = 0
+
+    def __len__(self):
+        return len(self.thumbnails)
+
+    def match(self, signature):
+        """Returns the index of an earlier frame showing the same screen, or None."""
+        key, thumbnail = signature
+        for distance, index in self.tree.query(key, self.radius):
+            earlier = self.thumbnails[index]
+            if earlier.shape == thumbnail.shape and np.abs(earlier - thumbnail).mean() <= FRAME_THUMBNAIL_TOLERANCE:
+                return index
+        return None
+
+    def add(self, signature):
+        index = len(self.thumbnails)
+        self.tree.add(signature[0], index)
+        self.thumbnails.append(signature[1])
+        return index
+
+    def observe(self, signature):
+        """Classifies the next frame of a scroll and indexes it if it is new. Returns (verdict, matched index)."""
+        match = self.match(signature)
+        if match is None:
+            self.current = self.add(signature)
+            self.repeats = self.loops = 0
+            return FRAME_NEW, None
+        if match == self.current:
+            self.repeats += 1
+            return (FRAME_END if self.repeats >= self.end_repeats else FRAME_STALLED), match
+        self.current = match
+        self.loops += 1
+        self.repeats = 0
+        return (FRAME_LOOPING if self.loops >= self.loop_limit else FRAME_LOOP), match
+
+class DeviceWorkspace:
+    """
+    State of one device for SCRCPYULTRA's capture and autoscroll methods, which take the workspace as an argument
+    so several devices can be worked on at the same time: the DeviceSession, output folder, log stream, screen info,
+    swipe profile and the screenshots of the last session. Everything else (job scheduler, OCR executor and cache,
+    manifest) belongs to the window and is shared. Settings are passed in. Only a workspace with video_stream
+    reads scrcpy's video in stream capture mode, scrcpy is started for the default device alone.
+    """
+    def __init__(self, serial, output_folder, log, video_stream=False):
+        self.output_folder = output_folder
+        self.log = log
+        self.video_stream = video_stream
+        self.device = DeviceSession(adb_path, serial, log=log)  # Cached device info + the shared adb channel
+        self.capture_channel = self.device.channel  # Persistent adb channel for raw framebuffer captures
+        self.autoscroll_screenshot_paths = []  # Screenshots of the last session, for post processing
+        self.autoscroll_roi = None  # Scrolling area the last autoscroll was cropped to while capturing
+        self.lastAction = None  # To track the last action (autoscroll or manual stitch)
+        self.swipe_profile = None  # Calibrated swipe settings in use, None for the default swipe
+        self.swipe_profile_key = None
+        self.swipe_distance = None  # How far the last swipe scrolled, a hint for overlap estimation when stitching
+        self.screen_width = None  # Set by getScreenInfo
+        self.screen_height = None
+        self.android_version = None
+        self.stream_sequence = 0  # Sequence of the last stream frame before a swipe, see captureScreen
+
+    def bind(self, serial):
+        """Switches the workspace to another device, forgetting what was known about the previous one."""
+        self.device.close()
+        self.device = DeviceSession(adb_path, serial, log=self.log)
+        self.capture_channel = self.device.channel
+        self.swipe_profile = self.swipe_profile_key = None
+        self.screen_width = self.screen_height = self.android_version = None
+
+class FrameStore:
+    """
+    Decoded frames shared by capture, crop, dedupe, stitch and OCR, keyed by the path they are saved under,
+    so a frame is decoded once instead of being written and read back at every step. Files are written by
+    background threads: PNG data from the device as it is, anything else encoded with the given parameters.
+    When the frames held take more than max_bytes the oldest are dropped from memory (written out first if
+    they were only held in memory) and later reads fall back to the file.
+    """
+    def __init__(self, max_bytes=FRAME_STORE_MAX_BYTES, writers=FRAME_STORE_WRITERS, log=None):
+        self.max_bytes = max_bytes
+        self.log = log or (lambda message: None)
+        self.lock = threading.Lock()
+        self.frames = collections.OrderedDict()  # path -> (array, 'RGB' or 'BGR'), oldest first
+        self.bytes = 0
+        self.writes = {}  # path -> Future of its pending write
+        self.writer = concurrent.futures.ThreadPoolExecutor(max_workers=writers, thread_name_prefix='frame-writer')
+
+    def put(self, path, image, order='RGB', encoded=None, params=None, persist=True):
+        """Holds the array image for path and, with persist, writes it to path in the background."""
+        with self.lock:
+            self._drop(path)
+            self.frames[path] = (image, order)
+            self.bytes += image.nbytes
+            if persist:
+                self.writes[path] = self.writer.submit(self._write, path, image, order, encoded, params)
+        self._spill()
+
+    @staticmethod
+    def _write(path, image, order, encoded, params):
+        if encoded is None:
+            if image.ndim == 3 and order == 'RGB':
+                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            ok, encoded = cv2.imencode(os.path.splitext(path)[1] or '.png', image, params or [])
+            if not ok:
+                raise OSError(f"Can't encode {os.path.basename(path)}")
+        with open(path, 'wb') as f:
+            f.write(encoded)
+
+    def _drop(self, path):
+        entry = self.frames.pop(path, None)
+        if entry is not None:
+            self.bytes -= entry[0].nbytes
+
+    def _spill(self):
+        while True:
+            with self.lock:
+                if self.bytes <= self.max_bytes or len(self.frames) <= 1:
+                    return
+                path, (image, order) = next(iter(self.frames.items()))
+                if path not in self.writes and not os.path.exists(path):
+                    # Only held in memory so far, it has to be written before it can be dropped
+                    self.writes[path] = self.writer.submit(self._write, path, image, order, None, None)
+            self.wait(path)
+            with self.lock:
+                if self.frames.get(path, (None,))[0] is image:
+                    self._drop(path)
+
+    def wait(self, path):
+        """Waits until path's pending write (if any) is on disk."""
+        with self.lock:
+            write = self.writes.get(path)
+        if write is None:
+            return
+        try:
+            write.result()
+        except (OSError, cv2.error) as e:
+            self.log(f"Error saving {path}: {e}")
+        with self.lock:
+            if self.writes.get(path) is write:
+                del self.writes[path]
+
+    def _entry(self, path):
+        with self.lock:
+            entry = self.frames.get(path)
+        if entry is None:
+            self.wait(path)
+        return entry
+
+    def imread(self, path, flags=cv2.IMREAD_COLOR):
+        """cv2.imread that returns the frame held in memory if there is one. Don't modify the result."""
+        entry = self._entry(path)
+        if entry is None:
+            return cv2.imread(path, flags)
+        image, order = entry
+        if flags == cv2.IMREAD_GRAYSCALE:
+            if image.ndim == 2:
+                return image
+            return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY if order == 'RGB' else cv2.COLOR_BGR2GRAY)
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if order == 'RGB' else image
+
+    def open(self, path):
+        """Image.open that builds the PIL image from the frame held in memory if there is one."""
+        entry = self._entry(path)
+        if entry is None:
+            return Image.open(path)
+        image, order = entry
+        if image.ndim == 3 and order == 'BGR':
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return Image.fromarray(image)
+
+    def release(self, paths):
+        """Drops the frames from memory once they are on disk, the files themselves stay."""
+        for path in paths:
+            self.wait(path)
+            with self.lock:
+                self._drop(path)
+
+    def flush(self):
+        """Waits for every pending write."""
+        with self.lock:
+            paths = list(self.writes)
+        for path in paths:
+            self.wait(path)
+
+    def close(self):
+        self.flush()
+        self.writer.shutdown()
+
+class CapturedFrame:
+    """A single autoscroll frame as it moves through the FramePipeline stages."""
+    def __init__(self, index, timestamp, image):
+        self.index = index
+        self.timestamp = timestamp
+        self.captured = (time.time_ns(), time.monotonic_ns())  # Exact capture time, the timestamp is only to the second
+        self.image = image
+        self.path = None
+        self.original_path = None  # The uncropped screenshot, when path is its crop
+        self.ui_nodes = None  # Parsed UI dump taken with the frame
+        self.hash = None
+
+class FramePipeline:
+    """
+    Producer/consumer pipeline for autoscroll frames. The capture loop put()s frames and each
+    stage runs in its own worker thread(s), handing the frame on to the next stage. Queues are
+    bounded, so a slow stage blocks the producer instead of buffering frames without limit.
+    A stage function returns the frame to pass it on, or None to drop it.
+    """
+    STOP = object()
+
+    def __init__(self, stages, maxsize=PIPELINE_QUEUE_SIZE, log=None):
+        self.log = log or (lambda message: None)
+        self.stop_event = threading.Event()  # Set by a stage to ask the producer to stop capturing
+        self.stages = []
+        for name, function, workers in stages:
+            self.stages.append({'name': name, 'function': function, 'workers': workers,
+                                'queue': queue.Queue(maxsize=maxsize), 'threads': []})
+        for position, stage in enumerate(self.stages):
+            for _ in range(stage['workers']):
+                worker = threading.Thread(target=self._run_stage, args=(position,))
+                worker.daemon = True
+                worker.start()
+                stage['threads'].append(worker)
+
+    def _run_stage(self, position):
+        stage = self.stages[position]
+        next_queue = self.stages[position + 1]['queue'] if position + 1 < len(self.stages) else None
+        while True:
+            frame = stage['queue'].get()
+            if frame is self.STOP:
+                return
+            try:
+                frame = stage['function'](frame)
+            except Exception as e:
+                self.log(f"Pipeline stage '{stage['name']}' failed on frame {frame.index}: {str(e)}")
+                frame = None
+            if frame is not None and next_queue is not None:
+                next_queue.put(frame)  # Blocks while the next stage is backed up
+
+    def put(self, frame):
+        """Queues a frame for the first stage, blocking while the pipeline is full."""
+        self.stages[0]['queue'].put(frame)
+
+    def join(self):
+        """Drains every stage in order and waits for all worker threads to finish."""
+        for stage in self.stages:
+            for _ in stage['threads']:
+                stage['queue'].put(self.STOP)
+            for worker in stage['threads']:
+                worker.join()
+
+def write_png_chunk(file, chunk_type, data):
+    file.write(struct.pack('>I', len(data)))
+    file.write(chunk_type + data)
+    file.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+
+def write_png_rows(path, width, height, row_blocks, compression=1):
+    """
+    Writes an 8-bit RGB PNG from an iterable of BGR row blocks (n, width, 3) without ever holding
+    the whole image in memory. Rows use the PNG 'Sub' filter, which compresses screenshots well.
+    """
+    compressor = zlib.compressobj(compression)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        write_png_chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        for block in row_blocks:
+            rgb = np.ascontiguousarray(block[:, :, ::-1])
+            filtered = rgb.copy()
+            filtered[:, 1:] -= rgb[:, :-1]  # Sub filter: difference to the pixel on the left (wraps mod 256)
+            rows = np.empty((rgb.shape[0], width * 3 + 1), dtype=np.uint8)
+            rows[:, 0] = 1  # Filter type byte for every row
+            rows[:, 1:] = filtered.reshape(rgb.shape[0], width * 3)
+            data = compressor.compress(rows.tobytes())
+            if data:
+                write_png_chunk(f, b'IDAT', data)
+        write_png_chunk(f, b'IDAT', compressor.flush())
+        write_png_chunk(f, b'IEND', b'')
+
+class OverlapEstimator:
+    """
+    Estimates how far the content scrolled between two consecutive grayscale frames. Estimates are
+    returned as (y_start, confidence, method) where y_start is the first row of the new frame that
+    wasn't in the previous one and confidence is between 0 and 1.
+
+    - Row Signature: hashes every row and aligns the two 1-D signatures, O(height). Exact on lossless frames.
+    - Pyramid Template: matches the previous frame's tail at reduced resolution, confined to a band
+      around the expected scroll (last measured shift, or the swipe distance), then refines at full size.
+    - Full Template: the original full resolution cv2.matchTemplate search.
+    - Auto: tries them in that order until one is confident enough.
+    """
+    def __init__(self, mode=OVERLAP_MODE_AUTO, template_rows=STITCH_OVERLAP_ROWS, expected_shift=None):
+        self.mode = mode
+        self.template_rows = template_rows
+        self.expected_shift = expected_shift  # Scroll in pixels expected per frame, e.g. the swipe distance
+        self.last_shift = None
+        self.row_weights = None
+
+    def estimate(self, previous, current):
+        """Returns (y_start, confidence, method) for two grayscale frames of the same width."""
+        width = min(previous.shape[1], current.shape[1])
+        previous, current = previous[:, :width], current[:, :width]
+        if self.mode == OVERLAP_MODE_ROW_SIGNATURE:
+            methods = [self.estimate_row_signature]
+        elif self.mode == OVERLAP_MODE_PYRAMID:
+            methods = [self.estimate_pyramid]
+        elif self.mode == OVERLAP_MODE_TEMPLATE:
+            methods = [self.estimate_template]
+        else:
+            methods = [self.estimate_row_signature, self.estimate_pyramid, self.estimate_template]
+        for method in methods:
+            shift, confidence, name = method(previous, current)
+            if confidence >= OVERLAP_MIN_CONFIDENCE or method is methods[-1]:
+                break
+        if confidence >= OVERLAP_MIN_CONFIDENCE:
+            self.last_shift = shift
+        return previous.shape[0] - shift, confidence, name
+
+    def row_signatures(self, gray):
+        """Returns a 64-bit hash per row, computed in one vectorized pass."""
+        if self.row_weights is None or self.row_weights.shape[0] != gray.shape[1]:
+            self.row_weights = np.random.RandomState(0).randint(1, 2 ** 62, size=gray.shape[1], dtype=np.uint64) | np.uint64(1)
+        # uint64 arithmetic wraps, which is exactly what a multiplicative hash wants
+        return (gray.astype(np.uint64) * self.row_weights).sum(axis=1, dtype=np.uint64)
+
+    def estimate_row_signature(self, previous, current):
+        previous_sig = self.row_signatures(previous)
+        current_sig = self.row_signatures(current)
+        # Only rows that are unique within their frame and not flat (plain background) can anchor a match
+        def unique_rows(gray, signatures):
+            values, index, counts = np.unique(signatures, return_index=True, return_counts=True)
+            keep = (counts == 1) & (gray[index].min(axis=1) != gray[index].max(axis=1))
+            return values[keep], index[keep]
+        previous_values, previous_index = unique_rows(previous, previous_sig)
+        current_values, current_index = unique_rows(current, current_sig)
+        _, previous_match, current_match = np.intersect1d(previous_values, current_values, assume_unique=True,
+                                                          return_indices=True)
+        if len(previous_match) < OVERLAP_MIN_MATCHED_ROWS:
+            return 0, 0.0, OVERLAP_MODE_ROW_SIGNATURE
+        # Every shared row votes for a shift, current row j shows previous row j + shift
+        shifts = previous_index[previous_match] - current_index[current_match]
+        shifts = shifts[shifts >= 0]
+        if not len(shifts):
+            return 0, 0.0, OVERLAP_MODE_ROW_SIGNATURE
+        shift = int(np.bincount(shifts).argmax())
+        # Confidence is the share of the overlapping rows whose signatures agree at that shift
+        overlap = min(previous.shape[0] - shift, current.shape[0])
+        if overlap <= 0:
+            return shift, 0.0, OVERLAP_MODE_ROW_SIGNATURE
+        agreement = float(np.mean(previous_sig[shift:shift + overlap] == current_sig[:overlap]))
+        return shift, agreement, OVERLAP_MODE_ROW_SIGNATURE
+
+    def _match_rows(self, image, template, first_row, last_row):
+        """Template-matches within rows [first_row, last_row) of image and returns (best_row, score)."""
+        first_row = max(first_row, 0)
+        last_row = min(last_row, image.shape[0])
+        if last_row - first_row < template.shape[0]:
+            return None, 0.0
+        if template.min() == template.max():
+            return None, 0.0  # A flat template (blank background) scores a perfect match anywhere
+        match = np.nan_to_num(cv2.matchTemplate(image[first_row:last_row], template, cv2.TM_CCOEFF_NORMED))
+        _, max_val, _, max_loc = cv2.minMaxLoc(match)
+        return first_row + max_loc[1], float(max_val)
+
+    def estimate_pyramid(self, previous, current):
+        rows = min(self.template_rows, previous.shape[0], current.shape[0])
+        template_top = previous.shape[0] - rows
+        predicted = self.last_shift if self.last_shift is not None else self.expected_shift
+        if predicted is not None:
+            # Only look around where the template should have scrolled to
+            margin = max(int(predicted * 0.5), rows)
+            band = (template_top - int(predicted) - margin, template_top - int(predicted) + margin + rows)
+        else:
+            band = (0, current.shape[0])
+        scale = 2 ** OVERLAP_PYRAMID_LEVELS
+        small_previous, small_current = previous, current
+        for _ in range(OVERLAP_PYRAMID_LEVELS):
+            small_previous, small_current = cv2.pyrDown(small_previous), cv2.pyrDown(small_current)
+        small_rows = max(rows // scale, 1)
+        small_template = small_previous[template_top // scale:template_top // scale + small_rows]
+        coarse_row, _ = self._match_rows(small_current, small_template, band[0] // scale, -(-band[1] // scale))
+        if coarse_row is None:
+            return 0, 0.0, OVERLAP_MODE_PYRAMID
+        # Refine at full resolution a few rows either side of the coarse hit
+        row, score = self._match_rows(current, previous[template_top:], coarse_row * scale - 2 * scale,
+                                      coarse_row * scale + rows + 2 * scale)
+        if row is None:
+            return 0, 0.0, OVERLAP_MODE_PYRAMID
+        return template_top - row, score, OVERLAP_MODE_PYRAMID
+
+    def estimate_template(self, previous, current):
+        rows = min(self.template_rows, previous.shape[0], current.shape[0])
+        template_top = previous.shape[0] - rows
+        row, score = self._match_rows(current, previous[template_top:], 0, current.shape[0])
+        if row is None:
+            return 0, 0.0, OVERLAP_MODE_TEMPLATE
+        return template_top - row, score, OVERLAP_MODE_TEMPLATE
+
+def scrolling_rows(previous, current, tolerance=0):
+    """
+    Returns (first, last + 1) of the rows that changed between two grayscale frames, or None. With a
+    tolerance, rows whose mean change is within it (video compression noise) count as unchanged.
+    """
+    if tolerance:
+        changed = np.abs(previous.astype(np.int16) - current).mean(axis=1) > tolerance
+    else:
+        changed = np.any(previous != current, axis=1)
+    changed = np.flatnonzero(changed)
+    return (int(changed[0]), int(changed[-1]) + 1) if len(changed) else None
+
+def detect_scroll_roi(frames):
+    """
+    Finds the scrolling area of a session from its grayscale frames and returns it as an (x, y, w, h) ROI
+    spanning the full width, or None if nothing scrolled. Rows that stay the same in every frame are the
+    header, footer and keyboard; the scrolling area is the longest run of moving rows, bridging short
+    unchanged stretches that are just blank content.
+    """
+    frames = [frame for frame in frames if frame.shape == frames[0].shape] if frames else []
+    if len(frames) < 2:
+        return None
+    height = frames[0].shape[0]
+    stack = np.stack([frame[:, ::ROI_COLUMN_STEP] for frame in frames]).astype(np.int16)
+    # Fraction of each row's pixels that changed, for every pair of consecutive frames at once
+    changed = (np.abs(np.diff(stack, axis=0)) > ROI_PIXEL_CHANGE).mean(axis=2)
+    moving = np.flatnonzero(changed.max(axis=0) >= ROI_MOVING_FRACTION)
+    if len(moving) == 0:
+        return None
+    # Split the moving rows wherever they are separated by a long unchanged stretch, keep the tallest run
+    breaks = np.flatnonzero(np.diff(moving) > ROI_MAX_GAP_FRACTION * height)
+    starts = np.concatenate(([moving[0]], moving[breaks + 1]))
+    ends = np.concatenate((moving[breaks], [moving[-1]])) + 1
+    tallest = int(np.argmax(ends - starts))
+    top, bottom = int(starts[tallest]), int(ends[tallest])
+    if bottom - top < ROI_MIN_HEIGHT_FRACTION * height:
+        return None
+    return (0, top, frames[0].shape[1], bottom - top)
+
+def measure_scroll(previous, current, reveal_at_top=False, mode=OVERLAP_MODE_AUTO, tolerance=0):
+    """
+    Measures how far the content moved between two grayscale frames of the same screen.
+    Returns (shift in rows, height of the scrolling area in rows, confidence). Rows that didn't change at all
+    (status bar, chat header, input box) are not part of the scrolling area.
+    """
+    if previous.shape != current.shape:
+        return 0, 0, 0.0
+    rows = scrolling_rows(previous, current, tolerance)
+    if rows is None:
+        return 0, 0, 1.0  # Nothing moved
+    viewport = rows[1] - rows[0]
+    # Only the scrolling area is compared, fixed chrome would otherwise match itself
+    previous, current = previous[rows[0]:rows[1]], current[rows[0]:rows[1]]
+    if reveal_at_top:
+        previous, current = previous[::-1], current[::-1]
+    y_start, confidence, method = OverlapEstimator(mode).estimate(previous, current)
+    return previous.shape[0] - y_start, viewport, confidence
+
+class ScrollKeyframeSelector:
+    """
+    Picks the frames of a scrolling screen recording that add new content. Motion is estimated on downscaled
+    greyscale frames against the last kept frame, within the scrolling area found from the first movement.
+    A frame is kept once it has scrolled RECORDING_KEEP_FRACTION of that area, or, if the content moved too
+    far to measure, the last frame that still overlapped is kept instead. Only three frames are ever held.
+    """
+    def __init__(self, scale=RECORDING_MOTION_SCALE, keep_fraction=RECORDING_KEEP_FRACTION, tolerance=RECORDING_NOISE_LEVEL):
+        self.scale = scale
+        self.keep_fraction = keep_fraction
+        self.tolerance = tolerance
+        self.first = None  # First frame, held until the scrolling area is known
+        self.kept = None  # Downscaled grey copy of the last kept frame
+        self.candidate = None  # (frame, small, shift) of the furthest frame since then that still overlaps
+        self.band = None  # (top, bottom) of the scrolling area in downscaled rows
+        self.reveal_at_top = None  # True when scrolling reveals content at the top (back through a chat)
+
+    @property
+    def rows(self):
+        """(top, bottom) of the scrolling area in full resolution rows, None until something scrolled."""
+        return None if self.band is None else (self.band[0] * self.scale, self.band[1] * self.scale)
+
+    def measure(self, previous, current, reveal_at_top):
+        """Returns (shift in downscaled rows, confidence) of current against previous inside the scrolling area."""
+        previous, current = previous[self.band[0]:self.band[1]], current[self.band[0]:self.band[1]]
+        if reveal_at_top:
+            previous, current = previous[::-1], current[::-1]
+        y_start, confidence, method = OverlapEstimator(OVERLAP_MODE_AUTO).estimate(previous, current)
+        return previous.shape[0] - y_start, confidence
+
+    def add(self, frame):
+        """Feeds the next BGR frame and returns [(frame, approximate shift in full rows or None)] to keep, in order."""
+        small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), None, fx=1.0 / self.scale, fy=1.0 / self.scale,
+                           interpolation=cv2.INTER_AREA)
+        if self.kept is None:
+            self.first, self.kept = frame, small
+            return []
+        if self.band is None:
+            rows = scrolling_rows(self.kept, small, self.tolerance)
+            if rows is None or rows[1] - rows[0] < RECORDING_MIN_SCROLL_ROWS:
+                return []  # Nothing scrolling yet
+            self.band = rows
+            forward = self.measure(self.kept, small, False)
+            backward = self.measure(self.kept, small, True)
+            if max(forward[1], backward[1]) < OVERLAP_MIN_CONFIDENCE or max(forward[0], backward[0]) <= 0:
+                self.band = None  # Something changed but didn't scroll (compression noise, an animation)
+                return []
+            self.reveal_at_top = backward[1] > forward[1] and backward[0] > 0
+            first, self.first = self.first, None
+            return [(first, None)] + self._track(frame, small)
+        return self._track(frame, small)
+
+    def finish(self):
+        """Returns the frames still to keep once the recording has ended: the content scrolled in since the last kept frame."""
+        if self.candidate is None:
+            return []
+        candidate, candidate_small, candidate_shift = self.candidate
+        self._keep(candidate_small)
+        return [(candidate, candidate_shift * self.scale)]
+
+    def _keep(self, small):
+        self.kept = small
+        self.candidate = None
+
+    def _track(self, frame, small, retry=True):
+        shift, confidence = self.measure(self.kept, small, self.reveal_at_top)
+        if confidence >= OVERLAP_MIN_CONFIDENCE and shift >= 0:
+            if shift >= self.keep_fraction * (self.band[1] - self.band[0]):
+                self._keep(small)
+                return [(frame, shift * self.scale)]
+            if shift > 0:
+                self.candidate = (frame, small, shift)
+            return []
+        if self.measure(self.kept, small, not self.reveal_at_top)[1] >= OVERLAP_MIN_CONFIDENCE:
+            return []  # Scrolling back over content that was already kept
+        # Lost track, the content moved too far since the last kept frame
+        if self.candidate is not None and retry:
+            candidate, candidate_small, candidate_shift = self.candidate
+            self._keep(candidate_small)
+            return [(candidate, candidate_shift * self.scale)] + self._track(frame, small, retry=False)
+        self._keep(small)
+        return [(frame, None)]  # A gap in the recording, nothing overlaps
+
+def screenshot_name_key(path):
+    """Sort key (capture time, same-second counter) from a screenshot file name, suffixes like _cropped allowed."""
+    match = SCREENSHOT_PREFIX_PATTERN.match(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"No timestamp in file name: {os.path.basename(path)}")
+    return datetime.datetime.strptime(match.group(1), "%Y-%m-%d_%H-%M-%S"), int(match.group(2) or 1)
+
+def group_sessions(folder, gap=BATCH_SESSION_GAP_SECONDS, manifest=None):
+    """
+    Finds the screenshots in a directory tree and groups them into sessions: screenshots in the same folder
+    taken less than gap seconds apart, and in the same autoscroll session if the manifest recorded them.
+    Returns a list of path lists in capture order, single screenshots are left out. Cropped images,
+    stitched images and hidden folders (caches) are skipped.
+    """
+    sessions = []
+    for root, directories, files in os.walk(folder):
+        directories[:] = sorted(directory for directory in directories if not directory.startswith('.'))
+        shots = [os.path.join(root, name) for name in files if SCREENSHOT_NAME_PATTERN.match(name)]
+        recorded = manifest.capture_order(shots) if manifest is not None else {}
+        shots = sorted((screenshot_name_key(path), recorded.get(path), path) for path in shots)
+        session, last, last_session = [], None, None
+        for (taken, _), order, path in shots:
+            session_id = order[0] if order else None
+            if last is not None and ((taken - last).total_seconds() > gap or session_id != last_session):
+                sessions.append(session)
+                session = []
+            session.append(path)
+            last, last_session = taken, session_id
+        sessions.append(session)
+    if manifest is not None:
+        sessions = [manifest.sort_paths(session) for session in sessions]
+    return [session for session in sessions if len(session) > 1]
+
+def batch_stitch_session(image_paths, output_path, overlap_mode=OVERLAP_MODE_AUTO, reverse=True, manifest_path=None):
+    """
+    Batch Crop + Stitch worker, runs in its own process. Finds the session's scrolling area, then crops,
+    de-duplicates and stitches its screenshots one at a time, so only the current frame and the stitcher's
+    previous frame are in memory. The stitch order comes from how the first two frames overlap; reverse
+    (the Stitch Direction setting) is only used if that can't be told. Returns a dict with the output
+    path (None on failure), frames used, bytes read and a message. Overlaps measured before are taken
+    from the session manifest at manifest_path.
+    """
+    cv2.setNumThreads(1)  # The pool already keeps every core busy
+    result = {'output': None, 'frames': 0, 'bytes': sum(os.path.getsize(path) for path in image_paths), 'message': ''}
+    frames = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in image_paths[:ROI_DETECT_MAX_FRAMES]]
+    # Unreadable screenshots are left out, and so are any taken at another size (e.g. after a rotation)
+    frames = [frame for frame in frames if frame is not None]
+    shape = frames[0].shape if frames else None
+    frames = [frame for frame in frames if frame.shape == shape]
+    if len(frames) < 2:
+        result['message'] = "fewer than two readable screenshots of the same size"
+        return result
+    roi = detect_scroll_roi(frames)
+    if roi is None:
+        result['message'] = "couldn't find the scrolling area"
+        return result
+    x, y, w, h = roi
+    first, second = frames[0][y:y + h, x:x + w], frames[1][y:y + h, x:x + w]
+    estimator = OverlapEstimator(overlap_mode)
+    forward = estimator.estimate(first, second)  # Second frame continues below the first
+    backward = estimator.estimate(second, first)
+    if max(forward[1], backward[1]) >= OVERLAP_MIN_CONFIDENCE:
+        reverse = backward[1] > forward[1]
+    del frames, first, second
+    warnings = []
+    manifest = SessionManifest(manifest_path) if manifest_path else None
+    stitcher = IncrementalStitcher(output_path, work_folder=os.path.dirname(output_path),
+                                   estimator=OverlapEstimator(overlap_mode), log=warnings.append, offsets=manifest)
+    frame_index = FrameIndex()
+    try:
+        for path in (reversed(image_paths) if reverse else image_paths):
+            image = cv2.imread(path)
+            if image is None:
+                warnings.append(f"Error loading image: {path}")
+                continue
+            if image.shape[:2] != shape:
+                warnings.append(f"Skipped {os.path.basename(path)}, it is {image.shape[1]}x{image.shape[0]} "
+                                f"instead of {shape[1]}x{shape[0]}")
+                continue
+            image = np.ascontiguousarray(image[y:y + h, x:x + w])
+            signature = frame_signature(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+            if frame_index.match(signature) is not None:
+                continue  # Repeats an earlier frame
+            frame_index.add(signature)
+            stitcher.add(image, manifest.ui_nodes(path) if overlap_mode == OVERLAP_MODE_UI_LAYOUT and manifest is not None else None)
+            result['frames'] += 1
+        result['output'] = stitcher.finish()
+    finally:
+        stitcher.close()
+        if manifest is not None:
+            manifest.close()
+    result['message'] = f"{len(warnings)} warning(s): {warnings[0]}" if warnings else ''
+    return result
+
+class SwipeProfileStore:
+    """Calibrated swipe settings per device and app, kept in a small JSON file."""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        return self.load().get(key)
+
+    def put(self, key, profile):
+        with self.lock:
+            profiles = self.load()
+            profiles[key] = profile
+            # Write a copy and swap it in so a crash never leaves a truncated file
+            staging = self.path + '.tmp'
+            with open(staging, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f, indent=2, sort_keys=True)
+            os.replace(staging, self.path)
+
+class SessionManifest:
+    """
+    SQLite record of capture sessions and their frames: capture order (wall clock and monotonic nanoseconds),
+    unique file names, dimensions, perceptual hashes and crop area, plus the OCR output and stitch overlap
+    offsets already worked out, so re-stitching and re-OCR reuse them instead of recomputing from the files.
+    Recognised text (OCR and UI dumps) is kept line by line with its box on the image, in an FTS5 full-text index,
+    and the UI dump nodes taken with a frame are kept (compressed) for stitching by UI layout.
+    One connection per process, shared between threads; several processes can use the same file.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            folder TEXT NOT NULL,
+            serial TEXT,
+            direction TEXT,
+            started_ns INTEGER NOT NULL,
+            roi TEXT
+        );
+        CREATE TABLE IF NOT EXISTS frames (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER REFERENCES sessions(id),
+            path TEXT NOT NULL UNIQUE,
+            cropped_path TEXT,
+            captured_ns INTEGER NOT NULL,
+            monotonic_ns INTEGER NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            hash TEXT
+        );
+        CREATE INDEX IF NOT EXISTS frames_cropped_path ON frames(cropped_path);
+        CREATE TABLE IF NOT EXISTS offsets (
+            previous TEXT NOT NULL,
+            current TEXT NOT NULL,
+            method TEXT NOT NULL,
+            y_start INTEGER NOT NULL,
+            PRIMARY KEY (previous, current, method)
+        );
+        CREATE TABLE IF NOT EXISTS ocr (
+            path TEXT NOT NULL,
+            settings TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            pdf_path TEXT NOT NULL,
+            PRIMARY KEY (path, settings)
+        );
+        CREATE TABLE IF NOT EXISTS stitches (
+            inputs TEXT PRIMARY KEY,
+            output_path TEXT NOT NULL,
+            frames INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS text_lines (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            source TEXT NOT NULL,
+            session_id INTEGER,
+            x0 INTEGER,
+            y0 INTEGER,
+            x1 INTEGER,
+            y1 INTEGER,
+            text TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS text_lines_path ON text_lines(path, source);
+        CREATE TABLE IF NOT EXISTS frame_layouts (
+            path TEXT PRIMARY KEY,
+            nodes BLOB NOT NULL
+        );
+    """
+    # The index only stores the tokens, the lines themselves stay in text_lines (external content table).
+    # Short prefixes get their own index so a search for the start of a word stays fast.
+    TEXT_INDEX_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS text_index USING fts5(
+            text, content='text_lines', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        CREATE TRIGGER IF NOT EXISTS text_lines_insert AFTER INSERT ON text_lines BEGIN
+            INSERT INTO text_index (rowid, text) VALUES (new.id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS text_lines_delete AFTER DELETE ON text_lines BEGIN
+            INSERT INTO text_index (text_index, rowid, text) VALUES ('delete', old.id, old.text);
+        END;
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # Autocommit: every statement is its own transaction, WAL lets readers and one writer work at once
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(self.SCHEMA)
+        try:
+            self.connection.executescript(self.TEXT_INDEX_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            self.full_text = False  # SQLite built without FTS5, searches fall back to scanning the lines
+
+    def _execute(self, sql, parameters=()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    @staticmethod
+    def _file_state(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def start_session(self, folder, serial=None, direction=None):
+        """Records a new capture session and returns its id."""
+        with self.lock:
+            return self.connection.execute('INSERT INTO sessions (folder, serial, direction, started_ns) VALUES (?, ?, ?, ?)',
+                                           (os.path.abspath(folder), serial, direction, time.time_ns())).lastrowid
+
+    def set_session_roi(self, session_id, roi):
+        self._execute('UPDATE sessions SET roi = ? WHERE id = ?', (json.dumps(roi), session_id))
+
+    def add_frame(self, folder, stem, extension, session_id=None, captured=None, size=None, frame_hash=None):
+        """
+        Records a frame and returns the unique path to save it under: stem + extension, or stem_2, stem_3...
+        if a frame taken within the same second already has that name (on disk, or recorded and still being written).
+        """
+        captured_ns, monotonic_ns = captured or (time.time_ns(), time.monotonic_ns())
+        width, height = size or (None, None)
+        for counter in itertools.count(1):
+            path = os.path.abspath(os.path.join(folder, f"{stem}{extension}" if counter == 1 else f"{stem}_{counter}{extension}"))
+            if os.path.exists(path):
+                continue
+            try:
+                self._execute('INSERT INTO frames (session_id, path, captured_ns, monotonic_ns, width, height, hash) '
+                              'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (session_id, path, captured_ns, monotonic_ns, width, height,
+                               None if frame_hash is None else f"{frame_hash:048x}"))
+                return path
+            except sqlite3.IntegrityError:
+                continue  # Recorded by an earlier frame
+
+    def set_cropped_path(self, path, cropped_path):
+        self._execute('UPDATE frames SET cropped_path = ? WHERE path = ?', (os.path.abspath(cropped_path), os.path.abspath(path)))
+
+    def capture_order(self, paths):
+        """Returns {path: (session id, session start ns, monotonic ns)} for the paths (or their crops) that were recorded."""
+        order = {}
+        for path in paths:
+            rows = self._execute('SELECT f.session_id, COALESCE(s.started_ns, f.captured_ns), f.monotonic_ns FROM frames f '
+                                 'LEFT JOIN sessions s ON s.id = f.session_id WHERE f.path = ?1 OR f.cropped_path = ?1',
+                                 (os.path.abspath(path),))
+            if rows:
+                order[path] = rows[0]
+        return order
+
+    def sort_paths(self, paths):
+        """Sorts paths in capture order, from the manifest if every one was recorded, otherwise from their names."""
+        order = self.capture_order(paths)
+        if len(order) == len(set(paths)):
+            return sorted(paths, key=lambda path: order[path][1:])
+        return sorted(paths, key=screenshot_name_key)
+
+    def ocr_output(self, path, settings):
+        """Returns the OCR'd PDF of an unchanged image OCR'd earlier with the same settings, or None."""
+        rows = self._execute('SELECT mtime_ns, size, pdf_path FROM ocr WHERE path = ? AND settings = ?', (os.path.abspath(path), repr(settings)))
+        if not rows or not os.path.exists(rows[0][2]) or not os.path.exists(path):
+            return None
+        return rows[0][2] if self._file_state(path) == tuple(rows[0][:2]) else None
+
+    def set_ocr_output(self, path, settings, pdf_path):
+        if os.path.exists(path) and pdf_path:
+            self._execute('INSERT OR REPLACE INTO ocr VALUES (?, ?, ?, ?, ?)',
+                          (os.path.abspath(path), repr(settings)) + self._file_state(path) + (pdf_path,))
+
+    def get_offset(self, previous, current, method):
+        """Returns the y_start measured earlier between two frames (by content digest), or None."""
+        rows = self._execute('SELECT y_start FROM offsets WHERE previous = ? AND current = ? AND method = ?', (previous, current, method))
+        return rows[0][0] if rows else None
+
+    def put_offset(self, previous, current, method, y_start):
+        self._execute('INSERT OR REPLACE INTO offsets VALUES (?, ?, ?, ?)', (previous, current, method, int(y_start)))
+
+    def stitch_inputs(self, paths, settings):
+        """Returns a key for stitching exactly these unchanged files with these settings."""
+        digest = hashlib.sha256(repr(settings).encode('utf-8'))
+        for path in paths:
+            digest.update(repr((os.path.abspath(path),) + self._file_state(path)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def stitch_output(self, inputs):
+        """Returns (output path, frames) if these inputs were stitched before and the output still exists."""
+        rows = self._execute('SELECT output_path, frames FROM stitches WHERE inputs = ?', (inputs,))
+        return rows[0] if rows and os.path.exists(rows[0][0]) else None
+
+    def set_stitch_output(self, inputs, output_path, frames):
+        self._execute('INSERT OR REPLACE INTO stitches VALUES (?, ?, ?)', (inputs, output_path, frames))
+
+    def set_ui_nodes(self, path, nodes):
+        """Records the UIDumpParser nodes dumped together with a frame."""
+        data = zlib.compress(json.dumps(nodes, ensure_ascii=False).encode('utf-8'))
+        self._execute('INSERT OR REPLACE INTO frame_layouts VALUES (?, ?)', (os.path.abspath(path), data))
+
+    def ui_nodes(self, path):
+        """Returns the UI dump nodes recorded with a frame (or the frame a crop was made from), or None."""
+        path = os.path.abspath(path)
+        rows = self._execute('SELECT l.nodes FROM frame_layouts l WHERE l.path = ?1 UNION ALL '
+                             'SELECT l.nodes FROM frames f JOIN frame_layouts l ON l.path = f.path WHERE f.cropped_path = ?1', (path,))
+        if not rows:
+            return None
+        return [(text, tuple(box) if box else None, resource_id) for text, box, resource_id in json.loads(zlib.decompress(rows[0][0]))]
+
+    def index_text(self, path, source, lines):
+        """Replaces the indexed text of an image from one source with lines [(text, (left, top, right, bottom) or None)]."""
+        path = os.path.abspath(path)
+        rows = self._execute('SELECT session_id FROM frames WHERE path = ?1 OR cropped_path = ?1', (path,))
+        session_id = rows[0][0] if rows else None
+        with self.lock:
+            # One transaction, so a search never sees the image half re-indexed
+            self.connection.execute('BEGIN')
+            try:
+                self.connection.execute('DELETE FROM text_lines WHERE path = ? AND source = ?', (path, source))
+                self.connection.executemany('INSERT INTO text_lines (path, source, session_id, x0, y0, x1, y1, text) '
+                                            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                            [(path, source, session_id) + tuple(box or (None,) * 4) + (text,) for text, box in lines])
+                self.connection.execute('COMMIT')
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        """
+        Returns up to limit hits [(path, box or None, source, session_id, text)] for the indexed lines
+        containing every word of query (a word also matches as the start of a longer one), newest first.
+        Newest first instead of ranked lets the index stop at limit hits, however common the words are.
+        Hits on crops that were only kept in memory point at the original screenshot instead.
+        """
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        if self.full_text:
+            match = ' '.join('"' + word + '"*' for word in words)
+            rows = self._execute('SELECT l.path, l.x0, l.y0, l.x1, l.y1, l.source, l.session_id, l.text FROM text_index '
+                                 'JOIN text_lines l ON l.id = text_index.rowid WHERE text_index MATCH ? ORDER BY text_index.rowid DESC LIMIT ?',
+                                 (match, limit))
+        else:
+            rows = self._execute('SELECT path, x0, y0, x1, y1, source, session_id, text FROM text_lines WHERE ' +
+                                 ' AND '.join(['text LIKE ?'] * len(words)) + ' ORDER BY id DESC LIMIT ?',
+                                 tuple(f'%{word}%' for word in words) + (limit,))
+        hits = []
+        for path, x0, y0, x1, y1, source, session_id, text in rows:
+            path, box = self.locate(path, None if x0 is None else (x0, y0, x1, y1))
+            hits.append((path, box, source, session_id, text))
+        return hits
+
+    def locate(self, path, box):
+        """Maps a box on a crop that isn't on disk to the same spot on its original screenshot."""
+        if os.path.exists(path):
+            return path, box
+        rows = self._execute('SELECT f.path, s.roi FROM frames f LEFT JOIN sessions s ON s.id = f.session_id WHERE f.cropped_path = ?', (path,))
+        if not rows:
+            return path, box
+        original, roi = rows[0]
+        if box is not None and roi:
+            left, top = json.loads(roi)[:2]
+            box = (box[0] + left, box[1] + top, box[2] + left, box[3] + top)
+        return original, box
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class IncrementalStitcher:
+    """
+    Stitches frames one at a time, e.g. while autoscroll is still running. New rows are written to a
+    memory-mapped canvas file that doubles in size when full (the file is extended, never copied),
+    and only the previous frame is kept in memory for matching, so RAM use stays the same however
+    many frames are added. With reverse=True the frames arrive bottom-up: they are flipped on
+    the way in and the canvas is written out flipped back. With an offsets store (SessionManifest) the
+    overlap measured between two frames is remembered and reused when the same frames are stitched again.
+    Frames added with their UI dump nodes are placed by how far the nodes moved, without image matching.
+    The nodes aren't flipped, so with reverse=True they don't fit and the frames are matched by image.
+    """
+    def __init__(self, output_path, reverse=False, work_folder=None, estimator=None, log=None, offsets=None):
+        self.output_path = output_path
+        self.reverse = reverse
+        self.work_folder = work_folder
+        self.estimator = estimator or OverlapEstimator()
+        self.log = log or (lambda message: None)
+        self.canvas = None
+        self.canvas_path = None
+        self.capacity = 0
+        self.width = None
+        self.height = 0
+        self.previous_gray = None
+        self.frame_count = 0
+        self.offsets = offsets
+        self.previous_digest = None
+        self.previous_nodes = None
+        self.layout_matches = 0  # Frames placed from the UI layout instead of the pixels
+
+    def _ensure_capacity(self, rows):
+        if self.height + rows <= self.capacity:
+            return
+        new_capacity = max(self.capacity * 2, STITCH_INITIAL_ROWS, self.height + rows)
+        if self.canvas is None:
+            fd, self.canvas_path = tempfile.mkstemp(suffix='.canvas', dir=self.work_folder)
+            os.close(fd)
+        else:
+            self.canvas.flush()
+            self.canvas = None
+        # Grow the backing file in place and map it again, the rows already written stay where they are
+        with open(self.canvas_path, 'r+b') as f:
+            f.truncate(new_capacity * self.width * 3)
+        self.canvas = np.memmap(self.canvas_path, dtype=np.uint8, mode='r+', shape=(new_capacity, self.width, 3))
+        self.capacity = new_capacity
+
+    def _append(self, rows):
+        self._ensure_capacity(rows.shape[0])
+        width = min(rows.shape[1], self.width)
+        self.canvas[self.height:self.height + rows.shape[0], :width] = rows[:, :width]
+        self.height += rows.shape[0]
+
+    def find_new_rows(self, gray_image, digest=None):
+        """Returns the first row of gray_image that isn't already on the canvas."""
+        method = f"{self.estimator.mode}/{self.estimator.template_rows}"
+        if digest is not None:
+            y_start = self.offsets.get_offset(self.previous_digest, digest, method)
+            if y_start is not None:
+                self.estimator.last_shift = self.previous_gray.shape[0] - y_start  # Keeps the next prediction right
+                return max(y_start, 0)
+        y_start, confidence, name = self.estimator.estimate(self.previous_gray, gray_image)
+        if confidence < OVERLAP_MIN_CONFIDENCE:
+            self.log(f"Frame {self.frame_count + 1}: low overlap confidence ({confidence:.2f}, {name}).")
+        elif digest is not None:
+            self.offsets.put_offset(self.previous_digest, digest, method, y_start)
+        return max(y_start, 0)
+
+    def find_new_rows_from_layout(self, gray_image, ui_nodes):
+        """
+        Returns the first row of gray_image that isn't already on the canvas, from how far the UI nodes this
+        frame shares with the previous one moved, or None if they share no anchors or the pixels disagree.
+        """
+        shift, anchors = ui_scroll_shift(self.previous_nodes, ui_nodes)
+        if shift is None:
+            return None
+        overlap = min(self.previous_gray.shape[0] - shift, gray_image.shape[0])
+        if shift < 0 or overlap <= 0:
+            self.log(f"Frame {self.frame_count + 1}: UI layout offset {shift}px doesn't fit the stitch, matching images.")
+            return None
+        # A quick look at the pixels catches dumps that don't match the screenshot (e.g. a keyboard popped up)
+        width = min(self.previous_gray.shape[1], gray_image.shape[1])
+        rows = np.arange(0, overlap, max(1, overlap // UI_LAYOUT_CHECK_ROWS))
+        difference = np.abs(self.previous_gray[rows + shift, :width].astype(np.int16) - gray_image[rows, :width]).mean()
+        if difference > UI_LAYOUT_MAX_DIFFERENCE:
+            self.log(f"Frame {self.frame_count + 1}: UI layout offset doesn't match the pixels ({difference:.1f}), matching images.")
+            return None
+        self.estimator.last_shift = shift  # Keeps the image matching prediction right for later frames
+        self.layout_matches += 1
+        return self.previous_gray.shape[0] - shift
+
+    def add(self, image, ui_nodes=None):
+        """
+        Adds the next BGR frame, with the nodes of its UI dump if there is one. Returns False if it
+        couldn't be matched against the previous frame.
+        """
+        if self.reverse:
+            image = image[::-1]
+        gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # Frames are recognised by their pixels, wherever they come from
+        digest = hashlib.blake2b(gray_image.tobytes(), digest_size=16).hexdigest() if self.offsets is not None else None
+        if self.width is None:
+            # First image is just copied to the canvas
+            self.width = image.shape[1]
+            self._append(image)
+        else:
+            if image.shape[1] != self.width:
+                self.log(f"Frame {self.frame_count + 1} is {image.shape[1]}px wide, canvas is {self.width}px.")
+            if gray_image.shape[0] < self.estimator.template_rows:
+                self.log(f"Frame {self.frame_count + 1} is too small to match, skipped.")
+                return False
+            y_start = None
+            if ui_nodes and self.previous_nodes:
+                y_start = self.find_new_rows_from_layout(gray_image, ui_nodes)
+            if y_start is None:
+                y_start = self.find_new_rows(gray_image, digest)
+            if y_start < image.shape[0]:
+                self._append(image[y_start:])
+        self.previous_gray = np.ascontiguousarray(gray_image[:, :self.width])
+        self.previous_digest = digest
+        self.previous_nodes = ui_nodes
+        self.frame_count += 1
+        return True
+
+    def _row_blocks(self):
+        if not self.reverse:
+            for start in range(0, self.height, STITCH_WRITE_BLOCK_ROWS):
+                yield self.canvas[start:min(start + STITCH_WRITE_BLOCK_ROWS, self.height)]
+        else:
+            for end in range(self.height, 0, -STITCH_WRITE_BLOCK_ROWS):
+                yield self.canvas[max(end - STITCH_WRITE_BLOCK_ROWS, 0):end][::-1]
+
+    def finish(self):
+        """Writes the stitched image to output_path and returns the path, or None if nothing was added."""
+        if not self.height:
+            return None
+        write_png_rows(self.output_path, self.width, self.height, self._row_blocks())
+        return self.output_path
+
+    def close(self):
+        """Releases and deletes the canvas file."""
+        self.canvas = None
+        if self.canvas_path and os.path.exists(self.canvas_path):
+            os.remove(self.canvas_path)
+        self.canvas_path = None
 
-class CustomEvent(QEvent):
-    def __init__(self, callback):
-        super().__init__(CUSTOM_EVENT_TYPE)
-        self.callback = callback
+def format_search_hit(hit):
+    """One-line description of a search hit: file, position on the image, source and session, then the line."""
+    path, box, source, session_id, text = hit
+    where = f" at {box[0]},{box[1]}" if box else ''
+    session = f", session {session_id}" if session_id is not None else ''
+    return f"{os.path.basename(path)}{where} ({source}{session}): {text}"
+
+def search_hit_viewer(image, box, title):
+    """
+    Returns a scrollable window showing a BGR image around a search hit, with the hit outlined and
+    scrolled into view. Tall (stitched) images are cut to SEARCH_CONTEXT_ROWS above and below the hit.
+    """
+    top = 0
+    if box is not None:
+        top = max(0, box[1] - SEARCH_CONTEXT_ROWS)
+        image = image[top:min(image.shape[0], box[3] + SEARCH_CONTEXT_ROWS)].copy()
+        cv2.rectangle(image, (box[0], box[1] - top), (box[2], box[3] - top), (0, 0, 255), 3)
+    rgb = np.ascontiguousarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    height, width = rgb.shape[:2]
+    label = QLabel()
+    label.setPixmap(QPixmap.fromImage(QImage(rgb.data, width, height, 3 * width, QImage.Format_RGB888).copy()))
+    viewer = QScrollArea()
+    viewer.setWidget(label)
+    viewer.setWindowTitle(title)
+    viewer.resize(min(width + 30, 1000), min(height + 30, 900))
+    viewer.show()
+    if box is not None:
+        viewer.ensureVisible((box[0] + box[2]) // 2, (box[1] + box[3]) // 2 - top, (box[2] - box[0]) // 2 + 50, 300)
+    return viewer
+
+def search_main(argv):
+    """Command line search of the captured text: prints the hits, and with --show opens the first one."""
+    parser = argparse.ArgumentParser(description="Search the text OCR'd or UI-dumped from captured screenshots.")
+    parser.add_argument('--search', required=True, metavar='QUERY', help='words to find (each also matches as a word prefix)')
+    parser.add_argument('--manifest', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'AndroidScreenOutput', '.manifest.sqlite'),
+                        help='session manifest holding the index (default: the one in AndroidScreenOutput)')
+    parser.add_argument('--limit', type=int, default=SEARCH_RESULT_LIMIT, help='most hits to list, newest first')
+    parser.add_argument('--show', action='store_true', help='open the first hit with the matching region outlined')
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.manifest):
+        print(f"No session manifest at {args.manifest}", file=sys.stderr)
+        return 1
+    manifest = SessionManifest(args.manifest)
+    started = time.perf_counter()
+    hits = manifest.search(args.search, args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    manifest.close()
+    for path, box, source, session_id, text in hits:
+        where = f"\t{box[0]},{box[1]},{box[2]},{box[3]}" if box else '\t-'
+        print(f"{path}{where}\t{source}\t{session_id if session_id is not None else '-'}\t{text}")
+    print(f"{len(hits)} hit(s) in {elapsed:.1f} ms", file=sys.stderr)
+    if args.show and hits:
+        path, box = hits[0][:2]
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Could not open {path}", file=sys.stderr)
+            return 1
+        app = QApplication(sys.argv[:1])
+        # Kept in a variable, the viewer has no parent and would otherwise be deleted before the event loop runs
+        viewer = search_hit_viewer(image, box, format_search_hit(hits[0]))
+        viewer.raise_()  # In front of the terminal the search was run from
+        return app.exec_()
+    return 0 if hits else 2
 
 class SCRCPYULTRA(QWidget):
 
@@ -51,8 +2631,9 @@ class SCRCPYULTRA(QWidget):
         self.scrcpy_process = None
         self.logMessageSignal.connect(self.logMessage)
         self.processEnded.connect(self.enableUIElements)
-        self.autoscroll_screenshot_paths = []  # Initialize the list to track screenshots
-        self.lastAction = None  # To track the last action (autoscroll or manual stitch)
+        self.jobScheduler = JobScheduler(self, self.logMessageSignal.emit)  # Runs long tasks off the GUI thread
+        self.ocrExecutor = OCRExecutor(OCR_DEFAULT_WORKERS, self.logMessageSignal.emit)  # Shared by autoscroll and Manual OCR
+        self.ocrService = OCRService(OCR_DEFAULT_WORKERS, self.logMessageSignal.emit)  # Warm tesseract workers
         # Get the directory of the script or the current working directory
         script_dir = os.path.dirname(os.path.abspath(__file__))
         # Define the output folder path
@@ -60,6 +2641,14 @@ class SCRCPYULTRA(QWidget):
         # Create the output folder if it does not exist
         if not os.path.exists(self.output_folder):
             os.makedirs(self.output_folder)
+        self.ocrCache = OCRCache(os.path.join(self.output_folder, '.ocr_cache'))  # OCR results keyed by pixels + settings
+        self.frameStore = FrameStore(log=self.logMessageSignal.emit)  # Decoded screenshots shared by crop, stitch and OCR
+        self.manifest = SessionManifest(os.path.join(self.output_folder, '.manifest.sqlite'))  # Sessions, frames and work done
+        self.swipeProfiles = SwipeProfileStore(os.path.join(self.output_folder, '.swipe_profiles.json'))
+        # The default device, bound to a serial by bindDefaultDevice, writes to the output folder itself
+        self.defaultWorkspace = DeviceWorkspace(None, self.output_folder, self.logMessageSignal.emit, video_stream=True)
+        self.workspaces = {}  # DeviceWorkspace per serial, kept so each device's adb channel stays open
+        self.streamGrabber = None  # Decodes scrcpy's video for the stream capture mode, started on first use
         self.initUI()
 
     def initUI(self):
@@ -125,10 +2714,42 @@ class SCRCPYULTRA(QWidget):
     def addOCRSettings(self, layout):
         layout.addWidget(QLabel('Optical Character Recognition (OCR):'))
         self.ocrCombo = QComboBox()
-        self.ocrCombo.addItems(['OCR Disabled', 'OCR Enabled (Tesseract)', 'Screen Dump (UiAutomate)']) # , 'Screen Dump (UiAutomate)'     Insert combo option to enable UiAutomate Dumps (Experimental!)
+        self.ocrCombo.addItems(['OCR Disabled', 'OCR Enabled (Tesseract)', OCR_OPTION_INCREMENTAL, 'Screen Dump (UiAutomate)']) # , 'Screen Dump (UiAutomate)'     Insert combo option to enable UiAutomate Dumps (Experimental!)
         layout.addWidget(self.ocrCombo)
+        layout.addWidget(QLabel('OCR Engine:'))
+        self.ocrEngineCombo = QComboBox()
+        self.ocrEngineCombo.addItems([OCR_ENGINE_TESSERACT, OCR_ENGINE_OCRMYPDF])
+        layout.addWidget(self.ocrEngineCombo)
+        layout.addWidget(QLabel('OCR Workers:'))
+        self.ocrWorkersCombo = QComboBox()
+        for i in range(1, max(OCR_DEFAULT_WORKERS, 1) + 1):
+            self.ocrWorkersCombo.addItem(str(i))
+        self.ocrWorkersCombo.setCurrentIndex(OCR_DEFAULT_WORKERS - 1)
+        self.ocrWorkersCombo.currentTextChanged.connect(self.updateOCRSettings)
+        layout.addWidget(self.ocrWorkersCombo)
+        layout.addWidget(QLabel('OCR Languages (join with +):'))
+        self.ocrLanguageCombo = QComboBox()
+        self.ocrLanguageCombo.setEditable(True)
+        self.ocrLanguageCombo.addItems(list_tesseract_languages())
+        self.ocrLanguageCombo.setCurrentText(OCR_LANGUAGES)  # Read per job, the warm workers follow each job's languages
+        layout.addWidget(self.ocrLanguageCombo)
+        layout.addWidget(QLabel('Capture Mode:'))
+        self.captureModeCombo = QComboBox()
+        self.captureModeCombo.addItems([CAPTURE_MODE_RAW, CAPTURE_MODE_PNG, CAPTURE_MODE_STREAM])
+        layout.addWidget(self.captureModeCombo)
+        layout.addWidget(QLabel('Save Format:'))
+        self.saveFormatCombo = QComboBox()
+        self.saveFormatCombo.addItems(list(SAVE_FORMATS))
+        layout.addWidget(self.saveFormatCombo)
+        layout.addWidget(QLabel('Device:'))
+        self.deviceCombo = QComboBox()
+        self.deviceCombo.addItem(DEVICE_DEFAULT)
+        layout.addWidget(self.deviceCombo)
+        refreshDevicesBtn = QPushButton('Refresh Devices')
+        refreshDevicesBtn.clicked.connect(self.refreshDevices)
+        layout.addWidget(refreshDevicesBtn)
         screenshotBtn = QPushButton('Screenshot')
-        screenshotBtn.clicked.connect(self.takeScreenshot)  
+        screenshotBtn.clicked.connect(self.onScreenshotButtonClick)  
         layout.addWidget(screenshotBtn)
 
     def addAutoscrollSettings(self, layout):
@@ -145,6 +2766,12 @@ class SCRCPYULTRA(QWidget):
         self.swipeSpeedComboBox.setCurrentIndex(124)  # Set default value
         layout.addWidget(self.swipeSpeedComboBox)
 
+        # Swipe Distance
+        layout.addWidget(QLabel("Swipe Distance:"))
+        self.swipeDistanceCombo = QComboBox()
+        self.swipeDistanceCombo.addItems([SWIPE_DISTANCE_DEFAULT, SWIPE_DISTANCE_CALIBRATED])
+        layout.addWidget(self.swipeDistanceCombo)
+
         # Swipe Count
         layout.addWidget(QLabel("Swipe Count:"))
         self.scrollCountComboBox = QComboBox()
@@ -159,8 +2786,16 @@ class SCRCPYULTRA(QWidget):
         for i in range(21):  # 21 because 0 to 2 (inclusive) with steps of 0.1 gives us 21 values
             value = i * 0.1  # Calculate the current value
             self.scrollDelayComboBox.addItem(f"{value:.1f}")
-        self.scrollDelayComboBox.setCurrentIndex(10)  # Set default value
+        self.scrollDelayComboBox.setCurrentIndex(0)  # Minimum wait only, the settle detector does the rest
         layout.addWidget(self.scrollDelayComboBox)
+
+        # Settle Timeout
+        layout.addWidget(QLabel("Settle Timeout (Seconds):"))
+        self.settleTimeoutComboBox = QComboBox()
+        for i in range(1, 21):  # 0.5 to 10 seconds in steps of 0.5
+            self.settleTimeoutComboBox.addItem(f"{i * 0.5:.1f}")
+        self.settleTimeoutComboBox.setCurrentText(f"{SETTLE_DEFAULT_TIMEOUT:.1f}")
+        layout.addWidget(self.settleTimeoutComboBox)
         
         # Post Processing
         self.postCombo = QComboBox()
@@ -168,14 +2803,28 @@ class SCRCPYULTRA(QWidget):
         layout.addWidget(QLabel('Post Processing:'))
         layout.addWidget(self.postCombo)
 
+        # Crop Area, also used by Manual Crop
+        layout.addWidget(QLabel('Crop Area:'))
+        self.roiModeCombo = QComboBox()
+        self.roiModeCombo.addItems([ROI_MODE_AUTO, ROI_MODE_MANUAL])
+        layout.addWidget(self.roiModeCombo)
+
         self.startScrollBtn = QPushButton('Start Autoscroll')
         self.startScrollBtn.clicked.connect(self.startAutoScrollScreenshots) 
         layout.addWidget(self.startScrollBtn)
         
         self.testSwipeBtn = QPushButton('Test Swipe Speed')
-        self.testSwipeBtn.clicked.connect(self.swipeScreen) 
+        self.testSwipeBtn.clicked.connect(self.onTestSwipeButtonClick)
         layout.addWidget(self.testSwipeBtn)
 
+        self.calibrateSwipeBtn = QPushButton('Calibrate Swipe')
+        self.calibrateSwipeBtn.clicked.connect(self.onCalibrateSwipeButtonClick)
+        layout.addWidget(self.calibrateSwipeBtn)
+
+        self.stopBtn = QPushButton('Stop')
+        self.stopBtn.clicked.connect(self.stopJobs)
+        layout.addWidget(self.stopBtn)
+
     def addCropStitchSettings(self, layout):
         ocrBtn = QPushButton('Manual OCR')
         ocrBtn.clicked.connect(self.manualOCR)  
@@ -183,6 +2832,10 @@ class SCRCPYULTRA(QWidget):
         cropBtn = QPushButton('Manual Crop')
         cropBtn.clicked.connect(self.bulkImageCrop)  
         layout.addWidget(cropBtn)
+        layout.addWidget(QLabel('Overlap Estimation:'))
+        self.overlapModeCombo = QComboBox()
+        self.overlapModeCombo.addItems(OVERLAP_MODES)
+        layout.addWidget(self.overlapModeCombo)
         layout.addWidget(QLabel('Stitch Direction'))
         self.directionCombo = QComboBox()
         self.directionCombo.addItems(['UP', 'DOWN'])
@@ -190,8 +2843,24 @@ class SCRCPYULTRA(QWidget):
         stitchBtn = QPushButton(' Manual Stitch')
         stitchBtn.clicked.connect(self.onStitchButtonClick)  
         layout.addWidget(stitchBtn)
+        batchBtn = QPushButton('Batch Crop + Stitch (Folder)')
+        batchBtn.clicked.connect(self.onBatchStitchButtonClick)
+        layout.addWidget(batchBtn)
+        recordingBtn = QPushButton('Process Recording')
+        recordingBtn.clicked.connect(self.onProcessRecordingButtonClick)
+        layout.addWidget(recordingBtn)
 
     def addInformationSettings(self, layout):
+        layout.addWidget(QLabel('Search Captured Text:'))
+        self.searchEdit = QLineEdit()
+        self.searchEdit.setPlaceholderText('Words from OCR or screen dumps, Enter to search')
+        self.searchEdit.returnPressed.connect(self.searchText)
+        layout.addWidget(self.searchEdit)
+        self.searchResults = QListWidget()
+        self.searchResults.setMaximumHeight(120)
+        self.searchResults.itemDoubleClicked.connect(self.showSearchHit)  # Double-click opens the image at the hit
+        self.searchResults.hide()
+        layout.addWidget(self.searchResults)
         self.logArea = QTextEdit()
         self.logArea.setReadOnly(True)
         self.logArea.setWordWrapMode(QTextOption.NoWrap)  # Ensure no word wrap
@@ -200,6 +2869,65 @@ class SCRCPYULTRA(QWidget):
         helpBtn.clicked.connect(self.displayHelp)
         layout.addWidget(helpBtn)
 
+    def searchText(self):
+        """Lists the indexed lines matching the search box, newest first."""
+        query = self.searchEdit.text()
+        self.searchResults.clear()
+        if not query.strip():
+            self.searchResults.hide()
+            return
+        started = time.perf_counter()
+        hits = self.manifest.search(query)
+        elapsed = (time.perf_counter() - started) * 1000
+        for hit in hits:
+            item = QListWidgetItem(format_search_hit(hit))
+            item.setData(Qt.UserRole, hit)
+            item.setToolTip(hit[0])
+            self.searchResults.addItem(item)
+        self.searchResults.setVisible(bool(hits))
+        self.logMessageSignal.emit(f"Search '{query}': {len(hits)} hit(s) in {elapsed:.1f} ms.")
+
+    def showSearchHit(self, item):
+        path, box = item.data(Qt.UserRole)[:2]
+        image = self.frameStore.imread(path)
+        if image is None:
+            self.logMessageSignal.emit(f"Could not open {path}, was it moved or deleted?")
+            return
+        # Keep a reference, the window closes as soon as it's garbage collected
+        self.searchViewer = search_hit_viewer(image, box, item.text())
+
+    def updateOCRSettings(self, *args):
+        """Applies the OCR worker count to the executor and the warm worker pool."""
+        workers = int(self.ocrWorkersCombo.currentText())
+        self.ocrExecutor.set_workers(workers)
+        self.ocrService.configure(workers)
+
+    def ocrLanguages(self):
+        return self.ocrLanguageCombo.currentText().strip() or OCR_LANGUAGES
+
+    def readSettings(self):
+        """
+        Reads the settings a job uses from the widgets into a plain dict. Called on the GUI thread when the
+        job is submitted; the job's threads only ever see this snapshot, never the widgets.
+        """
+        return {
+            'ocr_option': self.ocrCombo.currentText(),
+            'ocr_engine': self.ocrEngineCombo.currentText(),
+            'ocr_languages': self.ocrLanguages(),
+            'capture_mode': self.captureModeCombo.currentText(),
+            'save_format': self.saveFormatCombo.currentText(),
+            'swipe_direction': self.scrollCombo.currentText(),
+            'swipe_speed': int(self.swipeSpeedComboBox.currentText()),
+            'swipe_distance': self.swipeDistanceCombo.currentText(),
+            'scroll_count': self.scrollCountComboBox.currentText(),
+            'scroll_delay': float(self.scrollDelayComboBox.currentText()),
+            'settle_timeout': float(self.settleTimeoutComboBox.currentText()),
+            'post_processing': self.postCombo.currentText(),
+            'roi_mode': self.roiModeCombo.currentText(),
+            'overlap_mode': self.overlapModeCombo.currentText(),
+            'stitch_direction': self.directionCombo.currentText(),
+        }
+
     def logMessage(self, message):
         """Logs a message to the QTextEdit log area with a timestamp."""
         timestamp = datetime.datetime.now().strftime("%y/%m/%d %H:%M | ")
@@ -212,6 +2940,21 @@ class SCRCPYULTRA(QWidget):
                 return True
             return super().event(event)
 
+    def closeEvent(self, event):
+        # Stop any background jobs and shut down the persistent adb channel with the window
+        self.jobScheduler.cancel_all()
+        self.jobScheduler.pool.waitForDone(5000)
+        self.frameStore.close()  # Screenshots still being written in the background
+        self.manifest.close()
+        self.ocrExecutor.shutdown()
+        self.ocrService.shutdown()
+        self.defaultWorkspace.device.close()
+        if self.streamGrabber is not None:
+            self.streamGrabber.stop()
+        for workspace in self.workspaces.values():
+            workspace.device.close()
+        super().closeEvent(event)
+
     def displayHelp(self):
         readme_path = 'README.txt'
         try:
@@ -235,11 +2978,14 @@ class SCRCPYULTRA(QWidget):
             # For standard SCRCPY functionality
             if 'Screen recording' in functionality or 'Screenshots' in functionality:
                 # Start the SCRCPY process based on selected functionality
+                # scrcpy shows the default device, named with -s so it still starts with several devices attached
+                serial = self.bindDefaultDevice()
+                device_arguments = ['-s', serial] if serial else []
                 if functionality == 'Screen recording':
-                    self.scrcpy_process = subprocess.Popen(['scrcpy', '--record', os.path.join(self.output_folder, f'{datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.mp4')])
+                    self.scrcpy_process = subprocess.Popen(['scrcpy'] + device_arguments + ['--record', os.path.join(self.output_folder, f'{datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.mp4')])
                     self.logMessageSignal.emit("SCRCPY process has started successfully")
                 elif functionality == 'Screenshots':
-                    self.scrcpy_process = subprocess.Popen(['scrcpy'])
+                    self.scrcpy_process = subprocess.Popen(['scrcpy'] + device_arguments + self.streamSinkArguments())
                     self.logMessageSignal.emit("SCRCPY process has started successfully")
                 else:
                     raise Exception("SCRCPY failed to start.")
@@ -258,6 +3004,10 @@ class SCRCPYULTRA(QWidget):
             self.scrcpy_process.wait()  # Wait for the SCRCPY process to exit
             self.scrcpy_process = None
             self.logMessageSignal.emit("SCRCPY process has ended.")
+            if self.streamGrabber is not None:
+                # Nothing feeds the stream any more
+                self.streamGrabber.stop()
+                self.streamGrabber = None
             # Re-enable UI elements in the main thread
             self.enableUIElementsOnUIThread()
 
@@ -272,54 +3022,227 @@ class SCRCPYULTRA(QWidget):
         self.ocrCombo.setEnabled(True)
         self.startBtn.setEnabled(True)
 
-    def takeScreenshot(self):
+    def streamSource(self):
+        """Where scrcpy's video is read from in stream capture mode, see STREAM_SOURCE_ENV."""
+        if os.environ.get(STREAM_SOURCE_ENV):
+            return os.environ[STREAM_SOURCE_ENV]
+        if sys.platform.startswith('linux') and os.path.exists(STREAM_V4L2_DEVICE):
+            return STREAM_V4L2_DEVICE  # Only there when the v4l2loopback module is loaded
+        return os.path.join(self.output_folder, STREAM_RECORDING_NAME)
+
+    def streamSinkArguments(self):
+        """Extra scrcpy arguments that make it feed the stream capture mode, if that mode is selected."""
+        if self.captureModeCombo.currentText() != CAPTURE_MODE_STREAM or os.environ.get(STREAM_SOURCE_ENV):
+            return []
+        source = self.streamSource()
+        if source == STREAM_V4L2_DEVICE:
+            return [f'--v4l2-sink={source}']  # Needs the v4l2loopback kernel module
+        if os.path.exists(source):
+            os.remove(source)  # A previous session's stream
+        return ['--record', source, '--record-format=mkv']
+
+    def videoStream(self):
+        """Returns the running StreamFrameGrabber, starting it on first use, or None if the stream can't be opened."""
+        if self.streamGrabber is None or not self.streamGrabber.is_running():
+            source = self.streamSource()
+            grabber = StreamFrameGrabber(source, realtime=bool(os.environ.get(STREAM_SOURCE_ENV)) and os.path.isfile(source),
+                                         log=self.logMessageSignal.emit)
+            try:
+                grabber.start()
+            except OSError as e:
+                self.logMessageSignal.emit(f"{str(e)}, is SCRCPY running with Capture Mode set to {CAPTURE_MODE_STREAM}?")
+                return None
+            self.streamGrabber = grabber
+            self.logMessageSignal.emit(f"Capturing from the video stream at {source}.")
+        return self.streamGrabber
+
+    def captureScreen(self, workspace, capture_mode):
+        """
+        Captures the device screen with capture_mode (one of the Capture Mode options) and returns it as a PIL image.
+        Stream capture falls back to the raw framebuffer if scrcpy's video can't be read, and raw
+        framebuffer capture falls back to PNG if the persistent channel fails.
+        """
+        image = None
+        if capture_mode == CAPTURE_MODE_STREAM:
+            # scrcpy only streams the default device, other devices capture over adb
+            stream = self.videoStream() if workspace.video_stream else None
+            try:
+                if stream is not None:
+                    # After a swipe only frames decoded since are the current screen
+                    after = workspace.stream_sequence
+                    image = Image.fromarray(stream.latest(after, STREAM_SWIPE_FRAME_TIMEOUT if after else STREAM_FRAME_TIMEOUT)[1])
+                    workspace.stream_sequence = 0
+            except OSError as e:
+                workspace.log(f"Stream capture failed ({e}), falling back to the raw framebuffer...")
+            if image is None:
+                capture_mode = CAPTURE_MODE_RAW
+            else:
+                return image  # Video frames may be scaled by scrcpy, so they say nothing about rotation
+        if capture_mode == CAPTURE_MODE_RAW:
+            try:
+                # Drop the alpha channel, the framebuffer is always opaque
+                image = Image.fromarray(workspace.capture_channel.capture_raw()[:, :, :3])
+            except (AdbChannelError, OSError) as e:
+                workspace.log(f"Raw capture failed ({e}), falling back to PNG...")
+        if image is None:
+            # Convert PNG screenshot data into an image stream and open it
+            png_data = workspace.capture_channel.capture_png()
+            image = Image.open(BytesIO(png_data))
+            image.info['device_png'] = png_data  # Saved as it is, no need to encode it again
+        # Frames are free rotation checks for the cached device info
+        workspace.device.check_frame_size(image.width, image.height)
+        return image
+
+    def stopJobs(self):
+        """Cancels the running job (e.g. an Infinite autoscroll) and any queued jobs."""
+        if self.jobScheduler.cancel_all():
+            self.logMessageSignal.emit("Stop requested, finishing the current step...")
+        else:
+            self.logMessageSignal.emit("Nothing to stop.")
+
+    def refreshDevices(self):
+        """Lists the attached devices in the Device combo box."""
+        try:
+            serials = list_adb_devices()
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.logMessageSignal.emit(f"Failed to list devices: {str(e)}")
+            return
+        selected = self.deviceCombo.currentText()
+        self.deviceCombo.clear()
+        self.deviceCombo.addItems([DEVICE_DEFAULT] + serials + ([DEVICE_ALL] if len(serials) > 1 else []))
+        if self.deviceCombo.findText(selected) >= 0:
+            self.deviceCombo.setCurrentText(selected)
+        self.logMessageSignal.emit(f"{len(serials)} device(s) attached: {', '.join(serials) or 'none'}")
+
+    def workspace(self, serial):
+        """Returns the DeviceWorkspace of serial, which saves to its own output subfolder and log file."""
+        if serial not in self.workspaces:
+            output_folder = os.path.join(self.output_folder, re.sub(r'[^\w.-]', '_', serial))
+            os.makedirs(output_folder, exist_ok=True)
+            log = DeviceLog(serial, os.path.join(output_folder, 'session.log'), self.logMessageSignal.emit)
+            self.workspaces[serial] = DeviceWorkspace(serial, output_folder, log.emit)
+        return self.workspaces[serial]
+
+    def bindDefaultDevice(self):
+        """
+        Binds the default workspace to the device adb would pick by itself (see default_adb_serial) and
+        returns its serial, so its adb commands name the device with -s even when several are attached.
+        """
+        try:
+            serial = default_adb_serial()
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.logMessageSignal.emit(f"Failed to list devices: {str(e)}")
+            return self.defaultWorkspace.device.serial
+        if serial != self.defaultWorkspace.device.serial:
+            self.defaultWorkspace.bind(serial)
+            if serial:
+                self.logMessageSignal.emit(f"Default device: {serial}")
+        return serial
+
+    def selectedWorkspaces(self):
+        """
+        Returns the DeviceWorkspaces the capture buttons work on: the default workspace (output folder and main
+        log) for the default device, otherwise one with its own output subfolder and log for the chosen device
+        or for every attached device.
+        """
+        selected = self.deviceCombo.currentText()
+        if selected == DEVICE_DEFAULT:
+            self.bindDefaultDevice()
+            return [self.defaultWorkspace]
+        if selected == DEVICE_ALL:
+            serials = [self.deviceCombo.itemText(i) for i in range(self.deviceCombo.count())]
+            return [self.workspace(serial) for serial in serials if serial not in (DEVICE_DEFAULT, DEVICE_ALL)]
+        return [self.workspace(selected)]
+
+    def runOnWorkspaces(self, workspaces, function):
+        """
+        Runs function(workspace) for every workspace, concurrently when there are several. A failing device
+        is logged to its own log stream and doesn't stop the others. Returns the results in order.
+        """
+        def run(workspace):
+            try:
+                return function(workspace)
+            except JobCancelled:
+                raise
+            except Exception as e:
+                workspace.log(f"Failed: {str(e)}")
+                return None
+
+        if len(workspaces) == 1:
+            return [function(workspaces[0])]
+        return self.jobScheduler.run_parallel([lambda workspace=workspace: run(workspace) for workspace in workspaces])
+
+    def onScreenshotButtonClick(self):
+        workspaces = self.selectedWorkspaces()
+        settings = self.readSettings()
+        name = 'Screenshot' if len(workspaces) == 1 else f"Screenshot ({len(workspaces)} devices)"
+        self.jobScheduler.submit(name, lambda: self.runOnWorkspaces(workspaces, lambda workspace: self.takeScreenshot(workspace, settings)))
+
+    def takeScreenshot(self, workspace, settings):
         # Create a timestamp for naming the screenshot file
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         
         try:
-            # Execute adb command to take a screenshot from the connected Android device
-            screenshot_data = subprocess.check_output([adb_path, 'exec-out', 'screencap', '-p'])
-        except subprocess.CalledProcessError as e:
+            # Take a screenshot from the connected Android device
+            image = self.captureScreen(workspace, settings['capture_mode'])
+        except (subprocess.CalledProcessError, OSError) as e:
             # If adb command fails, log the error and return None
-            self.logMessageSignal.emit(f"Error taking screenshot: No device connected...")
+            workspace.log(f"Error taking screenshot: No device connected...")
             return None
         
-        # Convert raw screenshot data into an image stream
-        image_stream = BytesIO(screenshot_data)
-        
-        # Open the image from the stream
-        image = Image.open(image_stream)
-        
-        # Create a filename for the screenshot with the current timestamp
-        output_filename = f'{timestamp}.png'
-        
-        # Build the full path where the screenshot will be saved
-        screenshot_path = os.path.join(self.output_folder, output_filename)
-        
-        # Save the screenshot to the output path
-        image.save(screenshot_path)
-        
-        # Append the path of the taken screenshot to the list for tracking
-        self.autoscroll_screenshot_paths.append(screenshot_path)
-        
-        # Log the successful capture and saving of the screenshot
-        self.logMessageSignal.emit(f"Screenshot taken and saved as: {output_filename}")
+        # Save the screenshot and track it for post processing
+        screenshot_path = self.saveScreenshot(workspace, image, timestamp, settings['save_format'])
+        workspace.autoscroll_screenshot_paths.append(screenshot_path)
         
         # Check if OCR (Optical Character Recognition) is enabled via the GUI or if Screen Dump is selected
-        ocr_option = self.ocrCombo.currentText()
-        if ocr_option != 'OCR Disabled':
-            if ocr_option.startswith('OCR Enabled'):
-                # If OCR is enabled, call the performOCR function with the path of the new screenshot
-                self.performOCR(screenshot_path)
-            elif ocr_option == 'Screen Dump (UiAutomate)':
-                # Handle UI Automate dump
-                ui_dump_path = screenshot_path.replace('.png', '_screendump.xml')
-                text_output_path = screenshot_path.replace('.png', '_screendump.txt')
-                self.dump_ui_xml_and_save(ui_dump_path)
-                self.extract_generic_text_from_ui_dump(ui_dump_path, text_output_path)
+        ocr_option = settings['ocr_option']
+        if ocr_option == 'Screen Dump (UiAutomate)':
+            # The UI hierarchy has to be dumped while the screen still shows this screenshot
+            ui_nodes = self.dump_ui_nodes(workspace)
+            if ui_nodes is not None:
+                self.manifest.set_ui_nodes(screenshot_path, ui_nodes)
+            self.processScreenshotText(workspace, screenshot_path, settings, ui_nodes)
+        else:
+            self.processScreenshotText(workspace, screenshot_path, settings)
         
         # Return the Image object, might be useful for other operations
         return image
+
+    def saveScreenshot(self, workspace, image, timestamp, save_format, session_id=None, captured=None, frame_hash=None):
+        """
+        Saves a captured screenshot to the output folder in save_format (a SAVE_FORMATS key), records it in the session manifest and returns its
+        path. The decoded frame stays in the frame store for crop, stitch and OCR while the file is written
+        in the background.
+        """
+        # Create a filename for the screenshot with the current timestamp in the selected format, the
+        # manifest adds a counter if another screenshot was taken in the same second
+        extension, params = SAVE_FORMATS[save_format]
+        screenshot_path = self.manifest.add_frame(workspace.output_folder, timestamp, extension, session_id, captured, image.size, frame_hash)
+        output_filename = os.path.basename(screenshot_path)
+        
+        # PNG data from the device is written as it came, everything else is encoded once
+        encoded = image.info.get('device_png') if extension == '.png' else None
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        self.frameStore.put(screenshot_path, np.asarray(image), encoded=encoded, params=params)
+        
+        # Log the successful capture and saving of the screenshot
+        workspace.log(f"Screenshot taken and saved as: {output_filename}")
+        return screenshot_path
+
+    def processScreenshotText(self, workspace, screenshot_path, settings, ui_nodes=None):
+        """
+        Runs OCR on a saved screenshot, or extracts the text from its UI dump, depending on the OCR option.
+        The UI dump itself (ui_nodes, see dump_ui_nodes) must already have been taken when the screenshot was captured.
+        """
+        ocr_option = settings['ocr_option']
+        if ocr_option.startswith('OCR Enabled'):
+            # If OCR is enabled, call the performOCR function with the path of the new screenshot
+            self.performOCR(workspace, screenshot_path, settings)
+        elif ocr_option == 'Screen Dump (UiAutomate)':
+            # Handle UI Automate dump
+            text_output_path = os.path.splitext(screenshot_path)[0] + '_screendump.txt'
+            self.extract_generic_text_from_ui_dump(workspace, ui_nodes, text_output_path, screenshot_path)
         
     def manualOCR(self):
         # Open file dialog to let the user select images for OCR
@@ -328,136 +3251,204 @@ class SCRCPYULTRA(QWidget):
             self.logMessageSignal.emit("No images selected for OCR.")
             return
 
-        # Loop through each selected file and perform OCR
-        for fileName in fileNames:
-            self.performOCR(fileName, manual=True)
-            
-    def performOCR(self, screenshot_path, manual=False):
+        settings = self.readSettings()
+        self.jobScheduler.submit(f"Manual OCR ({len(fileNames)} images)", lambda: self.manualOCRBatch(fileNames, settings))
+
+    def manualOCRBatch(self, fileNames, settings):
+        """OCRs the files concurrently; segments of every file share the one OCR executor."""
+        if self.ocrService.available():
+            self.ocrService.check_health()
+        self.ocrImages(self.defaultWorkspace, fileNames, settings, manual=True)
+        self.logMessageSignal.emit(self.ocrCache.stats())
+
+    def performOCR(self, workspace, screenshot_path, settings, manual=False):
         """
         Perform OCR on the provided screenshot path. If the image is too large, it will be segmented.
-        Each segment is converted to a high-contrast PDF if required and then OCR is performed.
+        Each segment is converted to a high-contrast image if required and then OCR is performed.
         The OCR results are combined into a final PDF.
         """
-        timestamp = os.path.basename(screenshot_path).replace('.png', '')
-        self.logMessageSignal.emit("OCR enabled, processing screenshot...")
-        
-        img = Image.open(screenshot_path)
-        segments = []
-        
-        # If the image is too large, split into segments
-        if img.height > MAX_PDF_PAGE_HEIGHT or img.width > MAX_PDF_PAGE_WIDTH:
-            self.logMessageSignal.emit("Image too large, splitting into segments for OCR...")
-            segments = self.split_image(img, timestamp)
-        else:
-            segments = [screenshot_path]
+        return self.ocrImages(workspace, [screenshot_path], settings, manual)[0]
 
-        # Process each segment with OCR
-        ocr_segments = [self.process_single_segment(segment, timestamp, manual) for segment in segments]
-        
-        # Combine the OCR results if there were multiple segments
-        if len(ocr_segments) > 1:
-            combined_pdf_path = self.combine_ocr_segments(ocr_segments, timestamp)     
-            if combined_pdf_path:
-                # Perform cleanup here after successful combination
-                self.clean_up_segments(segments, ocr_segments)
-        else:
-            combined_pdf_path = ocr_segments[0] if ocr_segments else None
-        
-        # Final log message for completion
-        if combined_pdf_path:
-            self.logMessageSignal.emit(f"OCR process completed for image: {screenshot_path}")
-            return combined_pdf_path
-        else:
-            self.logMessageSignal.emit("OCR process failed or was skipped due to image segmentation.")
-            return None
+    def iterOCRSegments(self, workspace, image_paths):
+        """
+        Yields (image_path, timestamp, segment_index, is_last, segment) for every image, slicing oversized
+        images lazily from the decoded image instead of writing segment files.
+        """
+        for image_path in image_paths:
+            self.jobScheduler.check_cancelled()
+            timestamp = os.path.splitext(os.path.basename(image_path))[0]
+            workspace.log("OCR enabled, processing screenshot...")
+            img = self.frameStore.open(image_path)
+            
+            # If the image is too large, split into segments
+            if img.height > MAX_PDF_PAGE_HEIGHT or img.width > MAX_PDF_PAGE_WIDTH:
+                workspace.log("Image too large, splitting into segments for OCR...")
+                for index, (segment, is_last) in enumerate(iter_image_segments(img)):
+                    yield image_path, timestamp, index, is_last, segment
+            else:
+                yield image_path, timestamp, 0, True, img
 
-    def process_single_segment(self, segment_path, timestamp, manual):
+    def ocrImages(self, workspace, image_paths, settings, manual=False):
         """
-        Convert a single image segment to a high-contrast PDF, perform OCR on it, and return the path to the OCR'd PDF.
+        OCRs the images and returns the path of each one's OCR'd PDF in image_paths order (None where OCR failed). Segments are
+        streamed through the OCR executor with only a few in flight at once, and each finished page is
+        appended to its image's PDF in order, so no segment or intermediate PDF files are written.
+        Images the manifest says were already OCR'd, unchanged and with the same settings, are skipped.
         """
-        segment_pdf_path = segment_path.replace('.png', '.pdf')
-        high_contrast = 'Tesseract' in self.ocrCombo.currentText()
+        outputs = {}  # By path, the skipped images finish first but the results are returned in input order
+        in_flight = collections.deque()
+        window = self.ocrExecutor.workers + 1
+        assembly = {}
+        ocr_settings = self.ocrSettings(settings, manual)
+        pending_paths = []
+        for image_path in image_paths:
+            ocr_pdf_path = self.manifest.ocr_output(image_path, ocr_settings)
+            if ocr_pdf_path is None:
+                pending_paths.append(image_path)
+            else:
+                workspace.log(f"Already OCR'd, skipping {os.path.basename(image_path)}: {ocr_pdf_path}")
+                outputs[image_path] = ocr_pdf_path
 
-        # Convert image to high-contrast PDF if required
-        if high_contrast or manual:
-            # Apply high contrast conversion and save as PDF
-            self.convert_to_high_contrast_and_save_as_pdf(segment_path, segment_pdf_path)
+        def collect():
+            (image_path, timestamp, index, is_last, name, top), future = in_flight.popleft()
+            result = self.ocrExecutor.result(future, name)
+            if index == 0:
+                assembly.update(pages=[] if is_last else PyPDF2.PdfWriter(), failed=0, count=0, lines=[])
+            assembly['count'] += 1
+            if result is not None:
+                # Line boxes are relative to the segment, the index wants them on the whole image
+                assembly['lines'].extend(ocr_result_lines(result, (0, top)))
+            if result is None:
+                assembly['failed'] += 1
+            elif is_last and index == 0:
+                assembly['pages'].append(result.pdf)
+            else:
+                # Append the finished page straight away, the segment itself is already gone
+                for page in PyPDF2.PdfReader(io.BytesIO(result.pdf)).pages:
+                    assembly['pages'].add_page(page)
+            if is_last:
+                outputs[image_path] = self.writeOCRPdf(workspace, image_path, timestamp, assembly)
+                self.frameStore.wait(image_path)  # A fresh screenshot may still be on its way to disk
+                self.manifest.set_ocr_output(image_path, ocr_settings, outputs[image_path])
+                self.manifest.index_text(image_path, TEXT_SOURCE_OCR, assembly['lines'])
+                self.jobScheduler.progress(len(outputs), len(image_paths), "images OCR'd")
+
+        try:
+            for image_path, timestamp, index, is_last, segment in self.iterOCRSegments(workspace, pending_paths):
+                name = f"{os.path.basename(image_path)} segment {index + 1}" if index or not is_last else os.path.basename(image_path)
+                if index == 0:
+                    top = 0
+                future = self.ocrExecutor.submit(self.ocrSegmentImage, segment, settings, manual, name)
+                in_flight.append(((image_path, timestamp, index, is_last, name, top), future))
+                top += segment.height  # Segments are cut one below the other
+                # Bounded look-ahead keeps decoded segments from piling up in memory
+                while len(in_flight) >= window:
+                    collect()
+            while in_flight:
+                collect()
+        except JobCancelled:
+            # Queued segments that haven't started yet are dropped, running ones finish
+            for _, future in in_flight:
+                future.cancel()
+            raise
+        return [outputs.get(image_path) for image_path in image_paths]
+
+    def writeOCRPdf(self, workspace, image_path, timestamp, assembly):
+        """Writes the OCR'd page(s) of an image to its output PDF and returns the path, or None on failure."""
+        if assembly['failed']:
+            workspace.log(f"OCR failed for {assembly['failed']} segment(s) of {image_path}.")
+        if assembly['failed'] == assembly['count']:
+            workspace.log("OCR process failed or was skipped due to image segmentation.")
+            return None
+        if isinstance(assembly['pages'], list):
+            ocr_pdf_path = os.path.join(os.path.dirname(image_path), f"{timestamp}_OCR.pdf")
+            with open(ocr_pdf_path, 'wb') as f:
+                f.write(assembly['pages'][0])
         else:
-            self.convert_image_to_pdf(segment_path, segment_pdf_path)
+            # Combine the OCR results if there were multiple segments
+            ocr_pdf_path = os.path.join(workspace.output_folder, f"{timestamp}_combined_OCR.pdf")
+            with open(ocr_pdf_path, 'wb') as out_pdf_file:
+                assembly['pages'].write(out_pdf_file)
+            workspace.log(f"Combined OCR'd segments into: {ocr_pdf_path}")
+        # Final log message for completion
+        workspace.log(f"OCR process completed for image: {image_path}")
+        return ocr_pdf_path
 
-        # Perform OCR on the segment
-        ocr_segment_path = segment_pdf_path.replace('.pdf', '_OCR.pdf')
-        self.ocrmypdf(segment_pdf_path, ocr_segment_path, True)
-        return ocr_segment_path
+    def ocrSettings(self, settings, manual):
+        """Returns (engine, languages, high contrast), everything that changes the OCR output of an image."""
+        engine = settings['ocr_engine']
+        high_contrast = engine == OCR_ENGINE_TESSERACT or 'Tesseract' in settings['ocr_option'] or manual
+        return engine, settings['ocr_languages'], high_contrast
 
-    def convert_to_high_contrast_and_save_as_pdf(self, image_path, pdf_path):
+    def ocrSegmentImage(self, image, settings, manual, name):
         """
-        Convert the image at the given path to a high-contrast version and save it as a PDF.
+        Preprocesses an image and OCRs it with the selected engine, checking the OCR cache first.
+        With the direct Tesseract engine the grayscale image goes straight to tesseract, otherwise it is
+        converted to a (high-contrast if required) PDF for ocrmypdf. Returns an OCRResult or None.
         """
-        img = Image.open(image_path).convert('L')  # Convert to grayscale for high contrast
-        pdf_bytes = io.BytesIO()
-        img.save(pdf_bytes, format='PDF')
-        with open(pdf_path, 'wb') as f:
-            f.write(pdf_bytes.getvalue())
-        self.logMessageSignal.emit(f"High contrast PDF created for OCR: {pdf_path}")
+        ocr_settings = self.ocrSettings(settings, manual)
+        engine, languages, high_contrast = ocr_settings
+        preprocessed = image.convert('L') if high_contrast else image
 
-    def combine_ocr_segments(self, ocr_segments, timestamp):
-        """
-        Combine the OCR'd PDF segments into a single PDF.
-        """
-        combined_pdf_path = os.path.join(self.output_folder, f"{timestamp}_combined_OCR.pdf")
-        pdf_writer = PyPDF2.PdfWriter()
+        # Identical pixels with identical settings give identical OCR output
+        key = self.ocrCache.key(preprocessed, ocr_settings)
+        result = self.ocrCache.get(key)
+        if result is not None:
+            self.logMessageSignal.emit(f"OCR cache hit: {name}")
+            return result
 
-        for segment_path in ocr_segments:
-            pdf_reader = PyPDF2.PdfReader(segment_path)
-            for page in pdf_reader.pages:
-                pdf_writer.add_page(page)
+        if engine == OCR_ENGINE_TESSERACT:
+            result = self.tesseract_image(preprocessed, languages)
+        else:
+            result = self.ocrmypdf_image(preprocessed, high_contrast, languages)
+        if result is not None:
+            self.ocrCache.put(key, result)
+        return result
 
-        with open(combined_pdf_path, 'wb') as out_pdf_file:
-            pdf_writer.write(out_pdf_file)
-        
-        self.logMessageSignal.emit(f"Combined OCR'd segments into: {combined_pdf_path}")
-        return combined_pdf_path
+    def ocrmypdf_image(self, image, high_contrast, languages):
+        """OCRs a preprocessed image through an in-memory PDF and ocrmypdf. Returns an OCRResult (PDF only) or None."""
+        # Convert image to high-contrast PDF if required
+        if high_contrast:
+            pdf_bytes = self.convert_to_high_contrast_pdf(image)
+        else:
+            image_bytes, pdf_buffer = io.BytesIO(), io.BytesIO()
+            image.save(image_bytes, format='PNG')
+            image_bytes.seek(0)
+            self.convert_image_to_pdf(image_bytes, pdf_buffer)
+            pdf_bytes = pdf_buffer.getvalue()
 
-    def split_image(self, image, timestamp):
-        """
-        Split the image into smaller segments that fit the maximum dimensions for a PDF page.
-        """
-        segments = []
-        for i in range(0, image.height, MAX_PDF_PAGE_HEIGHT):
-            segment = image.crop((0, i, image.width, min(i + MAX_PDF_PAGE_HEIGHT, image.height)))
-            segment_path = os.path.join(self.output_folder, f"{timestamp}_segment_{i}.png")
-            segment.save(segment_path, 'PNG')
-            segments.append(segment_path)
-        return segments
+        # Perform OCR on the segment
+        ocr_pdf_bytes = self.ocrmypdf(pdf_bytes, languages)
+        return OCRResult(ocr_pdf_bytes) if ocr_pdf_bytes else None
 
-    def process_ocr_segments(self, segment_paths, timestamp):
+    def tesseract_image(self, image, languages):
         """
-        Perform OCR on each image segment and then combine them into a single PDF.
+        OCRs a preprocessed image with a single tesseract pass fed from memory, no intermediate PDF is written.
+        Uses the warm OCR worker pool when tesserocr is installed, otherwise a one-off tesseract process.
+        Returns an OCRResult, or None if tesseract failed.
         """
-        ocr_segments = []
-        for segment_path in segment_paths:
-            segment_pdf_path = segment_path.replace('.png', '.pdf')
-            self.convert_image_to_pdf(segment_path, segment_pdf_path)
-            ocr_segment_path = segment_pdf_path.replace('.pdf', '_OCR.pdf')
-            self.ocrmypdf(segment_pdf_path, ocr_segment_path, True)
-            ocr_segments.append(ocr_segment_path)
-        
-        combined_pdf_path = os.path.join(self.output_folder, f"{timestamp}_combined_OCR.pdf")
-        self.combine_ocr_segments(ocr_segments)
-        return combined_pdf_path
-        
-    def clean_up_segments(self, segment_paths, ocr_segment_paths):
+        try:
+            if self.ocrService.available():
+                try:
+                    return self.ocrService.recognize(image, languages)
+                except (EOFError, OSError, TimeoutError, RuntimeError) as e:
+                    self.logMessageSignal.emit(f"OCR worker failed ({str(e)}), using a one-off tesseract process...")
+            return run_tesseract(image, languages, single_thread=self.ocrExecutor.workers > 1)
+        except subprocess.CalledProcessError as e:
+            self.logMessageSignal.emit(f"Tesseract failed: {e.stderr.decode('utf-8', 'ignore').strip() or str(e)}")
+        except OSError as e:
+            self.logMessageSignal.emit(f"Tesseract failed: {str(e)}")
+        return None
+
+    def convert_to_high_contrast_pdf(self, image):
         """
-        Deletes the image segment files and their corresponding OCR PDFs.
+        Convert the image to a high-contrast version and return it as PDF bytes.
         """
-        for path in segment_paths + ocr_segment_paths:
-            try:
-                os.remove(path)
-                self.logMessageSignal.emit(f"Deleted file: {path}")
-            except OSError as e:
-                self.logMessageSignal.emit(f"Error deleting file {path}: {e.strerror}")
-                       
+        img = image.convert('L')  # Convert to grayscale for high contrast
+        pdf_bytes = io.BytesIO()
+        img.save(pdf_bytes, format='PDF')
+        return pdf_bytes.getvalue()
+
     def convert_image_to_pdf(self, image_bytes, pdf_path):
         img = Image.open(image_bytes)
         img_width, img_height = img.size
@@ -470,149 +3461,533 @@ class SCRCPYULTRA(QWidget):
         c.drawImage(ImageReader(img), 0, 0, width=img.width, height=img.height)
         c.save()
 
-    def ocrmypdf(self, input_pdf_path, output_pdf_path, temporary_pdf_created):
-        """Runs OCR on a PDF file. Deletes the input PDF if it was created temporarily."""
+    def ocrmypdf(self, pdf_bytes, languages):
+        """Runs OCR on PDF bytes, piped through ocrmypdf's stdin/stdout. Returns the OCR'd PDF bytes, or None."""
+        # Several OCR jobs run side by side, so each one sticks to a single core instead of oversubscribing
+        env = ocr_process_env(self.ocrExecutor.workers > 1)
         try:
-            subprocess.run(["ocrmypdf", "--tesseract-downsample-large-images", "--max-image-mpixels", "0", input_pdf_path, output_pdf_path], check=True)
-            self.logMessageSignal.emit(f"OCR completed: {output_pdf_path}")
-            if temporary_pdf_created:
-                os.remove(input_pdf_path)  # Delete the temporary PDF after OCR
-                self.logMessageSignal.emit(f"Deleted the temporary PDF: {input_pdf_path}")
-        except subprocess.CalledProcessError as e:
+            completed = subprocess.run(["ocrmypdf", "-l", languages, "--jobs", "1", "--tesseract-downsample-large-images", "--max-image-mpixels", "0", "-", "-"],
+                                       input=pdf_bytes, stdout=subprocess.PIPE, check=True, env=env)
+            return completed.stdout
+        except (subprocess.CalledProcessError, OSError) as e:
             self.logMessageSignal.emit(f"OCRmypdf failed: {str(e)}")
+            return None
             
-    def swipeScreen(self):
-    
-        # Check if screen_height or screen_width is not defined
-        if not hasattr(self, 'screen_height') or not hasattr(self, 'screen_width'):
-            self.getScreenInfo()  # Call getScreenInfo to set screen_height and screen_width
+    def swipeScreen(self, workspace, settings, swipe_distance=None, duration=None, direction=None):
+        """
+        Swipes the screen. Without arguments the calibrated profile is used when Swipe Distance is set to
+        Calibrated in settings, otherwise a quarter-ish screen swipe at the Swipe Speed setting.
+        """
+        self.getScreenInfo(workspace)  # Cached, only queries the device after a reconnect or rotation
     
         # Retrieve swipe direction
-        direction = self.scrollCombo.currentText()
-        # Retrieve swipe speed from the swipeSpeedComboBox
-        duration = int(self.swipeSpeedComboBox.currentText())
-    
-        swipe_distance = self.screen_height // 4.5
-        swipe_start_x = self.screen_width // 2
+        if direction is None:
+            direction = settings['swipe_direction']
+        profile = workspace.swipe_profile if settings['swipe_distance'] == SWIPE_DISTANCE_CALIBRATED else None
+        if swipe_distance is None:
+            if profile:
+                swipe_distance = workspace.screen_height * profile['distance']
+                # The measured scroll is a better hint for overlap estimation than the finger travel
+                workspace.swipe_distance = profile['shift']
+            else:
+                swipe_distance = workspace.screen_height // 4.5
+                workspace.swipe_distance = swipe_distance  # Remembered as a hint for overlap estimation when stitching
+        if duration is None:
+            # Retrieve swipe speed from the profile or the swipeSpeedComboBox
+            duration = profile['duration'] if profile else settings['swipe_speed']
+        swipe_start_x = workspace.screen_width // 2
         swipe_end_x = swipe_start_x
 
-        # Get duration from the combo box
-        duration = int(self.swipeSpeedComboBox.currentText())
-
         # Calculate swipe_start_y and swipe_end_y based on direction
         if direction.upper() == "UP":
-            swipe_start_y = int(self.screen_height * 0.5 + swipe_distance / 2)
-            swipe_end_y = int(self.screen_height * 0.5 - swipe_distance / 2)
+            swipe_start_y = int(workspace.screen_height * 0.5 + swipe_distance / 2)
+            swipe_end_y = int(workspace.screen_height * 0.5 - swipe_distance / 2)
         elif direction.upper() == "DOWN":
-            swipe_start_y = int(self.screen_height * 0.5 - swipe_distance / 2)
-            swipe_end_y = int(self.screen_height * 0.5 + swipe_distance / 2)
+            swipe_start_y = int(workspace.screen_height * 0.5 - swipe_distance / 2)
+            swipe_end_y = int(workspace.screen_height * 0.5 + swipe_distance / 2)
         else:
-            self.logMessageSignal.emit(f"Invalid swipe direction: {direction}. Swipe aborted.")
+            workspace.log(f"Invalid swipe direction: {direction}. Swipe aborted.")
             return
 
-        # Perform the swipe action with specified duration
-        subprocess.run([adb_path, 'shell', 'input', 'touchscreen', 'swipe',
-                        str(swipe_start_x), str(swipe_start_y),
-                        str(swipe_end_x), str(swipe_end_y), str(duration)], check=True)
-        # Adjust sleep time as needed, considering the swipe duration
-        time.sleep(max(duration / 1000.0, 1))  # Ensure there's at least a 1-second wait for stability
+        if workspace.video_stream and self.streamGrabber is not None:
+            workspace.stream_sequence = self.streamGrabber.sequence  # Frames up to here show the screen before the swipe
+        # Perform the swipe action with specified duration, returns once the gesture has been injected
+        workspace.device.swipe(swipe_start_x, swipe_start_y, swipe_end_x, swipe_end_y, duration)
+        # No fixed wait here, the autoscroll loop waits for the screen to settle (see waitForSettle)
 
-    def getScreenInfo(self):
+    def waitForSettle(self, workspace, reference, min_wait, timeout, capture_mode):
+        """
+        Waits until the screen stops moving after a swipe and returns the settled frame as a PIL image,
+        or None if the device couldn't be captured.
+        """
+        poll = rows = None
+        if capture_mode != CAPTURE_MODE_STREAM and reference is not None:
+            # Stream frames are already in memory, otherwise polls only pull a band of rows off the device
+            band = int(reference.height * SETTLE_BAND_FRACTION)
+            rows = ((reference.height - band) // 2, (reference.height + band) // 2)
+            poll = lambda: self.pollSettleBand(workspace, rows, capture_mode)
+        detector = SettleDetector(lambda: self.captureScreen(workspace, capture_mode), timeout=timeout, min_wait=min_wait, poll=poll, rows=rows)
         try:
-            # Execute a shell command to get the screen resolution of the connected Android device
-            self.screen_resolution = subprocess.getoutput(f"{adb_path} shell wm size")
-            # Parse the resolution output to extract width and height as integers
-            self.screen_width, self.screen_height = map(int, self.screen_resolution.split(':')[1].strip().split('x'))
-            # Execute a shell command to get the Android version of the connected device
-            self.android_version = subprocess.getoutput(f"{adb_path} shell getprop ro.build.version.release")
+            image, elapsed, settled = detector.wait(reference)
+        except (subprocess.CalledProcessError, OSError) as e:
+            workspace.log(f"Error while waiting for the screen to settle: {str(e)}")
+            return None
+        if settled:
+            workspace.log(f"Screen settled after {elapsed:.2f}s.")
+        else:
+            workspace.log(f"Screen still changing after {elapsed:.1f}s, capturing anyway.")
+        return image
+
+    def pollSettleBand(self, workspace, rows, capture_mode):
+        """
+        Captures the rows (top, bottom) of the screen for a settle poll, from a full frame if the device
+        can't cut out the band itself.
+        """
+        if not workspace.capture_channel.band_failed:
+            try:
+                return workspace.capture_channel.capture_raw_rows(rows[0], rows[1] - rows[0])
+            except (AdbChannelError, OSError) as e:
+                workspace.log(f"Band capture failed ({e}), polling full frames instead...")
+                workspace.capture_channel.band_failed = True
+        return np.asarray(self.captureScreen(workspace, capture_mode))[rows[0]:rows[1]]
+
+    def swipeProfileKey(self, workspace):
+        """Key for the calibrated swipe profile: device model, resolution and the app in the foreground."""
+        model = workspace.device.info()['model'] or 'unknown device'
+        package = workspace.device.foreground_package() or 'unknown app'
+        return f"{model} {workspace.screen_width}x{workspace.screen_height}/{package}"
+
+    def onTestSwipeButtonClick(self):
+        # The swipe blocks until the gesture is done, so it runs as a job like the other buttons
+        settings = self.readSettings()
+        workspaces = self.selectedWorkspaces()
+        self.jobScheduler.submit('Test Swipe', lambda: self.runOnWorkspaces(workspaces, lambda workspace: self.swipeScreen(workspace, settings)))
 
+    def onCalibrateSwipeButtonClick(self):
+        settings = self.readSettings()
+        workspaces = self.selectedWorkspaces()
+        self.jobScheduler.submit('Swipe Calibration', lambda: self.runOnWorkspaces(
+            workspaces, lambda workspace: self.calibrateSwipe(workspace, settings['swipe_direction'], settings)))
+
+    def calibrateSwipe(self, workspace, direction, settings):
+        """
+        Tries a few swipe lengths and durations, measures how far each really scrolls (momentum differs per app)
+        and keeps the one revealing the most new content while SWIPE_MIN_OVERLAP of the scrolling area stays
+        on screen. Each test swipe is undone with the opposite swipe. Returns the saved profile or None.
+        """
+        self.getScreenInfo(workspace)
+        key = self.swipeProfileKey(workspace)
+        workspace.log(f"Calibrating swipe for {key}...")
+        opposite = 'DOWN' if direction.upper() == 'UP' else 'UP'
+        timeout = settings['settle_timeout']
+        base_duration = settings['swipe_speed']
+        capture_mode = settings['capture_mode']
+        best = None
+        for factor in SWIPE_CALIBRATION_DURATION_FACTORS:
+            duration = min(base_duration * factor, SWIPE_MAX_DURATION)
+            for fraction in SWIPE_CALIBRATION_DISTANCES:
+                self.jobScheduler.check_cancelled()
+                before = self.captureScreen(workspace, capture_mode)
+                self.swipeScreen(workspace, settings, workspace.screen_height * fraction, duration, direction)
+                after = self.waitForSettle(workspace, before, 0, timeout, capture_mode)
+                if after is None:
+                    return None
+                shift, viewport, confidence = measure_scroll(
+                    np.asarray(before.convert('L')), np.asarray(after.convert('L')),
+                    direction.upper() == 'DOWN', settings['overlap_mode'])
+                # Put the conversation back where it was for the next test
+                self.swipeScreen(workspace, settings, workspace.screen_height * fraction, duration, opposite)
+                self.waitForSettle(workspace, after, 0, timeout, capture_mode)
+                workspace.log(f"Swipe of {fraction:.0%} screen in {duration}ms scrolled {shift} of {viewport} rows "
+                              f"(confidence {confidence:.2f}).")
+                if not viewport:
+                    workspace.log("Nothing scrolled, make sure there is content left in the swipe direction.")
+                    break
+                if confidence < OVERLAP_MIN_CONFIDENCE or shift > viewport * (1 - SWIPE_MIN_OVERLAP):
+                    break  # Too little overlap left, longer swipes only scroll further
+                if best is None or shift > best['shift']:
+                    best = {'distance': fraction, 'duration': duration, 'shift': int(shift), 'viewport': viewport}
+        if best is None:
+            workspace.log("Swipe calibration failed, keeping the default swipe.")
+            return None
+        self.swipeProfiles.put(key, best)
+        workspace.swipe_profile, workspace.swipe_profile_key = best, key
+        workspace.log(f"Calibrated swipe: {best['distance']:.0%} screen in {best['duration']}ms, "
+                      f"about {best['shift'] / best['viewport']:.0%} new content per frame. Saved for {key}.")
+        return best
+
+    def loadSwipeProfile(self, workspace, direction, settings):
+        """Loads the calibrated swipe for the current device/app, calibrating first if there isn't one yet."""
+        key = self.swipeProfileKey(workspace)
+        workspace.swipe_profile, workspace.swipe_profile_key = self.swipeProfiles.get(key), key
+        if workspace.swipe_profile:
+            workspace.log(f"Using calibrated swipe for {key}.")
+        else:
+            self.calibrateSwipe(workspace, direction, settings)
+
+    def checkSwipeDrift(self, workspace, previous_gray, gray, direction, drift, overlap_mode):
+        """
+        Compares the scroll between two accepted autoscroll frames with the calibrated one. After
+        SWIPE_DRIFT_FRAMES drifting frames in a row the swipe distance is scaled back towards the
+        calibrated scroll and the profile is saved again. drift holds the recent measurements.
+        """
+        profile = workspace.swipe_profile
+        if profile is None or previous_gray is None:
+            return
+        shift, viewport, confidence = measure_scroll(previous_gray, gray, direction.upper() == 'DOWN', overlap_mode)
+        if confidence < OVERLAP_MIN_CONFIDENCE or shift <= 0:
+            return
+        too_far = shift > viewport * (1 - SWIPE_MIN_OVERLAP)
+        if not too_far and abs(shift - profile['shift']) <= profile['shift'] * SWIPE_DRIFT_TOLERANCE:
+            drift.clear()
+            return
+        drift.append(shift)
+        if len(drift) < SWIPE_DRIFT_FRAMES:
+            return
+        measured = float(np.median(drift))
+        drift.clear()
+        scale = min(max(profile['shift'] / measured, 0.5), 1.5)
+        profile['distance'] = min(max(profile['distance'] * scale, 0.1), max(SWIPE_CALIBRATION_DISTANCES))
+        workspace.log(f"Scroll drifted to {measured:.0f} rows (calibrated {profile['shift']}), "
+                      f"swipe distance adjusted to {profile['distance']:.0%} screen.")
+        self.swipeProfiles.put(workspace.swipe_profile_key, profile)
+
+    def getScreenInfo(self, workspace):
+        """Sets screen_width, screen_height and android_version from the device session's cached info."""
+        try:
+            info = workspace.device.info()
+            workspace.screen_width, workspace.screen_height = info['width'], info['height']
+            workspace.android_version = info['android_version']
         except Exception as e:
             # If there is any error (e.g., no device connected), log an error message
-            self.logMessageSignal.emit(f"Error retrieving screen info: {str(e)}")
-            # You could also handle specific actions here, like disabling certain features or informing the user
-
-    def isDuplicateScreenshot(self, current_image, prev_hash):
-        current_hash = imagehash.dhash(current_image)
-        if prev_hash is not None and (current_hash - prev_hash) < 5:  # Adjust threshold as needed
-            return True, None  # Indicating a duplicate was found
-        return False, current_hash
-        
+            workspace.log(f"Error retrieving screen info: {str(e)}")
+            # Default values in case of error
+            workspace.screen_width = workspace.screen_width or 1080  # Default width
+            workspace.screen_height = workspace.screen_height or 1920  # Default height
+
+    def dropRedundantFrames(self, image_paths):
+        """Returns image_paths without images that repeat an earlier one, so they aren't cropped or stitched twice."""
+        frame_index = FrameIndex()
+        kept = []
+        for image_path in image_paths:
+            self.jobScheduler.check_cancelled()
+            image = self.frameStore.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                kept.append(image_path)  # Let the caller report it
+                continue
+            signature = frame_signature(image)
+            match = frame_index.match(signature)
+            if match is None:
+                frame_index.add(signature)
+                kept.append(image_path)
+            else:
+                self.logMessageSignal.emit(f"Skipping {os.path.basename(image_path)}, it repeats an earlier image.")
+        return kept
+
     def startAutoScrollScreenshots(self):
-        self.lastAction = "autoscroll"  # Set the last action as autoscroll
-        # Clear previous session's screenshots
-        self.autoscroll_screenshot_paths.clear()
-        direction = self.scrollCombo.currentText()
-        self.getScreenInfo()  # Retrieves screen size and Android version
-        self.autoScrollAndTakeScreenshots(direction)
-        
+        settings = self.readSettings()
+        direction = settings['swipe_direction']
+        workspaces = self.selectedWorkspaces()
+
+        def autoscroll(workspace):
+            workspace.lastAction = "autoscroll"  # Set the last action as autoscroll
+            # Clear previous session's screenshots
+            workspace.autoscroll_screenshot_paths.clear()
+            self.getScreenInfo(workspace)  # Retrieves screen size and Android version
+            if settings['swipe_distance'] == SWIPE_DISTANCE_CALIBRATED:
+                self.loadSwipeProfile(workspace, direction, settings)
+            self.autoScrollAndTakeScreenshots(workspace, direction, settings)
+            if settings['post_processing'] == 'None':
+                self.frameStore.release(workspace.autoscroll_screenshot_paths)  # Nothing else will read them
+
+        def post_process(result):
+            for workspace in workspaces:
+                self.autoScrollPostProcessing(workspace, settings)
+
+        # Each device runs its own capture loop and pipeline, all at the same time
+        name = 'Autoscroll' if len(workspaces) == 1 else f"Autoscroll ({len(workspaces)} devices)"
+        self.jobScheduler.submit(name, lambda: self.runOnWorkspaces(workspaces, autoscroll), post_process)
+
+    def autoScrollPostProcessing(self, workspace, settings):
+        """Runs on the GUI thread once the autoscroll job has finished, so the ROI window can be shown."""
         # After autoscroll screenshots are taken, check for post-processing option
-        postProcessOption = self.postCombo.currentText()
-        if postProcessOption == 'Crop':
+        postProcessOption = settings['post_processing']
+        if workspace.autoscroll_roi is not None:
+            # The frames were already cropped while capturing, only stitching is left
+            if postProcessOption == 'Crop + Stitch' and workspace.autoscroll_screenshot_paths:
+                cropped_paths = list(workspace.autoscroll_screenshot_paths)
+
+                def stitch():
+                    self.performStitching(workspace, cropped_paths, settings)
+                    self.frameStore.release(cropped_paths)
+
+                self.jobScheduler.submit('Stitch', stitch)
+        elif postProcessOption == 'Crop':
             # Automatically initiate the bulk image crop process
-            self.bulkImageCropPostAutoscroll()
+            self.bulkImageCropPostAutoscroll(workspace, settings)
         elif postProcessOption == 'Crop + Stitch':
-            # Perform cropping first
-            self.bulkImageCropPostAutoscroll()
-            # Then perform stitching on the cropped images
-            self.performStitching(self.autoscroll_screenshot_paths)
-
-    def autoScrollAndTakeScreenshots(self, direction):
-        # Retrieve screen information such as resolution and Android version
-        self.getScreenInfo()
+            # Perform cropping first, then stitching on the cropped images
+            self.bulkImageCropPostAutoscroll(workspace, settings, stitch=True)
 
-        # Initialize variables for tracking screenshots and duplicates
-        prev_hash = None
+    def autoScrollAndTakeScreenshots(self, workspace, direction, settings):
+        # Initialize variables for tracking screenshots
         screenshot_count = 0
-        duplicate_detected = False
+        frame_index = FrameIndex()  # Every accepted frame of the session, used by the hash stage
+        drift_gray = [None]  # Last accepted frame in grayscale, for checking the calibrated swipe
+        drift = []  # Recent drifting scroll measurements
         
         # Determine if scrolling should be infinite or a fixed number of times
-        scroll_count_value = self.scrollCountComboBox.currentText()
+        scroll_count_value = settings['scroll_count']
         infinite_scroll = scroll_count_value == "Infinite"
         scroll_count = int(scroll_count_value) if not infinite_scroll else float('inf')
 
-        # Retrieve the delay between swipes from the combo box
-        scrollDelay = float(self.scrollDelayComboBox.currentText())
+        # Retrieve the minimum delay between swipes and the settle ceiling
+        scrollDelay = settings['scroll_delay']
+        settleTimeout = settings['settle_timeout']
+        capture_mode = settings['capture_mode']
+        overlap_mode = settings['overlap_mode']
+        settled_image = None  # Frame the settle detector already grabbed after the last swipe
+        ocr_option = settings['ocr_option']
+        saved_frames = []
+        ocr_futures = []
+        job = self.jobScheduler.current_job()  # Stage threads check this job for cancellation
+        # With cropping post processing and an automatic crop area, frames are cropped as they are saved
+        post_option = settings['post_processing']
+        workspace.autoscroll_roi = None
+        roi_frames = [] if post_option != 'None' and settings['roi_mode'] == ROI_MODE_AUTO else None
+        held_frames = []  # Frames waiting for the crop area to be known
+        original_paths = []
+        session_id = self.manifest.start_session(workspace.output_folder, workspace.device.serial, direction)
+
+        def hash_stage(frame):
+            # Compare with every frame so far: repeats mean a stall or the end of the content, older matches a loop
+            frame.hash = frame_signature(frame.image)
+            verdict, match = frame_index.observe(frame.hash)
+            if verdict != FRAME_NEW:
+                if pipeline.stop_event.is_set():
+                    return None
+                if verdict == FRAME_STALLED:
+                    workspace.log("Screen didn't move, dropping the screenshot and trying again.")
+                elif verdict == FRAME_LOOP:
+                    workspace.log(f"Screenshot repeats screenshot {match + 1}, dropping it.")
+                elif verdict == FRAME_END:
+                    workspace.log("Duplicate screenshot detected, stopping autoscroll.")
+                    pipeline.stop_event.set()
+                else:
+                    workspace.log("Scrolling keeps returning to earlier screenshots, stopping autoscroll.")
+                    pipeline.stop_event.set()
+                return None
+            if workspace.swipe_profile is not None and settings['swipe_distance'] == SWIPE_DISTANCE_CALIBRATED:
+                # Keep an eye on the real scroll so the calibrated swipe can be corrected if the app behaves differently
+                gray = np.asarray(frame.image.convert('L'))
+                self.checkSwipeDrift(workspace, drift_gray[0], gray, direction, drift, overlap_mode)
+                drift_gray[0] = gray
+            return frame
+
+        def save_stage(frame):
+            frame.path = self.saveScreenshot(workspace, frame.image, frame.timestamp, settings['save_format'], session_id, frame.captured, frame.hash[0])
+            if frame.ui_nodes is not None:
+                self.manifest.set_ui_nodes(frame.path, frame.ui_nodes)  # Stitching by UI layout looks them up later
+            if workspace.autoscroll_roi is not None:
+                # Only the scrolling area goes on to OCR and stitching, kept in memory if it's only for stitching
+                original_paths.append(frame.path)
+                frame.original_path = frame.path
+                frame.path = self.crop_screenshot(frame.path, workspace.autoscroll_roi, workspace.output_folder, persist=post_option == 'Crop')
+                frame.image = self.frameStore.open(frame.path)
+            saved_frames.append(frame)
+            return frame
+
+        def text_stage(frame):
+            if not self.jobScheduler.is_cancelled(job):
+                if ocr_option.startswith('OCR Enabled'):
+                    # OCR runs on the shared OCR executor, so several frames are recognised at once
+                    ocr_futures.append((frame.path, self.ocrExecutor.submit(self.performOCR, workspace, frame.path, settings)))
+                else:
+                    # UI dump bounds are screen coordinates, so the text belongs to the uncropped screenshot
+                    self.processScreenshotText(workspace, frame.original_path or frame.path, settings, frame.ui_nodes)
+            frame.image = None  # Nothing downstream needs the pixels any more
+            return frame
+
+        def strip_stage(frame):
+            # Runs in capture order: OCR only what this frame adds to the previous one
+            if not self.jobScheduler.is_cancelled(job):
+                gray = cv2.cvtColor(np.asarray(frame.image), cv2.COLOR_RGB2GRAY)
+                if strip_estimator.expected_shift is None:
+                    strip_estimator.expected_shift = workspace.swipe_distance  # Known once the first swipe is done
+                strip = self.newContentStrip(previous_gray[0], gray, frame.image, direction, strip_estimator, workspace.log)
+                previous_gray[0] = gray
+                if strip is not None:
+                    # Where the strip sits on the frame, so its OCR'd lines can be indexed at their place on the frame
+                    top = 0 if direction.upper() == 'DOWN' else frame.image.height - strip.height
+                    strip_futures.append((frame.path, top, self.ocrExecutor.submit(self.ocrSegmentImage, strip, settings, False, frame.path)))
+            frame.image = None
+            return frame
+
+        stages = [('hash', hash_stage, 1), ('save', save_stage, 1)]
+        if ocr_option == OCR_OPTION_INCREMENTAL:
+            previous_gray = [None]
+            strip_futures = []
+            strip_estimator = OverlapEstimator(overlap_mode)
+            stages.append(('strip', strip_stage, 1))
+        elif ocr_option != 'OCR Disabled':
+            stages.append(('ocr', text_stage, PIPELINE_OCR_WORKERS))
+        pipeline = FramePipeline(stages, log=workspace.log)
+        if ocr_option.startswith('OCR Enabled') and self.ocrService.available():
+            self.ocrService.check_health()
         
-        # Start taking screenshots and swiping through screens
+        # The capture loop only grabs frames and swipes, the pipeline stages do everything else
         try:
-            while not duplicate_detected and (infinite_scroll or screenshot_count < scroll_count):
-                # Attempt to take a screenshot
-                current_image = self.takeScreenshot()
-                if not current_image:
-                    # If taking a screenshot failed (current_image is None), exit the loop
+            while not pipeline.stop_event.is_set() and (infinite_scroll or screenshot_count < scroll_count):
+                if self.jobScheduler.is_cancelled(job):
+                    workspace.log("Autoscroll stopped by user.")
                     break
-
-                # Check for duplicate screenshots indicating the end of scrollable content
-                duplicate_detected, prev_hash = self.isDuplicateScreenshot(current_image, prev_hash)
-                if duplicate_detected:
-                    self.logMessageSignal.emit("Duplicate screenshot detected, stopping autoscroll.")
+                # Attempt to take a screenshot
+                timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                try:
+                    current_image = settled_image if settled_image is not None else self.captureScreen(workspace, capture_mode)
+                except (subprocess.CalledProcessError, OSError):
+                    # If taking a screenshot failed, exit the loop
+                    workspace.log("Error taking screenshot: No device connected...")
                     break
+                frame = CapturedFrame(screenshot_count, timestamp, current_image)
+                if ocr_option == 'Screen Dump (UiAutomate)' or overlap_mode == OVERLAP_MODE_UI_LAYOUT:
+                    # The UI hierarchy must be dumped before the screen moves on
+                    frame.ui_nodes = self.dump_ui_nodes(workspace)
+                if roi_frames is None:
+                    pipeline.put(frame)
+                else:
+                    # Hold frames back until the scrolling area is known so every frame gets the same crop
+                    held_frames.append(frame)
+                    roi_frames.append(np.asarray(current_image.convert('L')))
+                    roi = detect_scroll_roi(roi_frames)
+                    if roi is not None or len(roi_frames) >= ROI_DETECT_MAX_FRAMES:
+                        workspace.autoscroll_roi = roi
+                        if roi is not None:
+                            self.manifest.set_session_roi(session_id, roi)
+                        workspace.log(f"Scrolling area detected: {roi}" if roi is not None else
+                                      "Couldn't detect the scrolling area, frames will be cropped afterwards.")
+                        roi_frames = None
+                        for held in held_frames:
+                            pipeline.put(held)
+                        held_frames = []
 
                 # Increment the screenshot counter and log the action
                 screenshot_count += 1
-                self.logMessageSignal.emit(f"Screenshot {screenshot_count} taken.")
+                workspace.log(f"Screenshot {screenshot_count} taken.")
                 
-                if screenshot_count < scroll_count:
-                    # Perform a swipe action and wait for the specified delay
-                    self.swipeScreen()
-                    self.logMessageSignal.emit("Swiped screen for next screenshot.")
-                    time.sleep(scrollDelay)
-
-            # Emit a final message indicating the end of the autoscroll operation
-            self.logMessageSignal.emit(f"Autoscroll screenshots completed. Total screenshots taken: {screenshot_count}.")
+                if screenshot_count < scroll_count and not pipeline.stop_event.is_set():
+                    # Perform a swipe action and wait until the screen stops moving
+                    self.swipeScreen(workspace, settings)
+                    workspace.log("Swiped screen for next screenshot.")
+                    settled_image = self.waitForSettle(workspace, current_image, scrollDelay, settleTimeout, capture_mode)
         except Exception as e:
             # If an error occurs, log the error and exit the loop
-            self.logMessageSignal.emit(f"Error during autoscroll: {str(e)}")
-   
+            workspace.log(f"Error during autoscroll: {str(e)}")
+        finally:
+            # Wait for saving and OCR to finish before any post processing starts
+            workspace.log("Waiting for queued screenshots to finish processing...")
+            for held in held_frames:
+                pipeline.put(held)  # Too few frames to find the scrolling area, saved uncropped
+            pipeline.join()
+            self.frameStore.release(original_paths)  # The crops are what's used from here on
+            for path, future in ocr_futures:
+                if self.jobScheduler.is_cancelled(job):
+                    future.cancel()
+                else:
+                    self.ocrExecutor.result(future, path)
+            if ocr_option == 'Screen Dump (UiAutomate)' and saved_frames and not self.jobScheduler.is_cancelled(job):
+                session_name = min(saved_frames, key=lambda frame: frame.index).timestamp
+                self.writeUIDumpTranscript(workspace, saved_frames, direction, session_name)
+            if ocr_option == OCR_OPTION_INCREMENTAL and saved_frames and not self.jobScheduler.is_cancelled(job):
+                results = []
+                for path, top, future in strip_futures:
+                    results.append(self.ocrExecutor.result(future, path))
+                    if results[-1] is not None:
+                        self.manifest.index_text(path, TEXT_SOURCE_OCR, ocr_result_lines(results[-1], (0, top)))
+                session_name = min(saved_frames, key=lambda frame: frame.index).timestamp
+                self.writeOCRTranscript([result for result in results if result], direction, session_name, workspace.output_folder, workspace.log)
+            if ocr_futures or ocr_option == OCR_OPTION_INCREMENTAL:
+                workspace.log(self.ocrCache.stats())
+
+        # Track the kept screenshots in capture order
+        saved_frames.sort(key=lambda frame: frame.index)
+        workspace.autoscroll_screenshot_paths.extend(frame.path for frame in saved_frames)
+
+        # Emit a final message indicating the end of the autoscroll operation
+        workspace.log(f"Autoscroll screenshots completed. Total screenshots taken: {len(saved_frames)}.")
         
+    def newContentStrip(self, previous_gray, gray, image, direction, estimator, log):
+        """
+        Returns the part of a PIL frame that wasn't visible in the previous frame, plus a safety margin
+        of already seen rows, or the whole frame if the scroll offset can't be measured confidently.
+        Swiping UP reveals content at the bottom, swiping DOWN at the top. The caller sets the estimator's
+        expected shift, if it knows roughly how far the content moved.
+        """
+        if previous_gray is None or previous_gray.shape != gray.shape:
+            return image
+        reveal_at_top = direction.upper() == 'DOWN'
+        if reveal_at_top:
+            # Flipping both frames turns content revealed at the top into content revealed at the bottom
+            y_start, confidence, method = estimator.estimate(previous_gray[::-1], gray[::-1])
+        else:
+            y_start, confidence, method = estimator.estimate(previous_gray, gray)
+        if confidence < OVERLAP_MIN_CONFIDENCE:
+            log(f"Scroll offset uncertain ({confidence:.2f}, {method}), OCR'ing the whole frame.")
+            return image
+        new_rows = gray.shape[0] - y_start
+        if new_rows <= 0:
+            return None  # Nothing new on screen
+        rows = min(new_rows + INCREMENTAL_OCR_MARGIN_ROWS, gray.shape[0])
+        if reveal_at_top:
+            return image.crop((0, 0, image.width, rows))
+        return image.crop((0, image.height - rows, image.width, image.height))
+
+    def writeOCRTranscript(self, results, direction, session_name, output_folder, log):
+        """
+        Combines the OCR'd strips of an autoscroll session or recording into one PDF and one de-duplicated
+        text transcript in output_folder, both in reading order (top to bottom of the conversation).
+        """
+        if not results:
+            log("No OCR results to combine into a transcript.")
+            return None
+        if direction.upper() == 'DOWN':
+            # Swiping DOWN scrolls back in time, so the last strip is the top of the conversation
+            results = list(reversed(results))
+        transcript = []
+        pdf_writer = PyPDF2.PdfWriter()
+        for result in results:
+            lines = [line for line in ocr_result_text(result).splitlines() if line.strip()]
+            merge_transcript_lines(transcript, lines)
+            for page in PyPDF2.PdfReader(io.BytesIO(result.pdf)).pages:
+                pdf_writer.add_page(page)
+        text_path = os.path.join(output_folder, f"{session_name}_transcript.txt")
+        with open(text_path, 'w', encoding='utf-8') as text_file:
+            text_file.write('\n'.join(transcript) + '\n')
+        pdf_path = os.path.join(output_folder, f"{session_name}_transcript_OCR.pdf")
+        with open(pdf_path, 'wb') as out_pdf_file:
+            pdf_writer.write(out_pdf_file)
+        log(f"Session transcript saved to {text_path} and {pdf_path}")
+        return pdf_path
+
     def bulkImageCrop(self):
         fileNames, _ = QFileDialog.getOpenFileNames(self, "Select Images for Cropping", self.output_folder, "Images (*.png *.jpg *.jpeg)")
         if fileNames:
-            roi_coordinates = self.select_roi_manually(fileNames[0])
+            roi_coordinates = self.findCropArea(fileNames, self.roiModeCombo.currentText())
             if roi_coordinates:
                 output_folder = os.path.dirname(fileNames[0])
-                for idx, filePath in enumerate(fileNames):
-                    self.crop_screenshot(filePath, roi_coordinates, output_folder)
+                self.jobScheduler.submit(f"Manual Crop ({len(fileNames)} images)",
+                                         lambda: self.cropScreenshots(self.dropRedundantFrames(fileNames), roi_coordinates, output_folder))
+
+    def cropScreenshots(self, fileNames, roi_coordinates, output_folder, persist=True):
+        """Crops every file with the same ROI and returns the cropped paths."""
+        cropped_paths = []
+        for idx, filePath in enumerate(fileNames):
+            self.jobScheduler.check_cancelled()
+            cropped_image_path = self.crop_screenshot(filePath, roi_coordinates, output_folder, persist)
+            if cropped_image_path:
+                cropped_paths.append(cropped_image_path)
+            self.jobScheduler.progress(idx + 1, len(fileNames), "images cropped")
+        return cropped_paths
     
     def resize_image_to_display(self, image):
         """
@@ -628,6 +4003,20 @@ class SCRCPYULTRA(QWidget):
         resized_image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
         return resized_image
 
+    def findCropArea(self, image_paths, roi_mode):
+        """
+        Returns the ROI to crop image_paths to: the scrolling area found from how the first few images change,
+        or the rectangle the user selects on the first image in Manual roi_mode or if nothing could be detected.
+        """
+        if roi_mode == ROI_MODE_AUTO:
+            frames = [self.frameStore.imread(path, cv2.IMREAD_GRAYSCALE) for path in image_paths[:ROI_DETECT_MAX_FRAMES]]
+            roi = detect_scroll_roi([frame for frame in frames if frame is not None])
+            if roi is not None:
+                self.logMessageSignal.emit(f"Scrolling area detected: {roi}")
+                return roi
+            self.logMessageSignal.emit("Couldn't detect the scrolling area automatically.")
+        return self.select_roi_manually(image_paths[0])
+
     def select_roi_manually(self, image_path):
         """
         Opens an image, allows the user to manually select a Region of Interest (ROI) by drawing
@@ -636,7 +4025,7 @@ class SCRCPYULTRA(QWidget):
         # Emit instructions to the user before starting the ROI selection
         self.logMessageSignal.emit("Select a ROI and then press SPACE or ENTER button!")
         self.logMessageSignal.emit("Cancel the selection process by pressing c button!")
-        img = cv2.imread(image_path)
+        img = self.frameStore.imread(image_path)
         resized_img = self.resize_image_to_display(img)
         r = cv2.selectROI("Select ROI", resized_img, fromCenter=False, showCrosshair=True)
         cv2.destroyWindow("Select ROI")
@@ -649,16 +4038,20 @@ class SCRCPYULTRA(QWidget):
             self.logMessageSignal.emit("No valid ROI selected.")
             return None
 
-    def crop_screenshot(self, image_path, roi_coordinates, output_folder):
+    def crop_screenshot(self, image_path, roi_coordinates, output_folder, persist=True):
         """
         Crop the screenshot based on the ROI coordinates and save it with '_cropped' appended to the original filename,
-        maintaining the original file extension.
+        maintaining the original file extension. Without persist the cropped image is only kept in the frame store
+        (e.g. for stitching straight away) and is written out only if the store runs out of room.
         """
-        # Load the image
-        img = cv2.imread(image_path)
+        # Load the image, straight from memory if it was just captured
+        img = self.frameStore.imread(image_path)
+        if img is None:
+            self.logMessageSignal.emit(f"Error loading image: {image_path}")
+            return None
         
-        # Crop the screenshot based on ROI coordinates
-        cropped_img = img[roi_coordinates[1]:roi_coordinates[1]+roi_coordinates[3], roi_coordinates[0]:roi_coordinates[0]+roi_coordinates[2]]
+        # Crop the screenshot based on ROI coordinates, copied so the full frame can be let go
+        cropped_img = np.ascontiguousarray(img[roi_coordinates[1]:roi_coordinates[1]+roi_coordinates[3], roi_coordinates[0]:roi_coordinates[0]+roi_coordinates[2]])
         
         # Extract the original filename without the file extension and the extension itself
         original_filename_without_ext, original_ext = os.path.splitext(os.path.basename(image_path))
@@ -668,89 +4061,224 @@ class SCRCPYULTRA(QWidget):
         
         # Save the cropped screenshot with the new filename in the specified output folder
         cropped_image_path = os.path.join(output_folder, cropped_image_name)
-        cv2.imwrite(cropped_image_path, cropped_img)
+        self.frameStore.put(cropped_image_path, cropped_img, order='BGR', persist=persist)
+        self.manifest.set_cropped_path(image_path, cropped_image_path)  # Keeps the crop in the frame's capture order
         
-        self.logMessageSignal.emit(f"Cropped screenshot saved to {cropped_image_path}")
+        if persist:
+            self.logMessageSignal.emit(f"Cropped screenshot saved to {cropped_image_path}")
         
         return cropped_image_path
         
-    def bulkImageCropPostAutoscroll(self):
+    def bulkImageCropPostAutoscroll(self, workspace, settings, stitch=False):
         """
         Automatically selects screenshots taken during the current autoscroll session for cropping
-        and updates the paths to point to the cropped images.
+        and updates the paths to point to the cropped images. The ROI is selected on the GUI thread,
+        cropping (and stitching if requested) runs as a background job.
         """
-        if not self.autoscroll_screenshot_paths:
-            self.logMessageSignal.emit("No autoscroll screenshots available for cropping.")
+        if not workspace.autoscroll_screenshot_paths:
+            workspace.log("No autoscroll screenshots available for cropping.")
             return
 
-        # Select ROI from the first screenshot for cropping
-        roi_coordinates = self.select_roi_manually(self.autoscroll_screenshot_paths[0])
+        # Find the scrolling area, or let the user select the ROI on the first screenshot
+        roi_coordinates = self.findCropArea(workspace.autoscroll_screenshot_paths, settings['roi_mode'])
         if roi_coordinates:
-            cropped_paths = []  # Initialize a list to store paths of cropped images
-            for filePath in self.autoscroll_screenshot_paths:
-                cropped_image_path = self.crop_screenshot(filePath, roi_coordinates, self.output_folder)
-                if cropped_image_path:
-                    cropped_paths.append(cropped_image_path)
-            
-            # Update autoscroll_screenshot_paths to point to the cropped images
-            self.autoscroll_screenshot_paths = cropped_paths
+            def crop_and_stitch():
+                # Crops only go to disk when they are kept, for stitching they are handed over in memory
+                cropped_paths = self.cropScreenshots(workspace.autoscroll_screenshot_paths, roi_coordinates, workspace.output_folder, persist=not stitch)
+                self.frameStore.release(workspace.autoscroll_screenshot_paths)
+                # Update autoscroll_screenshot_paths to point to the cropped images
+                workspace.autoscroll_screenshot_paths = cropped_paths
+                if stitch:
+                    self.performStitching(workspace, workspace.autoscroll_screenshot_paths, settings)
+                self.frameStore.release(cropped_paths)
+
+            self.jobScheduler.submit('Crop + Stitch' if stitch else 'Crop', crop_and_stitch)
         
-    def get_merge_image_based_on_template(self, image_paths, stitchDirection):
-        images = [cv2.imread(img_path) for img_path in image_paths]
+    def get_merge_image_based_on_template(self, workspace, image_paths, stitchDirection, overlap_mode):
+        """
+        Stitches the images in the given order, loading one at a time into an IncrementalStitcher
+        so memory use doesn't grow with the number of images.
+        """
+        output_path = os.path.join(workspace.output_folder, f"{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_stitched.png")
+        # Autoscroll knows roughly how far each swipe moved the content, which narrows the search
+        expected_shift = workspace.swipe_distance if workspace.lastAction == "autoscroll" else None
+        estimator = OverlapEstimator(overlap_mode, expected_shift=expected_shift)
+        stitcher = IncrementalStitcher(output_path, work_folder=workspace.output_folder, estimator=estimator,
+                                       log=workspace.log, offsets=self.manifest)
+        use_layout = overlap_mode == OVERLAP_MODE_UI_LAYOUT
+        try:
+            for idx, img_path in enumerate(image_paths):
+                self.jobScheduler.check_cancelled()
+                image = self.frameStore.imread(img_path)
+                if image is None:
+                    workspace.log(f"Error loading image: {img_path}")
+                    return None
+                stitcher.add(image, self.manifest.ui_nodes(img_path) if use_layout else None)
+                self.jobScheduler.progress(idx + 1, len(image_paths), "images stitched")
+            if use_layout:
+                workspace.log(f"{stitcher.layout_matches} of {max(len(image_paths) - 1, 0)} overlaps taken from the UI layout, "
+                              "the rest by image matching.")
 
-        # Check if all images are loaded successfully
-        if any(img is None for img in images):
-            self.logMessage("Error loading one or more images.")
-            return None
+            # Save the stitched image
+            return stitcher.finish()
+        finally:
+            stitcher.close()
+    
+       
+    def onProcessRecordingButtonClick(self):
+        fileName, _ = QFileDialog.getOpenFileName(self, "Select a Screen Recording", self.output_folder, "Videos (*.mp4 *.mkv)")
+        if fileName:
+            settings = self.readSettings()
+            self.jobScheduler.submit(f"Process Recording ({os.path.basename(fileName)})", lambda: self.processRecording(fileName, settings))
 
-        # Initialize variables for the result image
-        max_width = max(image.shape[1] for image in images)
-        result = None
-        current_y = 0
-        
-        for i in range(len(images)):
-            # Convert image to grayscale for template matching
-            gray_image = cv2.cvtColor(images[i], cv2.COLOR_BGR2GRAY)
-            
-            if i == 0:  # First image is just copied to the result image
-                result = images[i]
-                current_y += images[i].shape[0]
-                continue
-            
-            # Use the last part of the previous result as the template
-            overlap_size = 50  # You can adjust this value
-            template = cv2.cvtColor(result[-overlap_size:], cv2.COLOR_BGR2GRAY)
-            match = cv2.matchTemplate(gray_image, template, cv2.TM_CCOEFF_NORMED)
-            _, _, _, max_loc = cv2.minMaxLoc(match)
-            
-            # Calculate where the new image should be placed
-            y_start = max_loc[1] + overlap_size
-            if y_start < 0:
-                self.logMessage("Error with template matching.")
+    def processRecording(self, video_path, settings):
+        """
+        Turns a recording of someone scrolling into one stitched image (and an OCR transcript when OCR is
+        enabled). The video is decoded as a stream, only RECORDING_SAMPLE_FPS frames a second are looked at,
+        and frames that add new content go straight into the IncrementalStitcher, so memory use doesn't
+        depend on the length of the recording and nothing but the results is written to disk.
+        """
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            self.logMessageSignal.emit(f"Can't open recording: {video_path}")
+            return None
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30
+        total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        step = max(1, int(round(fps / RECORDING_SAMPLE_FPS)))
+        session_name = os.path.splitext(os.path.basename(video_path))[0]
+        ocr_enabled = settings['ocr_option'].startswith('OCR Enabled')
+        selector = ScrollKeyframeSelector()
+        stitcher = None
+        strip_estimator = OverlapEstimator(settings['overlap_mode'])
+        strip_futures = []
+        previous_gray = None
+        frame_number = kept = 0
+        started = time.monotonic()
+        try:
+            while True:
+                self.jobScheduler.check_cancelled()
+                if frame_number % step:
+                    # Skipped frames are decoded but never converted or copied
+                    if capture.grab():
+                        frame_number += 1
+                        continue
+                    ok = False
+                else:
+                    ok, frame = capture.read()
+                    frame_number += ok
+                for keyframe, shift in (selector.add(frame) if ok else selector.finish()):
+                    top, bottom = selector.rows
+                    keyframe = np.ascontiguousarray(keyframe[top:bottom])  # Only the scrolling area is stitched
+                    if stitcher is None:
+                        output_path = os.path.join(self.output_folder, f"{session_name}_stitched.png")
+                        stitcher = IncrementalStitcher(output_path, reverse=selector.reveal_at_top, work_folder=self.output_folder,
+                                                       estimator=OverlapEstimator(settings['overlap_mode']),
+                                                       log=self.logMessageSignal.emit)
+                    # The motion estimate narrows the full resolution search, keyframes aren't evenly spaced
+                    stitcher.estimator.expected_shift, stitcher.estimator.last_shift = shift, None
+                    stitcher.add(keyframe)
+                    kept += 1
+                    if ocr_enabled:
+                        # OCR only what each kept frame adds, like the incremental autoscroll OCR
+                        gray = cv2.cvtColor(keyframe, cv2.COLOR_BGR2GRAY)
+                        image = Image.fromarray(cv2.cvtColor(keyframe, cv2.COLOR_BGR2RGB))
+                        # The keyframe's own motion estimate, like the stitcher's above
+                        strip_estimator.expected_shift, strip_estimator.last_shift = shift, None
+                        strip = self.newContentStrip(previous_gray, gray, image, 'DOWN' if selector.reveal_at_top else 'UP', strip_estimator,
+                                                     self.logMessageSignal.emit)
+                        previous_gray = gray
+                        if strip is not None:
+                            strip_futures.append(self.ocrExecutor.submit(self.ocrSegmentImage, strip, settings, False, f"{session_name} frame {frame_number}"))
+                if not ok:
+                    break
+                if frame_number % (step * RECORDING_SAMPLE_FPS * 10) == 0:
+                    self.jobScheduler.progress(frame_number, total_frames, "recording frames scanned")
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.logMessageSignal.emit(f"Scanned {frame_number / fps:.0f}s of video in {elapsed:.1f}s "
+                                       f"({frame_number / fps / elapsed:.1f}x real time), kept {kept} frames.")
+            if stitcher is None:
+                self.logMessageSignal.emit("No scrolling found in the recording.")
                 return None
+            stitched_path = stitcher.finish()
+            self.logMessageSignal.emit(f"Stitched image saved to: {stitched_path}")
+            if strip_futures:
+                results = [self.ocrExecutor.result(future, session_name) for future in strip_futures]
+                self.writeOCRTranscript([result for result in results if result], 'DOWN' if selector.reveal_at_top else 'UP', session_name,
+                                        self.output_folder, self.logMessageSignal.emit)
+            return stitched_path
+        except JobCancelled:
+            for future in strip_futures:
+                future.cancel()
+            raise
+        finally:
+            capture.release()
+            if stitcher is not None:
+                stitcher.close()
 
-            # Stitch the new image
-            stitch_height = images[i].shape[0] - y_start
-            new_result_height = current_y + stitch_height
-            if result is None or new_result_height > result.shape[0]:
-                # Increase the result image size if needed
-                new_result = np.zeros((new_result_height, max_width, 3), dtype=np.uint8)
-                new_result[:current_y, :max_width] = result
-                result = new_result
-            
-            result[current_y:current_y + stitch_height, :images[i].shape[1]] = images[i][y_start:]
-            current_y += stitch_height
-        
-        # Crop the result image to remove any unused space
-        result_trimmed = result[:current_y]
+    def onBatchStitchButtonClick(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select a Folder of Screenshot Sessions", self.output_folder)
+        if folder:
+            settings = self.readSettings()
+            self.jobScheduler.submit(f"Batch Crop + Stitch ({os.path.basename(folder)})", lambda: self.batchCropAndStitch(folder, settings))
 
-        # Save the stitched image
-        output_path = os.path.join(self.output_folder, f"{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_stitched.png")
-        cv2.imwrite(output_path, result_trimmed)
+    def batchCropAndStitch(self, folder, settings):
+        """
+        Crops and stitches every screenshot session under folder, one session per worker process. Each
+        session gets its own automatically detected crop area and is written next to its screenshots.
+        """
+        sessions = group_sessions(folder, manifest=self.manifest)
+        if not sessions:
+            self.logMessageSignal.emit(f"No screenshot sessions found in {folder}.")
+            return
+        self.logMessageSignal.emit(f"Found {len(sessions)} sessions ({sum(map(len, sessions))} screenshots), "
+                                   f"stitching with {min(BATCH_WORKERS, len(sessions))} processes...")
+        overlap_mode = settings['overlap_mode']
+        reverse = settings['stitch_direction'] == 'UP'
+        started = time.monotonic()
+        stitched = frames = read = 0
+        # Spawned like the OCR workers, forking a process that runs Qt threads isn't safe
+        pool = concurrent.futures.ProcessPoolExecutor(min(BATCH_WORKERS, len(sessions)), mp_context=multiprocessing.get_context('spawn'))
+        try:
+            pending = {}
+            skipped = 0
+            for session in sessions:
+                inputs = self.manifest.stitch_inputs(session, (overlap_mode, reverse))
+                if self.manifest.stitch_output(inputs) is not None:
+                    skipped += 1  # Same screenshots, same settings, and the stitched image is still there
+                    continue
+                name = os.path.splitext(os.path.basename(session[0]))[0]
+                output_path = os.path.join(os.path.dirname(session[0]), f"{name}_stitched.png")
+                future = pool.submit(batch_stitch_session, session, output_path, overlap_mode, reverse, self.manifest.path)
+                pending[future] = (session, inputs)
+            if skipped:
+                self.logMessageSignal.emit(f"Skipping {skipped} sessions that were already stitched.")
+            while pending:
+                self.jobScheduler.check_cancelled()
+                done, _ = concurrent.futures.wait(pending, timeout=0.5, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    session, inputs = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'output': None, 'frames': 0, 'bytes': 0, 'message': str(e)}
+                    read += result['bytes']
+                    if result['output']:
+                        stitched += 1
+                        frames += result['frames']
+                        self.manifest.set_stitch_output(inputs, result['output'], result['frames'])
+                        self.logMessageSignal.emit(f"Stitched {result['frames']} screenshots into {result['output']}"
+                                                   + (f" ({result['message']})" if result['message'] else ''))
+                    else:
+                        self.logMessageSignal.emit(f"Skipped session {os.path.basename(session[0])}: {result['message']}")
+                    self.jobScheduler.progress(len(sessions) - len(pending), len(sessions), "sessions stitched")
+        finally:
+            # On Stop, sessions that haven't started are dropped and running ones finish in the background
+            pool.shutdown(wait=False, cancel_futures=True)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.logMessageSignal.emit(f"Batch done: {stitched}/{len(sessions)} sessions, {frames} screenshots, "
+                                   f"{read / 1e6:.0f} MB in {elapsed:.1f}s ({frames / elapsed:.1f} screenshots/s, "
+                                   f"{read / 1e6 / elapsed:.1f} MB/s).")
 
-        return output_path
-    
-       
     def onStitchButtonClick(self):
         fileNames, _ = QFileDialog.getOpenFileNames(self, "Select Cropped Images for Stitching", self.output_folder, "Images (*.png *.jpg *.jpeg)")
         if not fileNames:
@@ -758,57 +4286,55 @@ class SCRCPYULTRA(QWidget):
             return
         
         self.logMessageSignal.emit(f"{len(fileNames)} images selected for stitching.")
-        self.performStitching(fileNames)
+        settings = self.readSettings()
+        self.jobScheduler.submit(f"Manual Stitch ({len(fileNames)} images)", lambda: self.performStitching(self.defaultWorkspace, fileNames, settings))
 
-    def performStitching(self, imagePaths):
-        self.logMessageSignal.emit("Sorting images by datetime...")
+    def performStitching(self, workspace, imagePaths, settings):
+        workspace.log("Sorting images by datetime...")
         sorted_fileNames = self.sort_images_by_datetime(imagePaths)
+        if sorted_fileNames:
+            sorted_fileNames = self.dropRedundantFrames(sorted_fileNames)
         
         if sorted_fileNames:
-            self.logMessageSignal.emit("Images sorted.")
+            workspace.log("Images sorted.")
             stitchDirection = None
             
             # Determine stitch direction based on the last action
-            if self.lastAction == "autoscroll":
+            if workspace.lastAction == "autoscroll":
                 # Use the autoscroll direction for stitching
-                stitchDirection = "DOWN" if "Screenshots (Autoscroll UP)" in self.scrollCombo.currentText() else "UP"
-            elif self.lastAction == "manual_stitch":
+                stitchDirection = "DOWN" if "Screenshots (Autoscroll UP)" in settings['swipe_direction'] else "UP"
+            elif workspace.lastAction == "manual_stitch":
                 # Use the manual stitch direction
-                stitchDirection = self.directionCombo.currentText()
+                stitchDirection = settings['stitch_direction']
 
             # Check the determined stitch direction and adjust the order of images if necessary
             if stitchDirection == 'UP':
-                self.logMessageSignal.emit("Reversing image order for 'UP' stitching direction.")
+                workspace.log("Reversing image order for 'UP' stitching direction.")
                 sorted_fileNames.reverse()
 
-            self.logMessageSignal.emit(f"Starting stitching process for {len(sorted_fileNames)} images, direction: {stitchDirection}.")
-            stitched_image_path = self.get_merge_image_based_on_template(sorted_fileNames, stitchDirection)
+            workspace.log(f"Starting stitching process for {len(sorted_fileNames)} images, direction: {stitchDirection}.")
+            stitched_image_path = self.get_merge_image_based_on_template(workspace, sorted_fileNames, stitchDirection, settings['overlap_mode'])
             if stitched_image_path:
-                self.logMessageSignal.emit(f"Stitched image saved to: {stitched_image_path}")
+                workspace.log(f"Stitched image saved to: {stitched_image_path}")
             else:
-                self.logMessageSignal.emit("Stitching failed.")
+                workspace.log("Stitching failed.")
         else:
-            self.logMessageSignal.emit("Failed to sort images. Aborting stitching process.")
+            workspace.log("Failed to sort images. Aborting stitching process.")
             
         if stitched_image_path:  # Check if the stitched image was saved successfully
-            self.logMessageSignal.emit(f"Stitched image saved to: {stitched_image_path}")
+            workspace.log(f"Stitched image saved to: {stitched_image_path}")
             
             # Clean up cropped images after successful stitching
-            if 'Crop + Stitch' in self.postCombo.currentText():
+            if 'Crop + Stitch' in settings['post_processing']:
                 # Assuming you have a list of paths to the temporary cropped images
-                self.clean_up_cropped_images(self.autoscroll_screenshot_paths)
+                self.clean_up_cropped_images(workspace.autoscroll_screenshot_paths)
         else:
-            self.logMessageSignal.emit("Stitching failed.")
+            workspace.log("Stitching failed.")
             
-    def extract_datetime_from_filename(self, filename):
-        basename = os.path.basename(filename)  # Get the filename without the path
-        datetime_part = basename.split('_cropped')[0]  # Extract the datetime part before '_cropped'
-        datetime_part = datetime_part.rsplit('.', 1)[0]  # Further ensure any extension is removed
-        return datetime.datetime.strptime(datetime_part, "%Y-%m-%d_%H-%M-%S")
-        
     def sort_images_by_datetime(self, imagePaths):
+        """Sorts images in capture order: from the session manifest if recorded, otherwise from the timestamp in the name."""
         try:
-            sorted_imagePaths = sorted(imagePaths, key=self.extract_datetime_from_filename)
+            sorted_imagePaths = self.manifest.sort_paths(imagePaths)
             return sorted_imagePaths
         except Exception as e:
             self.logMessageSignal.emit(f"Error sorting images: {str(e)}")
@@ -819,6 +4345,9 @@ class SCRCPYULTRA(QWidget):
         Deletes temporary cropped images used for stitching.
         """
         for path in cropped_image_paths:
+            self.frameStore.release([path])
+            if not os.path.exists(path):
+                continue  # Only ever held in memory
             try:
                 os.remove(path)
                 self.logMessageSignal.emit(f"Deleted temporary cropped image: {path}")
@@ -826,67 +4355,76 @@ class SCRCPYULTRA(QWidget):
                 self.logMessageSignal.emit(f"Error deleting temporary cropped image {path}: {str(e)}")
                 
                 
-    def getScreenInfo(self):
-        try:
-            # Example command to get screen size (you'll need to adjust this to your requirements)
-            output = subprocess.check_output([adb_path, 'shell', 'wm', 'size']).decode('utf-8')
-            resolution = output.split()[-1]
-            self.screen_width, self.screen_height = map(int, resolution.split('x'))
-        except Exception as e:
-            self.logMessageSignal.emit(f"Error retrieving screen info: {str(e)}")
-            # Default values in case of error
-            self.screen_width = 1080  # Default width
-            self.screen_height = 1920  # Default height
-            
-    def dump_ui_xml_and_save(self, local_path):
-        """Dumps the UI hierarchy and saves it to the local machine without using device storage."""
-        command = [adb_path, 'exec-out', 'uiautomator', 'dump', '--compressed', '/dev/tty']
+    def dump_ui_nodes(self, workspace):
+        """
+        Dumps the UI hierarchy of the current screen and returns its nodes (see UIDumpParser), or None if the
+        dump failed. The XML is parsed while it streams in from adb, nothing is written to disk.
+        """
+        parser = UIDumpParser()
         try:
-            with open(local_path, "wb") as f:
-                f.write(subprocess.check_output(command))
-            self.logMessageSignal.emit(f"UI XML dumped to {local_path}")
-        except subprocess.CalledProcessError as e:
-            self.logMessageSignal.emit(f"Failed to dump UI XML: {str(e)}")
-        # Wait for a short period to ensure file is written
-        time.sleep(2)  # Waits for 2 seconds
+            workspace.device.dump_ui(parser.feed)
+        except AdbChannelError as e:
+            workspace.log(f"Failed to dump UI XML: {str(e)}")
+            return None
+        if not parser.finished:
+            workspace.log(f"Failed to parse XML: {parser.error or 'no complete hierarchy in the UI dump'}")
+            return None
+        workspace.log(f"UI dumped: {len(parser.nodes)} nodes.")
+        return parser.nodes
 
-    def extract_generic_text_from_ui_dump(self, ui_dump_path, output_text_file):
-        """Extracts text from the UI dump XML without relying on a specific resource-id and writes it to a text file."""
+    def extract_generic_text_from_ui_dump(self, workspace, ui_nodes, output_text_file, image_path=None):
+        """
+        Writes the text of the UI dump nodes to a text file, without relying on a specific resource-id.
+        With image_path, the text is also added to the search index at each node's bounds on that screenshot.
+        """
+        if ui_nodes is None:
+            return  # The dump failed, already logged
+        lines = ui_dump_lines(ui_nodes)
+        if image_path is not None:
+            self.manifest.index_text(image_path, TEXT_SOURCE_UI_DUMP, lines)
+        if not lines:
+            workspace.log(f"No text found in the UI dump for {output_text_file}.")
+            return
         try:
-            self.logMessageSignal.emit(f"Starting generic text extraction from {ui_dump_path}...")
-            import xml.etree.ElementTree as ET
+            with open(output_text_file, "w", encoding="utf-8") as text_file:
+                for text, _ in lines:
+                    text_file.write(text + "\n")
+            workspace.log(f"Text extracted to {output_text_file}")
+        except OSError as e:
+            workspace.log(f"An error occurred: {e}")
 
-            with open(ui_dump_path, "r", encoding="utf-8") as file:
-                xml_content = file.read()
-            
-            xml_start_pos = xml_content.find("<hierarchy")
-            xml_end_pos = xml_content.rfind("</hierarchy>") + len("</hierarchy>")
-            if xml_start_pos == -1 or xml_end_pos == -1:
-                self.logMessageSignal.emit("Failed to find the XML hierarchy data.")
-                return
-            
-            clean_xml_content = xml_content[xml_start_pos:xml_end_pos]
-            root = ET.fromstring(clean_xml_content)
-            all_texts = [elem.attrib["text"] for elem in root.iter() if "text" in elem.attrib and elem.attrib["text"].strip()]
-            
-            if all_texts:
-                with open(output_text_file, "w", encoding="utf-8") as text_file:
-                    for text in all_texts:
-                        text_file.write(text + "\n")
-                self.logMessageSignal.emit(f"Text extracted to {output_text_file}")
-                # After successfully writing texts, delete the XML file
-                os.remove(ui_dump_path)
-                self.logMessageSignal.emit(f"UI XML file deleted: {ui_dump_path}")
-            else:
-                self.logMessageSignal.emit(f"No text found in {ui_dump_path}.")
-        except ET.ParseError as pe:
-            self.logMessageSignal.emit(f"Failed to parse XML: {pe}")
-        except FileNotFoundError:
-            self.logMessageSignal.emit(f"File not found: {ui_dump_path}")
-        except Exception as e:
-            self.logMessageSignal.emit(f"An error occurred: {e}")
+    def writeUIDumpTranscript(self, workspace, frames, direction, session_name):
+        """
+        Writes the UI dump text of an autoscroll session as one transcript in reading order, with the
+        lines repeated by consecutive frames (content visible in both) written once.
+        """
+        frames = sorted((frame for frame in frames if frame.ui_nodes), key=lambda frame: frame.index)
+        if not frames:
+            workspace.log("No UI dump text to combine into a transcript.")
+            return None
+        if direction.upper() == 'DOWN':
+            # Swiping DOWN scrolls back in time, so the last frame is the top of the conversation
+            frames.reverse()
+        frame_lines = [ui_dump_lines(frame.ui_nodes) for frame in frames]
+        if len(frame_lines) > 1:
+            # Toolbars and input boxes sit at the same place with the same text on every frame. Left in,
+            # they would split the repeated content apart, so only the scrolling content is kept.
+            fixed = set.intersection(*(set(lines) for lines in frame_lines))
+            if any(set(lines) - fixed for lines in frame_lines):
+                frame_lines = [[line for line in lines if line not in fixed] for lines in frame_lines]
+        transcript = []
+        for lines in frame_lines:
+            merge_transcript_lines(transcript, [text for text, _ in lines])
+        text_path = os.path.join(workspace.output_folder, f"{session_name}_screendump_transcript.txt")
+        with open(text_path, 'w', encoding='utf-8') as text_file:
+            text_file.write('\n'.join(transcript) + '\n')
+        workspace.log(f"Session UI dump transcript saved to {text_path}")
+        return text_path
 
 if __name__ == '__main__':
+    # Both '--search QUERY' and '--search=QUERY' run the command line search
+    if any(arg == '--search' or arg.startswith('--search=') for arg in sys.argv[1:]):
+        sys.exit(search_main(sys.argv[1:]))
     app = QApplication(sys.argv)
     ex = SCRCPYULTRA()
     ex.show()
@@ -0,0 +1,59 @@
+import importlib.util
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'SCRCPY-ULTRA-V1.3.py')
+FAKE_ADB = os.path.join(ROOT, 'tests', 'fake_adb.py')
+
+
+@pytest.fixture(scope='session')
+def ultra():
+    """The script loaded as a module, skipping the tests if its dependencies aren't installed."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    spec = importlib.util.spec_from_file_location('scrcpy_ultra', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except Exception as e:  # pyautogui raises more than ImportError without a display
+        pytest.skip(f"Can't load {os.path.basename(SCRIPT)}: {e}")
+    return module
+
+
+@pytest.fixture
+def fake_adb(tmp_path):
+    """Path of an adb executable that runs tests/fake_adb.py with this interpreter."""
+    if os.name == 'nt':
+        pytest.skip("The fake adb is a shell script")
+    adb = tmp_path / 'adb'
+    adb.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_ADB}" "$@"\n')
+    adb.chmod(adb.stat().st_mode | stat.S_IXUSR)
+    return str(adb)
+
+
+@pytest.fixture
+def window(ultra, fake_adb, tmp_path, monkeypatch):
+    """The main window with the fake adb, saving to tmp_path."""
+    monkeypatch.delenv('ANDROID_SERIAL', raising=False)
+    monkeypatch.setattr(ultra, 'adb_path', fake_adb)
+    monkeypatch.setattr(ultra, '__file__', str(tmp_path / 'SCRCPY-ULTRA.py'))
+    app = ultra.QApplication.instance() or ultra.QApplication([])
+    window = ultra.SCRCPYULTRA()
+    window.app = app
+    window.ocrCombo.setCurrentText('OCR Disabled')
+    window.captureModeCombo.setCurrentText(ultra.CAPTURE_MODE_RAW)
+    yield window
+    window.close()
+
+
+def wait_for_jobs(window, timeout=30):
+    """Runs the Qt event loop until the window's background jobs are done."""
+    deadline = time.monotonic() + timeout
+    while window.jobScheduler.jobs and time.monotonic() < deadline:
+        window.app.processEvents()
+        time.sleep(0.01)
+    assert not window.jobScheduler.jobs
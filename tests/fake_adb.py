@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Stand-in for the adb executable, used by the tests in place of a real device.
+
+Supports 'devices', 'exec-out sh' (the persistent channel) and 'exec-out screencap -p'. Frames are
+64x128 with pixel (x, y) set to (x, y, n, 255), n being the number of the capture on that connection.
+Behaviour is controlled by environment variables:
+
+FAKE_ADB_SERIALS    comma separated serials listed by 'adb devices' (default FAKE1), with several -s is required
+FAKE_ADB_SDK        value of ro.build.version.sdk, below 28 the raw header is 12 bytes (default 33)
+FAKE_ADB_FORMAT     pixel format in the raw header, 1 is RGBA_8888 and 5 BGRA_8888 (default 1)
+FAKE_ADB_CHUNK      write raw frames in pieces of this many bytes, to exercise short reads
+FAKE_ADB_DIE_AFTER  exit halfway through the frame after this many raw captures on one connection
+FAKE_ADB_DELAY      seconds each raw capture takes
+FAKE_ADB_LOG        file every command is appended to, prefixed with the serial it was sent to
+"""
+import io
+import os
+import struct
+import sys
+import time
+
+WIDTH, HEIGHT = 64, 128
+
+
+def frame(number):
+    """Returns the RGBA bytes of capture number."""
+    pixels = bytearray()
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            pixels += bytes((x, y, number % 256, 255))
+    return bytes(pixels)
+
+
+def log(serial, command):
+    path = os.environ.get('FAKE_ADB_LOG')
+    if path:
+        with open(path, 'a') as log_file:
+            log_file.write(f"{serial} {command}\n")
+
+
+def shell(serial, out):
+    sdk = int(os.environ.get('FAKE_ADB_SDK', '33'))
+    pixel_format = int(os.environ.get('FAKE_ADB_FORMAT', '1'))
+    chunk = int(os.environ.get('FAKE_ADB_CHUNK', '0'))
+    die_after = int(os.environ.get('FAKE_ADB_DIE_AFTER', '0'))
+    delay = float(os.environ.get('FAKE_ADB_DELAY', '0'))
+    captures = 0
+    for line in sys.stdin:
+        command, _, marker = line.strip().partition('; echo ')
+        log(serial, command)
+        if command.startswith('screencap'):
+            screencap, *pipeline = command.split(' | ')
+            if '2>/dev/null' not in screencap:
+                # Like some devices, warn on the only stream exec-out has
+                out.write(b'WARNING: linker: screencap: unused DT entry\n')
+            time.sleep(delay)
+            captures += 1
+            header = struct.pack('<III', WIDTH, HEIGHT, pixel_format) + (struct.pack('<I', 0) if sdk >= 28 else b'')
+            data = header + frame(captures)
+            if pipeline:
+                # Band captures: 'tail -c +N' and 'head -c N' on the device
+                for step in pipeline:
+                    tool, count = step.split(' -c ')
+                    data = data[int(count) - 1:] if tool == 'tail' else data[:int(count)]
+                out.write(data + marker.encode() + b'\n')
+                out.flush()
+                continue
+            if die_after and captures > die_after:
+                out.write(data[:len(data) // 2])
+                out.flush()
+                os._exit(1)
+            step = chunk or len(data)
+            for start in range(0, len(data), step):
+                out.write(data[start:start + step])
+                out.flush()
+            continue
+        if command == 'getprop ro.build.version.sdk':
+            out.write(b'%d\n' % sdk)
+        elif command == 'getprop ro.build.version.release':
+            out.write(b'13\n')
+        elif command == 'getprop ro.serialno':
+            out.write(serial.encode() + b'\n')
+        elif command == 'getprop ro.product.model':
+            out.write(b'Fake Phone\n')
+        elif command == 'wm size':
+            out.write(b'Physical size: %dx%d\n' % (WIDTH, HEIGHT))
+        elif command == 'wm density':
+            out.write(b'Physical density: 420\n')
+        elif command.startswith('dumpsys input'):
+            out.write(b'    SurfaceOrientation: 0\n')
+        elif command.startswith('dumpsys window'):
+            out.write(b'  mCurrentFocus=Window{1a2b u0 com.example.chat/com.example.chat.Main}\n')
+        elif command.startswith('uiautomator dump'):
+            out.write(b'<?xml version="1.0"?><hierarchy rotation="0"><node text="hello" bounds="[0,0][10,10]"/></hierarchy>'
+                      b'UI hierchary dumped to: /dev/tty\n')
+        out.write(marker.encode() + b'\n')
+        out.flush()
+
+
+def main(args):
+    serials = os.environ.get('FAKE_ADB_SERIALS', 'FAKE1').split(',')
+    serial = serials[0]
+    if args[:1] == ['-s']:
+        serial, args = args[1], args[2:]
+    elif len(serials) > 1 and args != ['devices']:
+        # Like adb, refuse to guess the device
+        sys.stderr.write('adb: more than one device/emulator\n')
+        sys.exit(1)
+    out = sys.stdout.buffer
+    if args == ['devices']:
+        out.write(b'List of devices attached\n')
+        for name in serials:
+            out.write(f"{name}\tdevice\n".encode())
+        out.write(b'EMULATOR9\tunauthorized\n\n')
+    elif args == ['exec-out', 'sh']:
+        log(serial, 'OPEN')
+        shell(serial, out)
+    elif args == ['exec-out', 'screencap', '-p']:
+        log(serial, 'screencap -p')
+        from PIL import Image
+        png = io.BytesIO()
+        Image.frombytes('RGBA', (WIDTH, HEIGHT), frame(1)).save(png, 'PNG')
+        out.write(png.getvalue())
+    else:
+        log(serial, ' '.join(args))
+    out.flush()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def channel(ultra, fake_adb):
+    channel = ultra.AdbCaptureChannel(fake_adb, 'FAKE1', timeout=10)
+    yield channel
+    channel.close()
+
+
+@pytest.mark.parametrize('sdk, header_size', [('27', 12), ('33', 16)])
+def test_raw_header_size_follows_sdk(channel, monkeypatch, sdk, header_size):
+    monkeypatch.setenv('FAKE_ADB_SDK', sdk)
+    frame = channel.capture_raw()
+    assert channel.header_size == header_size
+    assert frame.shape == (128, 64, 4)
+    assert tuple(frame[5, 3]) == (3, 5, 1, 255)
+    # The next frame starts exactly where the last one ended
+    assert tuple(channel.capture_raw()[127, 63]) == (63, 127, 2, 255)
+    assert channel.run('getprop ro.serialno') == b'FAKE1\n'
+
+
+def test_raw_frames_arriving_in_pieces(channel, monkeypatch):
+    monkeypatch.setenv('FAKE_ADB_CHUNK', '7')
+    for number in (1, 2, 3):
+        assert tuple(channel.capture_raw()[100, 10]) == (10, 100, number, 255)
+    assert channel.run('wm size') == b'Physical size: 64x128\n'
+
+
+def test_bgra_frames_are_returned_as_rgba(channel, monkeypatch):
+    monkeypatch.setenv('FAKE_ADB_FORMAT', '5')
+    assert tuple(channel.capture_raw()[7, 9]) == (1, 7, 9, 255)
+
+
+def test_unsupported_format_closes_the_channel(ultra, channel, monkeypatch):
+    monkeypatch.setenv('FAKE_ADB_FORMAT', '4')
+    with pytest.raises(ultra.AdbChannelError):
+        channel.capture_raw()
+    assert not channel.is_open()
+
+
+def test_channel_restarts_after_the_shell_dies(ultra, channel, monkeypatch):
+    monkeypatch.setenv('FAKE_ADB_DIE_AFTER', '1')
+    assert tuple(channel.capture_raw()[0, 0]) == (0, 0, 1, 255)
+    with pytest.raises(ultra.AdbChannelError):
+        channel.capture_raw()  # The shell exits halfway through this frame
+    assert not channel.is_open()
+    # The next capture starts a new shell and isn't confused by the partial frame
+    assert tuple(channel.capture_raw()[2, 1]) == (1, 2, 1, 255)
+    assert channel.connection_id == 2
+
+
+def test_band_of_rows_matches_the_full_frame(channel):
+    # Without an earlier raw capture the layout comes from a header-only capture (capture 1)
+    band = channel.capture_raw_rows(40, 32)
+    assert band.shape == (32, 64, 4)
+    assert tuple(band[0, 5]) == (5, 40, 2, 255)
+    assert tuple(band[31, 63]) == (63, 71, 2, 255)
+    full = channel.capture_raw()
+    assert (channel.capture_raw_rows(120, 32)[:, :, :2] == full[120:, :, :2]).all()  # Clamped to the frame
+    assert channel.run('getprop ro.serialno') == b'FAKE1\n'
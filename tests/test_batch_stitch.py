@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+
+def write_session(folder, count, shift=90):
+    """Screenshots of a scrolling conversation with a fixed header, returns their paths in capture order."""
+    rng = np.random.default_rng(1)
+    content = rng.integers(0, 255, (200 + shift * count, 1, 1), np.uint8).repeat(120, axis=1).repeat(3, axis=2)
+    content = np.ascontiguousarray(content)
+    paths = []
+    for index in range(count):
+        frame = np.zeros((240, 120, 3), np.uint8)
+        frame[:40] = 200  # Header
+        frame[40:] = content[index * shift:index * shift + 200]
+        path = str(folder / f"2024-05-05_09-00-{index:02d}.png")
+        cv2.imwrite(path, frame)
+        paths.append(path)
+    return paths
+
+
+def test_unreadable_and_resized_screenshots_are_skipped(ultra, tmp_path):
+    paths = write_session(tmp_path, 5)
+    (tmp_path / 'broken.png').write_bytes(b'not a png')
+    cv2.imwrite(str(tmp_path / 'rotated.png'), np.zeros((120, 240, 3), np.uint8))
+    session = [str(tmp_path / 'broken.png'), paths[0], str(tmp_path / 'rotated.png')] + paths[1:]
+    result = ultra.batch_stitch_session(session, str(tmp_path / 'out.png'), reverse=False)
+    assert result['output'] == str(tmp_path / 'out.png')
+    assert result['frames'] == 5
+    assert 'warning' in result['message']
+
+
+def test_session_without_two_usable_screenshots_is_reported(ultra, tmp_path):
+    paths = write_session(tmp_path, 1)
+    (tmp_path / 'broken.png').write_bytes(b'not a png')
+    cv2.imwrite(str(tmp_path / 'rotated.png'), np.zeros((120, 240, 3), np.uint8))
+    session = [str(tmp_path / 'broken.png'), paths[0], str(tmp_path / 'rotated.png')]
+    result = ultra.batch_stitch_session(session, str(tmp_path / 'out.png'))
+    assert result['output'] is None
+    assert result['message'] == "fewer than two readable screenshots of the same size"
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+import pytest
+
+
+def signature(key, shade):
+    """A hand-built (hash, thumbnail) pair as frame_signature returns them."""
+    return key, np.full((64, 32), shade, np.float32)
+
+
+# Screens whose hashes are 64 bits apart, each with its own thumbnail
+SCREENS = {name: signature(((1 << 64) - 1) << (64 * number), 40 * number) for number, name in enumerate('ABCD')}
+
+
+def verdicts(ultra, names, **options):
+    index = ultra.FrameIndex(**options)
+    return [index.observe(SCREENS[name]) for name in names]
+
+
+def test_new_screens(ultra):
+    assert verdicts(ultra, 'ABC') == [(ultra.FRAME_NEW, None)] * 3
+
+
+def test_a_stall_then_the_end_of_the_scroll(ultra):
+    assert verdicts(ultra, 'AAA') == [(ultra.FRAME_NEW, None), (ultra.FRAME_STALLED, 0), (ultra.FRAME_END, 0)]
+
+
+def test_moving_again_after_a_stall_starts_counting_over(ultra):
+    assert [verdict for verdict, _ in verdicts(ultra, 'AABBB')] == [
+        ultra.FRAME_NEW, ultra.FRAME_STALLED, ultra.FRAME_NEW, ultra.FRAME_STALLED, ultra.FRAME_END]
+
+
+def test_bouncing_between_screens_stops_at_the_loop_limit(ultra):
+    assert verdicts(ultra, 'ABABA') == [(ultra.FRAME_NEW, None), (ultra.FRAME_NEW, None), (ultra.FRAME_LOOP, 0),
+                                        (ultra.FRAME_LOOP, 1), (ultra.FRAME_LOOPING, 0)]
+
+
+def test_a_new_screen_resets_the_loop_count(ultra):
+    assert [verdict for verdict, _ in verdicts(ultra, 'ABACBAB', loop_limit=3)] == [
+        ultra.FRAME_NEW, ultra.FRAME_NEW, ultra.FRAME_LOOP, ultra.FRAME_NEW, ultra.FRAME_LOOP, ultra.FRAME_LOOP,
+        ultra.FRAME_LOOPING]
+
+
+def test_close_hashes_are_confirmed_on_the_thumbnail(ultra):
+    index = ultra.FrameIndex()
+    key, thumbnail = SCREENS['A']
+    index.observe((key, thumbnail))
+    near = key ^ 0b1011  # Within FRAME_MATCH_RADIUS bits
+    assert index.observe((near, thumbnail + 1)) == (ultra.FRAME_STALLED, 0)
+    # Same hash neighbourhood, but the thumbnails disagree
+    assert index.observe((near, thumbnail + 50)) == (ultra.FRAME_NEW, None)
+    assert len(index) == 2
+
+
+@pytest.mark.parametrize('radius', [0, 3, 12])
+def test_bk_tree_query_matches_a_linear_scan(ultra, radius):
+    rng = random.Random(radius)
+    keys = [rng.getrandbits(24) for _ in range(500)]
+    tree = ultra.BKTree()
+    for value, key in enumerate(keys):
+        tree.add(key, value)
+    probe = keys[7] ^ 0b101
+    expected = sorted(((bin(probe ^ key).count('1'), value) for value, key in enumerate(keys)
+                       if bin(probe ^ key).count('1') <= radius))
+    found = tree.query(probe, radius)
+    assert sorted(found) == expected
+    assert [distance for distance, _ in found] == sorted(distance for distance, _ in found)
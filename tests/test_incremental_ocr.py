@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+HEIGHT, WIDTH = 800, 120
+
+
+def tall_content(rows=3000, seed=6):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (rows // 8, WIDTH // 8), np.uint8)
+    return cv2.resize(small, (WIDTH, rows), interpolation=cv2.INTER_LINEAR)
+
+
+def strip(ultra, window, previous, current, direction, logged=None):
+    image = Image.fromarray(current)
+    return window.newContentStrip(previous, current, image, direction, ultra.OverlapEstimator(),
+                                  (logged if logged is not None else []).append)
+
+
+@pytest.mark.parametrize('direction', ['UP', 'DOWN'])
+def test_only_the_revealed_rows_are_kept(ultra, window, direction):
+    content = tall_content()
+    previous = content[1000:1000 + HEIGHT]
+    if direction == 'UP':
+        current = content[1150:1150 + HEIGHT]  # Swiping up reveals content at the bottom
+    else:
+        current = content[850:850 + HEIGHT]
+    result = strip(ultra, window, previous, current, direction)
+    rows = 150 + ultra.INCREMENTAL_OCR_MARGIN_ROWS
+    assert result.size == (WIDTH, rows)
+    expected = current[:rows] if direction == 'DOWN' else current[-rows:]
+    assert np.array_equal(np.asarray(result), expected)
+
+
+def test_whole_frame_when_the_offset_is_uncertain(ultra, window):
+    content = tall_content()
+    logged = []
+    unrelated = tall_content(seed=7)[:HEIGHT]
+    result = strip(ultra, window, content[:HEIGHT], unrelated, 'UP', logged)
+    assert result.size == (WIDTH, HEIGHT)
+    assert logged and logged[0].startswith('Scroll offset uncertain')
+    # The first frame has nothing to compare with
+    assert strip(ultra, window, None, unrelated, 'UP').size == (WIDTH, HEIGHT)
+
+
+def test_nothing_new_on_screen(ultra, window):
+    content = tall_content()[:HEIGHT]
+    assert strip(ultra, window, content, content.copy(), 'UP') is None
+
+
+def test_overlapping_lines_are_written_once(ultra):
+    transcript = ['Alice: hi', 'Bob: hello', 'Alice: how are you?']
+    added = ultra.merge_transcript_lines(transcript, ['Bob:  Hello', 'alice: how are you?', 'Bob: fine'])
+    assert added == 1
+    assert transcript == ['Alice: hi', 'Bob: hello', 'Alice: how are you?', 'Bob: fine']
+
+
+def test_lines_that_do_not_continue_the_transcript_are_all_added(ultra):
+    transcript = ['one', 'two']
+    assert ultra.merge_transcript_lines(transcript, ['one', 'three']) == 2  # 'one' isn't the end of the transcript
+    assert transcript == ['one', 'two', 'one', 'three']
+    assert ultra.merge_transcript_lines(transcript, []) == 0
+
+
+def test_overlap_is_only_searched_within_max_overlap(ultra):
+    transcript = ['a', 'b', 'c']
+    assert ultra.merge_transcript_lines(transcript, ['b', 'c', 'd'], max_overlap=1) == 3
+    transcript = ['a', 'b', 'c']
+    assert ultra.merge_transcript_lines(transcript, ['b', 'c', 'd'], max_overlap=2) == 1
@@ -0,0 +1,31 @@
+import cv2
+import numpy as np
+import pytest
+
+HEIGHT, SHIFT, COUNT = 200, 70, 5
+
+
+def conversation():
+    """Frames scrolling down a random conversation, each with UI dump nodes for the messages fully on screen."""
+    rng = np.random.default_rng(3)
+    content = rng.integers(0, 255, (HEIGHT + SHIFT * (COUNT - 1), 80, 3), np.uint8)
+    frames = []
+    for index in range(COUNT):
+        top = index * SHIFT
+        nodes = [(f"message {row}", (0, row - top, 80, row - top + 20), 'text')
+                 for row in range(0, content.shape[0], 50) if top <= row and row + 20 <= top + HEIGHT]
+        frames.append((np.ascontiguousarray(content[top:top + HEIGHT]), nodes))
+    return content, frames
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_frames_are_placed_by_the_ui_layout(ultra, tmp_path, reverse):
+    content, frames = conversation()
+    stitcher = ultra.IncrementalStitcher(str(tmp_path / 'out.png'), reverse=reverse, work_folder=str(tmp_path))
+    for image, nodes in (reversed(frames) if reverse else frames):
+        assert stitcher.add(image, nodes) is not False
+    output = cv2.imread(stitcher.finish())
+    stitcher.close()
+    assert (output == content).all()
+    # Nodes move the other way when the frames come bottom-up, those stitches are matched by image
+    assert stitcher.layout_matches == (0 if reverse else COUNT - 1)
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from conftest import wait_for_jobs
+
+
+@pytest.fixture(autouse=True)
+def two_phones(tmp_path, monkeypatch):
+    """Two phones attached to the fake adb, which logs every command."""
+    monkeypatch.setenv('FAKE_ADB_SERIALS', 'SER-A,SER-B')
+    monkeypatch.setenv('FAKE_ADB_LOG', str(tmp_path / 'adb.log'))
+
+
+def take_screenshots(window):
+    window.onScreenshotButtonClick()
+    wait_for_jobs(window)
+
+
+def adb_log(tmp_path):
+    with open(tmp_path / 'adb.log') as log_file:
+        return [line.split(' ', 1) for line in log_file.read().splitlines()]
+
+
+def test_default_device_is_named_with_s(window, tmp_path):
+    take_screenshots(window)
+    paths = window.defaultWorkspace.autoscroll_screenshot_paths
+    assert len(paths) == 1 and os.path.dirname(paths[0]) == window.output_folder
+    window.frameStore.wait(paths[0])
+    assert os.path.exists(paths[0])
+    # The fake adb fails without -s when several phones are attached, like adb does
+    assert {serial for serial, _ in adb_log(tmp_path)} == {'SER-A'}
+
+
+def test_default_device_follows_android_serial(window, tmp_path, monkeypatch):
+    monkeypatch.setenv('ANDROID_SERIAL', 'SER-B')
+    take_screenshots(window)
+    assert window.defaultWorkspace.device.serial == 'SER-B'
+    assert len(window.defaultWorkspace.autoscroll_screenshot_paths) == 1
+    assert {serial for serial, _ in adb_log(tmp_path)} == {'SER-B'}
+
+
+def test_all_devices_save_to_their_own_folders(ultra, window, tmp_path):
+    window.refreshDevices()
+    window.deviceCombo.setCurrentText(ultra.DEVICE_ALL)
+    take_screenshots(window)
+    assert sorted(window.workspaces) == ['SER-A', 'SER-B']
+    for serial, workspace in window.workspaces.items():
+        assert workspace.output_folder == os.path.join(window.output_folder, serial)
+        assert len(workspace.autoscroll_screenshot_paths) == 1
+        assert os.path.dirname(workspace.autoscroll_screenshot_paths[0]) == workspace.output_folder
+        with open(os.path.join(workspace.output_folder, 'session.log')) as log_file:
+            assert 'Screenshot taken' in log_file.read()
+    assert not window.defaultWorkspace.autoscroll_screenshot_paths
+    assert {serial for serial, _ in adb_log(tmp_path)} == {'SER-A', 'SER-B'}
+
+
+def test_test_swipe_runs_as_a_job(window, tmp_path, monkeypatch):
+    submitted = []
+    submit = window.jobScheduler.submit
+    monkeypatch.setattr(window.jobScheduler, 'submit', lambda name, *args: submitted.append(name) or submit(name, *args))
+    window.onTestSwipeButtonClick()
+    wait_for_jobs(window)
+    assert submitted == ['Test Swipe']
+    swipes = [command for serial, command in adb_log(tmp_path) if command.startswith('input touchscreen swipe')]
+    assert len(swipes) == 1
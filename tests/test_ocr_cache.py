@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from PIL import Image
+
+SETTINGS = ('Tesseract', 'eng', True)
+
+
+def image(shade=200):
+    return Image.new('L', (40, 20), shade)
+
+
+def result(ultra, text):
+    return ultra.OCRResult(b'%PDF', text, '<html/>')
+
+
+def fields(result):
+    return result.pdf, result.text, result.hocr
+
+
+def test_key_is_stable_for_identical_pixels_and_settings(ultra):
+    assert ultra.OCRCache.key(image(), SETTINGS) == ultra.OCRCache.key(image(), tuple(SETTINGS))
+    assert ultra.OCRCache.key(image(), SETTINGS) != ultra.OCRCache.key(image(201), SETTINGS)
+
+
+@pytest.mark.parametrize('settings', [('OCRmyPDF', 'eng', True), ('Tesseract', 'eng+ita', True),
+                                      ('Tesseract', 'eng', False)])
+def test_key_changes_with_engine_languages_and_contrast(ultra, settings):
+    assert ultra.OCRCache.key(image(), settings) != ultra.OCRCache.key(image(), SETTINGS)
+
+
+def test_stored_result_is_read_back(ultra, tmp_path):
+    cache = ultra.OCRCache(str(tmp_path))
+    key = cache.key(image(), SETTINGS)
+    assert cache.get(key) is None
+    cache.put(key, result(ultra, 'hello'))
+    assert fields(cache.get(key)) == (b'%PDF', 'hello', '<html/>')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted_at_the_size_cap(ultra, tmp_path):
+    entry_bytes = len(b'%PDF') + 300 + len('<html/>')
+    cache = ultra.OCRCache(str(tmp_path), max_bytes=int(3.5 * entry_bytes))  # Evicting trims to 90%, room for three
+    keys = [cache.key(image(shade), SETTINGS) for shade in range(4)]
+    for number, key in enumerate(keys[:3]):
+        cache.put(key, result(ultra, 'x' * 300))
+        os.utime(cache._entry(key), (100 * (number + 1),) * 2)  # Oldest first, without waiting between writes
+    assert cache.get(keys[0]) is not None  # The oldest entry is used again
+    cache.put(keys[3], result(ultra, 'x' * 300))
+    assert [cache.get(key) is not None for key in keys] == [True, False, True, True]
+    assert cache.total_bytes == cache._measure() == 3 * entry_bytes
+
+
+@pytest.mark.parametrize('damage', ['missing file', 'bad text'])
+def test_corrupt_entry_is_a_miss(ultra, tmp_path, damage):
+    cache = ultra.OCRCache(str(tmp_path))
+    key = cache.key(image(), SETTINGS)
+    cache.put(key, result(ultra, 'hello'))
+    if damage == 'missing file':
+        os.remove(os.path.join(cache._entry(key), 'result.hocr'))
+    else:
+        with open(os.path.join(cache._entry(key), 'result.txt'), 'wb') as f:
+            f.write(b'\xff\xfe\xfa')
+    assert cache.get(key) is None
+    assert cache.misses == 1
+    # The damaged entry is dropped so the result can be stored again
+    cache.put(key, result(ultra, 'again'))
+    assert cache.get(key).text == 'again'
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+
+class StubWorker:
+    """Stands in for OCRServiceWorker: answers jobs with its language set as the text, no process is spawned."""
+    started = []
+    crash_jobs = 0  # Number of jobs to crash on, across workers
+    start_delay = 0
+
+    def __init__(self, languages, single_thread):
+        time.sleep(StubWorker.start_delay)
+        self.languages = languages
+        self.alive = True
+        self.answers_pings = True
+        self.process = self
+        StubWorker.started.append(self)
+
+    def is_alive(self):
+        return self.alive
+
+    def call(self, message, timeout):
+        if StubWorker.crash_jobs:
+            StubWorker.crash_jobs -= 1
+            self.alive = False
+            raise EOFError()
+        return ('ok', b'%PDF', self.languages, '')
+
+    def is_healthy(self):
+        return self.alive and self.answers_pings
+
+    def stop(self):
+        self.alive = False
+
+
+@pytest.fixture
+def service(ultra, monkeypatch):
+    monkeypatch.setattr(ultra, 'OCRServiceWorker', StubWorker)
+    monkeypatch.setattr(StubWorker, 'started', [])
+    monkeypatch.setattr(StubWorker, 'crash_jobs', 0)
+    monkeypatch.setattr(StubWorker, 'start_delay', 0)
+    return ultra.OCRService(2)
+
+
+def image():
+    return Image.new('RGB', (8, 8), 'white')
+
+
+def test_crashed_worker_is_replaced_and_the_job_retried_once(service):
+    assert service.recognize(image(), 'eng').text == 'eng'
+    StubWorker.crash_jobs = 1
+    assert service.recognize(image(), 'eng').text == 'eng'
+    assert len(StubWorker.started) == 2 and not StubWorker.started[0].alive
+    StubWorker.crash_jobs = 2  # The retry crashes too
+    with pytest.raises(EOFError):
+        service.recognize(image(), 'eng')
+    assert service.started == 1  # The crashed workers were replaced, not added to the pool
+    assert service.idle.get_nowait().alive
+
+
+def test_health_check_restarts_a_worker_that_does_not_answer(service):
+    service.recognize(image(), 'eng')
+    StubWorker.started[0].answers_pings = False
+    assert service.check_health() == 1
+    assert len(StubWorker.started) == 2
+    assert service.idle.get_nowait() is StubWorker.started[1]
+    assert service.check_health() == 0
+
+
+def test_configure_shrinks_the_pool(service):
+    first, second = service._checkout('eng'), service._checkout('eng')
+    service._checkin(first)
+    service.configure(1)
+    assert service.started == 1 and not first.alive  # Idle, stopped at once
+    service._checkin(second)
+    assert second.alive and service.idle.qsize() == 1
+    busy = service._checkout('eng')
+    service.configure(0)
+    service._checkin(busy)
+    assert service.started == 0 and not busy.alive  # Busy, stopped when its job was done
+
+
+def test_language_change_restarts_the_worker_before_the_job(service):
+    assert service.recognize(image(), 'eng').text == 'eng'
+    assert service.recognize(image(), 'eng+ita').text == 'eng+ita'
+    assert [worker.languages for worker in StubWorker.started] == ['eng', 'eng+ita']
+    assert not StubWorker.started[0].alive
+    assert service.started == 1
+
+
+def test_starting_a_worker_does_not_hold_the_pool_lock(service):
+    StubWorker.start_delay = 0.5
+    thread = threading.Thread(target=service.recognize, args=(image(), 'eng'))
+    thread.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    service.configure(1)
+    assert time.monotonic() - started < 0.3
+    thread.join()
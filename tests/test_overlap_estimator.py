@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+import pytest
+
+HEIGHT, WIDTH = 600, 120
+
+
+def tall_content(rows=3000, seed=5):
+    """Smooth random content, so a match still holds at the pyramid's reduced resolution."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (rows // 8, WIDTH // 8), np.uint8)
+    return cv2.resize(small, (WIDTH, rows), interpolation=cv2.INTER_LINEAR)
+
+
+def frames(shift, start=400, noise=0):
+    """Two frames of the same content, the second scrolled down by shift rows, optionally with compression-like noise."""
+    content = tall_content()
+    previous, current = content[start:start + HEIGHT], content[start + shift:start + shift + HEIGHT]
+    if noise:
+        jitter = np.random.default_rng(1).integers(-noise, noise + 1, current.shape)
+        current = np.clip(current.astype(np.int16) + jitter, 0, 255).astype(np.uint8)
+    return previous, current
+
+
+@pytest.mark.parametrize('mode', ['OVERLAP_MODE_ROW_SIGNATURE', 'OVERLAP_MODE_PYRAMID', 'OVERLAP_MODE_TEMPLATE',
+                                  'OVERLAP_MODE_AUTO'])
+@pytest.mark.parametrize('shift', [37, 250])
+def test_exact_offset(ultra, mode, shift):
+    estimator = ultra.OverlapEstimator(getattr(ultra, mode))
+    y_start, confidence, _ = estimator.estimate(*frames(shift))
+    assert y_start == HEIGHT - shift
+    assert confidence >= ultra.OVERLAP_MIN_CONFIDENCE
+    assert estimator.last_shift == shift
+
+
+def test_auto_takes_the_row_signature_on_lossless_frames(ultra):
+    _, _, method = ultra.OverlapEstimator().estimate(*frames(120))
+    assert method == ultra.OVERLAP_MODE_ROW_SIGNATURE
+
+
+def test_auto_falls_back_to_the_pyramid_on_noisy_frames(ultra):
+    previous, current = frames(120, noise=3)
+    estimator = ultra.OverlapEstimator()
+    assert estimator.estimate_row_signature(previous, current)[1] < ultra.OVERLAP_MIN_CONFIDENCE
+    y_start, confidence, method = estimator.estimate(previous, current)
+    assert (y_start, method) == (HEIGHT - 120, ultra.OVERLAP_MODE_PYRAMID)
+    assert confidence >= ultra.OVERLAP_MIN_CONFIDENCE
+
+
+def test_pyramid_searches_only_around_the_expected_shift(ultra):
+    previous, current = frames(300)
+    # Expecting a small scroll, the band stops well short of where the content really is
+    estimator = ultra.OverlapEstimator(ultra.OVERLAP_MODE_PYRAMID, expected_shift=40)
+    assert estimator.estimate(previous, current)[1] < ultra.OVERLAP_MIN_CONFIDENCE
+    assert estimator.last_shift is None
+    # The last measured shift takes precedence over the expected one
+    estimator.last_shift = 290
+    assert estimator.estimate(previous, current)[0] == HEIGHT - 300
+    assert estimator.last_shift == 300
+
+
+@pytest.mark.parametrize('mode', ['OVERLAP_MODE_ROW_SIGNATURE', 'OVERLAP_MODE_PYRAMID', 'OVERLAP_MODE_TEMPLATE',
+                                  'OVERLAP_MODE_AUTO'])
+@pytest.mark.parametrize('value', [0, 255])
+def test_blank_frames_are_not_trusted(ultra, mode, value):
+    blank = np.full((HEIGHT, WIDTH), value, np.uint8)
+    estimator = ultra.OverlapEstimator(getattr(ultra, mode))
+    assert estimator.estimate(blank, blank.copy())[1] < ultra.OVERLAP_MIN_CONFIDENCE
+    assert estimator.last_shift is None
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+import pytest
+
+TOP, BOTTOM, HEIGHT, WIDTH = 40, 360, 400, 160  # Scrolling area between a fixed header and footer
+
+
+def tall_content(rows=4000, seed=4):
+    """Smooth random content that still matches after being downscaled."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (rows // 8, WIDTH // 8), np.uint8)
+    return cv2.resize(small, (WIDTH, rows), interpolation=cv2.INTER_LINEAR)
+
+
+def screen(content, position):
+    """A BGR frame showing content from row position in the scrolling area."""
+    frame = np.empty((HEIGHT, WIDTH), np.uint8)
+    frame[:TOP] = 60
+    frame[BOTTOM:] = 220
+    frame[TOP:BOTTOM] = content[position:position + BOTTOM - TOP]
+    return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+
+def feed(selector, frames):
+    kept = []
+    for frame in frames:
+        kept += selector.add(frame)
+    return kept
+
+
+@pytest.mark.parametrize('reveal_at_top', [False, True])
+def test_measure_scroll(ultra, reveal_at_top):
+    content = tall_content()
+    previous, current = screen(content, 500), screen(content, 463 if reveal_at_top else 537)
+    gray = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in (previous, current)]
+    shift, viewport, confidence = ultra.measure_scroll(gray[0], gray[1], reveal_at_top)
+    assert (shift, viewport) == (37, BOTTOM - TOP)
+    assert confidence >= ultra.OVERLAP_MIN_CONFIDENCE
+    assert ultra.measure_scroll(gray[0], gray[0]) == (0, 0, 1.0)  # Nothing moved
+
+
+@pytest.mark.parametrize('reveal_at_top', [False, True])
+def test_keyframes_are_kept_at_the_keep_fraction(ultra, reveal_at_top):
+    content = tall_content()
+    step = -8 if reveal_at_top else 8
+    start = 3000 if reveal_at_top else 0
+    frames = [screen(content, start)] * 3 + [screen(content, start + step * index) for index in range(1, 60)]
+    selector = ultra.ScrollKeyframeSelector()
+    kept = feed(selector, frames)
+    assert selector.rows == (TOP, BOTTOM)
+    assert selector.reveal_at_top == reveal_at_top
+    assert kept[0][0] is frames[0] and kept[0][1] is None
+    # Kept once the content moved keep_fraction of the scrolling area
+    spacing = selector.keep_fraction * (BOTTOM - TOP)
+    shifts = [shift for _, shift in kept[1:]]
+    assert len(shifts) == 2
+    assert all(spacing <= shift <= spacing + 2 * selector.scale for shift in shifts)
+    # The frames since the last kept one are emitted when the recording ends
+    tail = selector.finish()
+    assert len(tail) == 1 and tail[0][0] is frames[-1]
+    assert 0 < tail[0][1] < spacing
+    assert selector.finish() == []
+
+
+def test_gap_keeps_the_last_overlapping_frame_then_the_new_one(ultra):
+    content = tall_content()
+    frames = [screen(content, 8 * index) for index in range(8)]
+    selector = ultra.ScrollKeyframeSelector()
+    assert len(feed(selector, frames)) == 1  # Only the first frame, not far enough for another yet
+    jumped = screen(tall_content(seed=9), 0)  # Unrelated content, nothing overlaps
+    kept = selector.add(jumped)
+    assert [frame is expected for (frame, _), expected in zip(kept, (frames[-1], jumped))] == [True, True]
+    assert kept[0][1] == 8 * 7 and kept[1][1] is None
@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+HEIGHT, WIDTH = 800, 200
+HEADER, FOOTER = 120, 680  # Status bar and chat header above, input box below
+
+
+def tall_content(rows=4000, seed=8):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (rows // 8, WIDTH // 8), np.uint8)
+    return cv2.resize(small, (WIDTH, rows), interpolation=cv2.INTER_LINEAR)
+
+
+def session(frames=4, step=150, top=HEADER, bottom=FOOTER):
+    """Grayscale frames of a chat scrolled by step rows each, with a status bar clock ticking every frame."""
+    content = tall_content()
+    screens = []
+    for number in range(frames):
+        frame = np.full((HEIGHT, WIDTH), 30, np.uint8)
+        frame[10:30, 170:190] = 100 + 40 * number  # The clock, too few columns to count as moving
+        frame[40:top] = 90  # Chat header
+        frame[bottom:] = 240  # Input box
+        frame[top:bottom] = content[step * number:step * number + bottom - top]
+        screens.append(frame)
+    return screens
+
+
+def test_scrolling_area_is_found_between_the_fixed_rows(ultra):
+    assert ultra.detect_scroll_roi(session()) == (0, HEADER, WIDTH, FOOTER - HEADER)
+
+
+def test_a_short_blank_stretch_does_not_split_the_area(ultra):
+    frames = session()
+    for frame in frames:
+        frame[400:440] = 255  # Same blank rows in every frame, e.g. a gap between messages
+    assert ultra.detect_scroll_roi(frames) == (0, HEADER, WIDTH, FOOTER - HEADER)
+
+
+def test_the_tallest_moving_run_is_kept(ultra):
+    frames = session()
+    for number, frame in enumerate(frames):
+        frame[HEADER:HEADER + 80] = 90  # The rest of the header...
+        frame[40:60] = 50 + 50 * number  # ...above a banner that changes on its own
+    assert ultra.detect_scroll_roi(frames) == (0, HEADER + 80, WIDTH, FOOTER - HEADER - 80)
+
+
+def test_too_few_frames(ultra):
+    assert ultra.detect_scroll_roi([]) is None
+    assert ultra.detect_scroll_roi(session(frames=1)) is None
+    # Frames of another size (the screen rotated) are left out
+    assert ultra.detect_scroll_roi(session(frames=1) + [np.zeros((WIDTH, HEIGHT), np.uint8)]) is None
+
+
+def test_nothing_moved(ultra):
+    frames = session(step=0)
+    for frame in frames:
+        frame[10:30, 170:190] = 100  # Not even the clock
+    assert ultra.detect_scroll_roi(frames) is None
+    assert ultra.detect_scroll_roi(session(step=0)) is None  # Only the clock changed
+
+
+def test_a_moving_band_below_the_minimum_height(ultra):
+    top = 300
+    bottom = top + int(ultra.ROI_MIN_HEIGHT_FRACTION * HEIGHT) - 10
+    assert ultra.detect_scroll_roi(session(top=top, bottom=bottom)) is None
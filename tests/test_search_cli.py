@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPT
+
+
+@pytest.mark.parametrize('arguments', [['--search', 'lunch'], ['--search=lunch']])
+def test_command_line_search(ultra, tmp_path, arguments):
+    manifest = ultra.SessionManifest(str(tmp_path / '.manifest.sqlite'))
+    image_path = str(tmp_path / '2024-05-05_09-00-00.png')
+    manifest.index_text(image_path, ultra.TEXT_SOURCE_OCR, [('lunch on friday', (1, 2, 30, 12))])
+    manifest.close()
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, SCRIPT] + arguments + ['--manifest', str(tmp_path / '.manifest.sqlite')],
+                            capture_output=True, text=True, timeout=60, env=env)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split('\t')[0] == image_path
+    assert 'lunch on friday' in result.stdout
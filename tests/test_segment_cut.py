@@ -0,0 +1,56 @@
+import numpy as np
+from PIL import Image
+
+WIDTH = 100
+
+
+def page(height=2000, line=30, period=50):
+    """White page with a 'text line' of black and white stripes at the top of every period."""
+    pixels = np.full((height, WIDTH), 255, np.uint8)
+    for top in range(0, height, period):
+        pixels[top:top + line, ::2] = 0
+    return pixels
+
+
+def inked(pixels, row):
+    return pixels[row].min() != pixels[row].max()
+
+
+def test_cut_lands_in_the_middle_of_the_nearest_gap(ultra):
+    pixels = page()
+    # Line at 1000..1030, gap 1030..1050, the limit falls inside the next line
+    cut = ultra.find_segment_cut(Image.fromarray(pixels), 0, 1060, search_rows=200)
+    assert cut == 1040
+    assert not inked(pixels, cut - 1) and not inked(pixels, cut)
+
+
+def test_cut_inside_a_gap_stays_before_the_limit(ultra):
+    pixels = page()
+    cut = ultra.find_segment_cut(Image.fromarray(pixels), 0, 1045, search_rows=200)
+    assert cut == 1037  # Middle of the blank rows 1030..1044 that fit under the limit
+    assert not inked(pixels, cut)
+
+
+def test_busy_background_cuts_at_the_calmest_row(ultra):
+    rng = np.random.default_rng(3)
+    pixels = rng.integers(0, 255, (600, WIDTH), np.uint8)
+    pixels[480, :] = 100
+    pixels[480, ::2] = 120  # Calmest row, but still more than SEGMENT_BLANK_ROW_RANGE of ink
+    assert ultra.find_segment_cut(Image.fromarray(pixels), 0, 500, search_rows=100) == 480
+
+
+def test_limit_past_the_end_takes_the_rest_of_the_image(ultra):
+    image = Image.fromarray(page(300))
+    assert ultra.find_segment_cut(image, 0, 400) == 300
+    assert ultra.find_segment_cut(image, 0, 300) == 300
+
+
+def test_segments_cover_the_image_without_splitting_lines(ultra):
+    pixels = page(5000)
+    segments = list(ultra.iter_image_segments(Image.fromarray(pixels), max_height=1234))
+    heights = [segment.height for segment, _ in segments]
+    assert all(height <= 1234 for height in heights) and sum(heights) == 5000
+    assert [is_last for _, is_last in segments] == [False] * (len(segments) - 1) + [True]
+    assert np.array_equal(np.vstack([np.asarray(segment) for segment, _ in segments]), pixels)
+    for cut in np.cumsum(heights)[:-1]:
+        assert not inked(pixels, cut - 1) and not inked(pixels, cut)
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def manifest(ultra, tmp_path):
+    manifest = ultra.SessionManifest(str(tmp_path / 'manifest.db'))
+    yield manifest
+    manifest.close()
+
+
+def touch(path, data=b'png'):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_frames_taken_in_the_same_second_get_unique_names(manifest, tmp_path):
+    first = manifest.add_frame(str(tmp_path), '2024-05-05_10-00-00', '.png')
+    second = manifest.add_frame(str(tmp_path), '2024-05-05_10-00-00', '.png')  # Recorded, not written yet
+    touch(tmp_path / '2024-05-05_10-00-01.png')  # On disk, but not in the manifest
+    third = manifest.add_frame(str(tmp_path), '2024-05-05_10-00-01', '.png')
+    assert [os.path.basename(path) for path in (first, second, third)] == [
+        '2024-05-05_10-00-00.png', '2024-05-05_10-00-00_2.png', '2024-05-05_10-00-01_2.png']
+
+
+def test_paths_are_sorted_by_session_then_nanoseconds(manifest, tmp_path):
+    early = manifest.start_session(str(tmp_path))
+    late = manifest.start_session(str(tmp_path))
+    # Names that sort the wrong way, the monotonic clock decides within a session
+    paths = [manifest.add_frame(str(tmp_path), name, '.png', session_id=session, captured=(0, monotonic))
+             for name, session, monotonic in (('2024-05-05_10-00-01', late, 5), ('2024-05-05_10-00-02', early, 9),
+                                              ('2024-05-05_10-00-03', early, 3), ('2024-05-05_10-00-04', late, 1))]
+    order = manifest.capture_order(paths)
+    assert {path: session for path, (session, _, _) in order.items()} == dict(zip(paths, (late, early, early, late)))
+    assert manifest.sort_paths(paths) == [paths[2], paths[1], paths[3], paths[0]]
+    # One unknown path and the names decide for all of them
+    stranger = str(tmp_path / '2024-01-01_00-00-00.png')
+    assert manifest.sort_paths(paths + [stranger]) == [stranger] + paths
+
+
+def test_a_crop_sorts_like_its_frame(manifest, tmp_path):
+    frames = [manifest.add_frame(str(tmp_path), name, '.png', captured=(0, monotonic))
+              for name, monotonic in (('2024-05-05_10-00-01', 2), ('2024-05-05_10-00-02', 1))]
+    crops = [path.replace('.png', '_cropped.png') for path in frames]
+    for frame, crop in zip(frames, crops):
+        manifest.set_cropped_path(frame, crop)
+    assert manifest.sort_paths(crops) == crops[::-1]
+
+
+def test_hits_on_crops_kept_in_memory_point_at_the_original(manifest, tmp_path):
+    session = manifest.start_session(str(tmp_path))
+    manifest.set_session_roi(session, (0, 230, 1080, 1980))
+    frame = manifest.add_frame(str(tmp_path), 'shot', '.png', session_id=session)
+    touch(frame)
+    crop = str(tmp_path / 'shot_cropped.png')  # Never written
+    manifest.set_cropped_path(frame, crop)
+    assert manifest.locate(crop, (10, 20, 110, 60)) == (frame, (10, 250, 110, 290))
+    assert manifest.locate(crop, None) == (frame, None)
+    assert manifest.locate(frame, (1, 2, 3, 4)) == (frame, (1, 2, 3, 4))  # On disk, left as it is
+    manifest.index_text(crop, 'OCR', [('hello world', (10, 20, 110, 60))])
+    assert manifest.search('hel') == [(frame, (10, 250, 110, 290), 'OCR', session, 'hello world')]
+
+
+def test_finished_stitch_is_reused_until_an_input_changes(manifest, tmp_path):
+    inputs = [touch(tmp_path / f'{name}.png') for name in 'ab']
+    key = manifest.stitch_inputs(inputs, ('Auto', None))
+    assert manifest.stitch_output(key) is None
+    output = touch(tmp_path / 'stitched.png')
+    manifest.set_stitch_output(key, output, 2)
+    assert manifest.stitch_output(manifest.stitch_inputs(inputs, ('Auto', None))) == (output, 2)
+    assert manifest.stitch_inputs(inputs, ('Full Template', None)) != key
+    touch(inputs[1], b'a longer png')
+    assert manifest.stitch_inputs(inputs, ('Auto', None)) != key
+    os.remove(output)
+    assert manifest.stitch_output(key) is None  # The output was deleted
+
+
+def test_ocr_output_is_reused_for_the_same_file_and_settings(manifest, tmp_path):
+    image = touch(tmp_path / 'shot.png')
+    pdf = touch(tmp_path / 'shot.pdf', b'%PDF')
+    settings = ('OCRmyPDF', 'eng', False)
+    assert manifest.ocr_output(image, settings) is None
+    manifest.set_ocr_output(image, settings, pdf)
+    assert manifest.ocr_output(image, settings) == pdf
+    assert manifest.ocr_output(image, ('OCRmyPDF', 'ita', False)) is None
+    touch(image, b'another screenshot')
+    assert manifest.ocr_output(image, settings) is None
+
+
+def test_offsets_are_remembered_per_method(manifest):
+    manifest.put_offset('digest a', 'digest b', 'Auto', 1500)
+    assert manifest.get_offset('digest a', 'digest b', 'Auto') == 1500
+    assert manifest.get_offset('digest a', 'digest b', 'Full Template') is None
+    assert manifest.get_offset('digest b', 'digest a', 'Auto') is None
@@ -0,0 +1,39 @@
+import numpy as np
+from PIL import Image
+
+
+def screen(value):
+    return Image.fromarray(np.full((64, 32, 3), value, np.uint8))
+
+
+def test_polls_the_band_and_grabs_the_full_frame_once(ultra):
+    # The screen moves for three polls after the swipe, then stays put
+    polled = iter([40, 80, 120] + [160] * 20)
+    grabs = []
+
+    def poll():
+        return np.asarray(screen(next(polled)))[24:40]
+
+    def grab():
+        grabs.append(1)
+        return screen(160)
+
+    detector = ultra.SettleDetector(grab, timeout=5, poll_interval=0, poll=poll, rows=(24, 40))
+    image, _, settled = detector.wait(screen(0))
+    assert settled
+    assert image.size == (32, 64)
+    assert len(grabs) == 1
+
+
+def test_without_a_band_every_poll_is_a_full_frame(ultra):
+    frames = iter([screen(40)] + [screen(90)] * 20)
+    grabs = []
+
+    def grab():
+        grabs.append(1)
+        return next(frames)
+
+    image, _, settled = ultra.SettleDetector(grab, timeout=5, poll_interval=0).wait(screen(0))
+    assert settled
+    assert np.asarray(image)[0, 0, 0] == 90
+    assert len(grabs) == 4  # Moved, changed, then two unchanged polls
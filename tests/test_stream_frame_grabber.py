@@ -0,0 +1,82 @@
+import threading
+import time
+import types
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+def push(grabber, value):
+    """Hands the grabber a decoded frame the way its reader thread does."""
+    with grabber.condition:
+        grabber.frame = np.full((4, 2, 3), value, np.uint8)
+        grabber.sequence += 1
+        grabber.condition.notify_all()
+
+
+def test_waits_for_a_frame_decoded_after_the_swipe(ultra):
+    grabber = ultra.StreamFrameGrabber('unused')
+    push(grabber, 10)
+    swiped_at = grabber.sequence
+    threading.Timer(0.2, push, (grabber, 20)).start()
+    sequence, frame = grabber.latest(swiped_at, timeout=5)
+    assert sequence == swiped_at + 1
+    assert frame[0, 0, 0] == 20
+
+
+def test_without_a_newer_frame_the_newest_is_returned(ultra):
+    grabber = ultra.StreamFrameGrabber('unused')
+    push(grabber, 10)
+    sequence, frame = grabber.latest(grabber.sequence, timeout=0.1)
+    assert sequence == 1
+    assert frame[0, 0, 0] == 10
+
+
+def test_recording_is_used_without_the_v4l2_device(ultra, tmp_path, monkeypatch):
+    monkeypatch.delenv(ultra.STREAM_SOURCE_ENV, raising=False)
+    monkeypatch.setattr(ultra.sys, 'platform', 'linux')
+    monkeypatch.setattr(ultra, 'STREAM_V4L2_DEVICE', str(tmp_path / 'video2'))
+    window = types.SimpleNamespace(output_folder=str(tmp_path))
+    assert ultra.SCRCPYULTRA.streamSource(window) == str(tmp_path / ultra.STREAM_RECORDING_NAME)
+    (tmp_path / 'video2').touch()
+    assert ultra.SCRCPYULTRA.streamSource(window) == str(tmp_path / 'video2')
+
+
+def write_clip(path, frames=20, fps=20):
+    """A short clip standing in for the device, frame n has every pixel set to 10 * n."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, (64, 128))
+    for number in range(frames):
+        writer.write(np.full((128, 64, 3), 10 * number, np.uint8))
+    writer.release()
+    return str(path)
+
+
+def test_synthetic_clip_is_decoded_in_order_at_its_frame_rate(ultra, tmp_path):
+    grabber = ultra.StreamFrameGrabber(write_clip(tmp_path / 'clip.avi'), realtime=True)
+    grabber.start()
+    started = time.monotonic()
+    seen = []
+    try:
+        while len(seen) < 20 and time.monotonic() - started < 10:
+            sequence, frame = grabber.latest(seen[-1][0] if seen else 0, timeout=1)
+            if seen and sequence == seen[-1][0]:
+                break  # The clip has ended
+            seen.append((sequence, int(frame[0, 0, 0])))
+        elapsed = time.monotonic() - started
+    finally:
+        grabber.stop()
+    sequences = [sequence for sequence, _ in seen]
+    assert sequences == sorted(set(sequences)) and sequences[-1] == 20
+    assert len(seen) >= 10  # Paced at the clip's rate, so most frames can be picked up one by one
+    assert [value for _, value in seen] == sorted(value for _, value in seen)
+    assert abs(seen[-1][1] - 190) <= 4  # The last frame, give or take compression
+    assert 0.6 < elapsed < 3  # 20 frames at 20 fps
+
+
+def test_capture_screen_reads_the_stream(ultra, window, tmp_path, monkeypatch):
+    monkeypatch.setenv(ultra.STREAM_SOURCE_ENV, write_clip(tmp_path / 'clip.avi'))
+    image = window.captureScreen(window.defaultWorkspace, ultra.CAPTURE_MODE_STREAM)
+    assert isinstance(image, Image.Image)
+    assert image.size == (64, 128)
+    assert window.streamGrabber.is_running()
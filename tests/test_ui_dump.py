@@ -0,0 +1,74 @@
+import types
+
+import pytest
+
+TOOLBAR = ('Chat with Bob', (0, 0, 1080, 150), 'com.example.chat:id/title')
+INPUT = ('Type a message', (0, 2200, 1080, 2340), 'com.example.chat:id/input')
+
+
+def messages(first, last, scrolled=0):
+    """Message bubbles first..last, 100 px apart under the toolbar, after the content moved up by scrolled px."""
+    return [(f'message {number}', (40, 200 + 100 * number - scrolled, 1000, 280 + 100 * number - scrolled), '')
+            for number in range(first, last + 1)]
+
+
+def dump(nodes):
+    """uiautomator dump output for nodes, as adb streams it: a warning first, the status line after."""
+    xml = ''.join(f'<node text="{text}" resource-id="{resource_id}" bounds="[{box[0]},{box[1]}][{box[2]},{box[3]}]">'
+                  f'<node text="" resource-id="" bounds="[0,0][1,1]"/></node>' for text, box, resource_id in nodes)
+    return (b'WARNING: linker: unused DT entry\n<?xml version=\'1.0\' encoding=\'UTF-8\' standalone=\'yes\' ?>'
+            b'<hierarchy rotation="0">' + xml.encode() + b'</hierarchy>UI hierchary dumped to: /dev/tty\n')
+
+
+def parse(ultra, data, chunk):
+    parser = ultra.UIDumpParser()
+    for start in range(0, len(data), chunk):
+        parser.feed(data[start:start + chunk])
+    return parser
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 4096])
+def test_nodes_are_parsed_as_the_dump_streams_in(ultra, chunk):
+    nodes = [TOOLBAR] + messages(0, 5) + [INPUT]
+    parser = parse(ultra, dump(nodes), chunk)
+    assert parser.finished and parser.error is None
+    assert parser.nodes == nodes  # In document order, the empty child nodes are left out
+
+
+def test_incomplete_or_broken_dumps_are_not_finished(ultra):
+    data = dump(messages(0, 2))
+    parser = parse(ultra, data[:len(data) // 2], 16)
+    assert not parser.finished and parser.error is None
+    parser = parse(ultra, data.replace(b'</node>', b'</nod>', 1), 16)
+    assert not parser.finished and parser.error is not None
+    assert not parse(ultra, b'ERROR: could not get idle state.\n', 16).finished
+
+
+def test_dump_ui_nodes_reads_the_device(window):
+    assert window.dump_ui_nodes(window.defaultWorkspace) == [('hello', (0, 0, 10, 10), '')]
+
+
+def test_scroll_shift_is_measured_on_shared_nodes(ultra):
+    before = [TOOLBAR] + messages(0, 19) + [INPUT]
+    after = [TOOLBAR] + messages(3, 22, scrolled=340) + [INPUT]
+    assert ultra.ui_scroll_shift(before, after) == (340, 17)
+    assert ultra.ui_scroll_shift(before, before) == (0, 22)  # Nothing moved
+    assert ultra.ui_scroll_shift(before, [TOOLBAR]) == (0, 1)  # Only the fixed node is shared
+    assert ultra.ui_scroll_shift(messages(0, 3), messages(10, 12)) == (None, 0)
+
+
+def test_repeated_and_cut_off_nodes_do_not_anchor(ultra):
+    repeated = [('ok', (40, 200, 1000, 280), ''), ('ok', (40, 300, 1000, 380), '')]
+    assert ultra.ui_scroll_shift(repeated, [('ok', (40, 100, 1000, 180), '')]) == (None, 0)
+    cut_off = [('message 0', (40, 0, 1000, 30), '')]  # Partly scrolled off the top, so its box shrank
+    assert ultra.ui_scroll_shift(messages(0, 0), cut_off) == (None, 0)
+
+
+def test_transcript_writes_shared_lines_once_without_the_fixed_nodes(window, tmp_path):
+    workspace = window.defaultWorkspace
+    workspace.output_folder = str(tmp_path)
+    screens = [[TOOLBAR] + messages(first, first + 5, scrolled=100 * first) + [INPUT] for first in (0, 4, 8)]
+    frames = [types.SimpleNamespace(index=index, ui_nodes=nodes) for index, nodes in enumerate(screens)]
+    path = window.writeUIDumpTranscript(workspace, frames[::-1], 'UP', 'session')
+    with open(path, encoding='utf-8') as transcript:
+        assert transcript.read().splitlines() == [f'message {number}' for number in range(14)]